@@ -8,7 +8,12 @@ from pathlib import Path
 # 라우터 임포트
 from modules import asset_manager, schedule_manager, notebook_manager, chat_manager, gdrive_manager, test_manager, projects_manager
 # 데이터베이스 초기화
-from utils.database import init_database
+from utils.database import (
+    init_database, close_pool, get_pool_stats,
+    get_reference_cache_stats, get_tag_index_stats, get_ledger_cache_stats,
+    get_response_cache_stats,
+)
+from utils.ledger_snapshot import get_ledger_snapshot_stats
 # 디스코드 리포트 스케줄러
 from modules.discord_report import init_scheduler
 
@@ -46,6 +51,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # 라우터 등록
@@ -70,6 +76,10 @@ def startup_event():
     else:
         print("[startup] obsidian-vault에 .git 없음 — git sync 비활성화 (Mutagen 환경)")
 
+@app.on_event("shutdown")
+def shutdown_event():
+    close_pool()
+
 # 기본 라우트
 @app.get("/")
 async def root():
@@ -88,8 +98,16 @@ async def root():
 # 헬스 체크
 @app.get("/health")
 async def health_check():
-    """서버 헬스 체크"""
-    return {"status": "healthy"}
+    """서버 헬스 체크 (DB 연결 풀 현황 포함)"""
+    return {
+        "status": "healthy",
+        "db_pool": get_pool_stats(),
+        "reference_cache": get_reference_cache_stats(),
+        "tag_index": get_tag_index_stats(),
+        "ledger_cache": get_ledger_cache_stats(),
+        "response_cache": get_response_cache_stats(),
+        "ledger_snapshot": get_ledger_snapshot_stats(),
+    }
 
 if __name__ == "__main__":
     # 서버 실행 (개발 환경)
@@ -11,16 +11,16 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+from utils.database import add_column_if_missing, run_migrations
+
 DB_PATH = Path(__file__).parent.parent / "data" / "agent_sessions.db"
 
 _schema_ready = False
 
 
-def _ensure_schema(conn: sqlite3.Connection) -> None:
-    global _schema_ready
-    if _schema_ready:
-        return
-    conn.execute("""
+def _migrate_create_sessions(cursor) -> None:
+    """v1: agent_sessions 테이블 생성"""
+    cursor.execute("""
         CREATE TABLE IF NOT EXISTS agent_sessions (
             id          TEXT PRIMARY KEY,
             objective   TEXT NOT NULL,
@@ -35,12 +35,24 @@ def _ensure_schema(conn: sqlite3.Connection) -> None:
             summary     TEXT
         )
     """)
-    # 기존 DB에 summary 컬럼이 없으면 추가
-    try:
-        conn.execute("ALTER TABLE agent_sessions ADD COLUMN summary TEXT")
-    except sqlite3.OperationalError:
-        pass
-    conn.commit()
+
+
+def _migrate_add_summary(cursor) -> None:
+    """v2: summary 컬럼이 없는 기존 DB에 컬럼 추가"""
+    add_column_if_missing(cursor, "agent_sessions", "summary", "TEXT")
+
+
+MIGRATIONS = [
+    _migrate_create_sessions,
+    _migrate_add_summary,
+]
+
+
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    global _schema_ready
+    if _schema_ready:
+        return
+    run_migrations(conn, MIGRATIONS)
     _schema_ready = True
 
 
@@ -0,0 +1,390 @@
+"""
+asset-manager 원장 통계 분석 (이상 지출 탐지, 월말 지출 예측)
+카테고리별 일별 금액을 (카테고리 x 날짜) NumPy 행렬 하나로 읽어 모든 카테고리를 한 번에 계산한다.
+
+이상 탐지
+- 이동 z-score: 직전 ZSCORE_WINDOW일 평균/표준편차 대비 그날 금액
+- MAD 이상치: 거래가 있던 날 금액의 중앙값/중앙절대편차(MAD) 기준 robust z
+- 수준 변화: 어느 날 전후 SHIFT_WINDOW일 평균의 차이 (카테고리별로 가장 큰 지점 하나)
+
+월말 예측
+- run-rate: 최근 RUNRATE_WINDOW일 일평균 x 남은 일수
+- 월내 분포(seasonal profile): 과거 달들에서 같은 날짜 이후에 쓴 금액의 평균/분위수
+"""
+import calendar
+from datetime import date, timedelta
+
+import numpy as np
+
+from utils.database import get_reference_data
+
+ZSCORE_WINDOW = 28
+ZSCORE_MIN_ACTIVE_DAYS = 4   # 직전 구간에 거래일이 이보다 적은 카테고리는 z-score 생략 (월 1회 고정비 등)
+ZSCORE_THRESHOLD = 3.0
+MAD_SCALE = 0.6745           # 정규분포에서 MAD를 표준편차 단위로 맞추는 계수
+MAD_MIN_SAMPLES = 5
+MAD_THRESHOLD = 3.5
+SHIFT_WINDOW = 14
+SHIFT_THRESHOLD = 4.0
+HISTORY_DAYS = 90            # 기준선 계산에 쓰는 분석 기간 이전 일수
+
+RUNRATE_WINDOW = 28
+FORECAST_HISTORY_MONTHS = 12
+FORECAST_Z = 1.2816          # 80% 구간 (정규 근사)
+FORECAST_QUANTILES = (10, 90)
+
+
+def load_daily_matrix(cursor, class_id: int, start: date, end: date) -> tuple:
+    """일 집계 테이블에서 (카테고리 ID 배열, 카테고리 x 날짜 금액 행렬) 로드
+
+    matrix[i, d]는 category_ids[i]의 start + d일 합계이며 거래가 없는 날은 0이다.
+    """
+    cursor.execute("""
+        SELECT category_id, CAST(julianday(date) - julianday(?) AS INTEGER) as day, SUM(total_cost)
+        FROM asset_daily_stats
+        WHERE date BETWEEN ? AND ? AND class_id = ?
+        GROUP BY date, category_id
+    """, (start.isoformat(), start.isoformat(), end.isoformat(), class_id))
+    rows = np.array([tuple(row) for row in cursor.fetchall()], dtype=float).reshape(-1, 3)
+
+    category_ids, row_index = np.unique(rows[:, 0].astype(np.int64), return_inverse=True)
+    matrix = np.zeros((len(category_ids), (end - start).days + 1))
+    matrix[row_index, rows[:, 1].astype(np.int64)] = rows[:, 2]
+    return category_ids, matrix
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """sums[:, t] = values[:, t - window:t]의 합 (t = window..n, 누적합 차분)"""
+    cumulative = np.concatenate([np.zeros((values.shape[0], 1)), np.cumsum(values, axis=1)], axis=1)
+    return cumulative[:, window:] - cumulative[:, :-window]
+
+
+def rolling_zscores(matrix: np.ndarray, window: int = ZSCORE_WINDOW,
+                    min_active_days: int = ZSCORE_MIN_ACTIVE_DAYS) -> tuple:
+    """직전 window일 대비 z-score와 그 평균 (앞쪽 window일과 계산 불가 지점은 nan)"""
+    zscores = np.full(matrix.shape, np.nan)
+    means = np.full(matrix.shape, np.nan)
+    if matrix.shape[1] <= window:
+        return zscores, means
+
+    # 열 t의 기준 구간은 [t - window, t) 이므로 마지막 합(오늘 포함 구간)은 버림
+    mean = _window_sums(matrix, window)[:, :-1] / window
+    variance = _window_sums(matrix ** 2, window)[:, :-1] / window - mean ** 2
+    std = np.sqrt(np.clip(variance, 0, None))
+    active = _window_sums((matrix > 0).astype(float), window)[:, :-1]
+
+    valid = (std > 0) & (active >= min_active_days)
+    current = matrix[:, window:]
+    zscores[:, window:] = np.divide(current - mean, std, out=np.full(current.shape, np.nan), where=valid)
+    means[:, window:] = mean
+    return zscores, means
+
+
+def mad_scores(matrix: np.ndarray, min_samples: int = MAD_MIN_SAMPLES) -> tuple:
+    """거래가 있던 날 금액의 robust z (MAD_SCALE * (x - 중앙값) / MAD)와 카테고리별 중앙값
+
+    거래가 없는 날과 표본이 min_samples보다 적거나 MAD가 0인 카테고리는 nan.
+    """
+    scores = np.full(matrix.shape, np.nan)
+    medians = np.full(matrix.shape[0], np.nan)
+    usable = np.count_nonzero(matrix > 0, axis=1) >= min_samples
+    if not usable.any():
+        return scores, medians
+
+    amounts = np.where(matrix[usable] > 0, matrix[usable], np.nan)
+    median = np.nanmedian(amounts, axis=1)
+    mad = np.nanmedian(np.abs(amounts - median[:, None]), axis=1)
+    robust = np.full(amounts.shape, np.nan)
+    np.divide(MAD_SCALE * (amounts - median[:, None]), mad[:, None], out=robust, where=mad[:, None] > 0)
+    scores[usable] = robust
+    medians[usable] = median
+    return scores, medians
+
+
+def level_shifts(matrix: np.ndarray, window: int = SHIFT_WINDOW) -> tuple:
+    """day t 직전 window일 평균과 t부터 window일 평균의 차이를 표준오차로 나눈 점수
+
+    반환: (scores, before_means, after_means), 각 (카테고리 x 날짜)이며 양쪽 구간이
+    모두 채워지지 않는 날은 nan. 표준오차는 카테고리 전체 표준편차 기준 하한을 두어
+    0이던 지출이 일정 금액으로 바뀌는 경우(구간 내 분산 0)도 잡는다.
+    """
+    shape = matrix.shape
+    scores, before, after = (np.full(shape, np.nan) for _ in range(3))
+    if shape[1] < 2 * window:
+        return scores, before, after
+
+    means = _window_sums(matrix, window) / window
+    variances = np.clip(_window_sums(matrix ** 2, window) / window - means ** 2, 0, None)
+    # 구간 [t - window, t)와 [t, t + window)는 같은 창 합 배열에서 window만큼 떨어진 두 값
+    mean_before, mean_after = means[:, :-window], means[:, window:]
+    stderr = np.sqrt((variances[:, :-window] + variances[:, window:]) / window)
+    stderr = np.maximum(stderr, matrix.std(axis=1, keepdims=True) / np.sqrt(window))
+
+    days = slice(window, shape[1] - window + 1)
+    np.divide(mean_after - mean_before, stderr, out=scores[:, days], where=stderr > 0)
+    before[:, days], after[:, days] = mean_before, mean_after
+    return scores, before, after
+
+
+def detect_anomalies(cursor, class_id: int, start: date, end: date,
+                     history_days: int = HISTORY_DAYS) -> dict:
+    """start~end 기간의 이상 금액과 수준 변화 (기준선은 history_days일 전부터)
+
+    anomalies는 점수 절댓값이 큰 순서이며 type은 zscore / mad / level_shift 중 하나다.
+    """
+    history_start = start - timedelta(days=history_days)
+    category_ids, matrix = load_daily_matrix(cursor, class_id, history_start, end)
+    offset = (start - history_start).days
+    categories = get_reference_data(cursor)["category_by_id"]
+
+    def entry(kind, row, day, score, **values):
+        category = categories.get(int(category_ids[row]), {})
+        return {
+            "type": kind,
+            "category_id": int(category_ids[row]),
+            "category_name": category.get("display_name") or category.get("name"),
+            "date": (history_start + timedelta(days=int(day))).isoformat(),
+            "score": round(float(score), 2),
+            **{key: round(float(value), 2) for key, value in values.items()},
+        }
+
+    anomalies = []
+    zscores, means = rolling_zscores(matrix)
+    for row, day in zip(*np.nonzero(np.nan_to_num(zscores[:, offset:]) >= ZSCORE_THRESHOLD)):
+        day += offset
+        anomalies.append(entry("zscore", row, day, zscores[row, day],
+                               amount=matrix[row, day], expected=means[row, day]))
+
+    robust, medians = mad_scores(matrix)
+    for row, day in zip(*np.nonzero(np.nan_to_num(robust[:, offset:]) >= MAD_THRESHOLD)):
+        day += offset
+        anomalies.append(entry("mad", row, day, robust[row, day],
+                               amount=matrix[row, day], expected=medians[row]))
+
+    shifts, before, after = level_shifts(matrix)
+    period = np.abs(np.nan_to_num(shifts[:, offset:]))
+    if period.size:
+        strongest = period.argmax(axis=1)
+        for row in np.nonzero(period[np.arange(len(strongest)), strongest] >= SHIFT_THRESHOLD)[0]:
+            day = strongest[row] + offset
+            anomalies.append(entry("level_shift", row, day, shifts[row, day],
+                                   before_avg=before[row, day], after_avg=after[row, day]))
+
+    anomalies.sort(key=lambda a: (-abs(a["score"]), a["date"], a["category_id"]))
+    return {
+        "class_id": class_id,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "history_start": history_start.isoformat(),
+        "categories": len(category_ids),
+        "anomalies": anomalies,
+    }
+
+
+def month_profile(matrix: np.ndarray, start: date, months: int) -> np.ndarray:
+    """matrix(start부터의 일별 금액)를 (카테고리 x 달 x 일자(0~30)) 텐서로 재배치
+
+    start는 1일이어야 하며 months개 달을 채운다 (없는 날짜는 0).
+    """
+    days = np.datetime64(start, "D") + np.arange(matrix.shape[1])
+    month_index = (days.astype("datetime64[M]") - np.datetime64(start, "M")).astype(np.int64)
+    day_of_month = (days - days.astype("datetime64[M]").astype("datetime64[D]")).astype(np.int64)
+    inside = month_index < months
+    tensor = np.zeros((matrix.shape[0], months, 31))
+    tensor[:, month_index[inside], day_of_month[inside]] = matrix[:, inside]
+    return tensor
+
+
+def project_month_end(spent: np.ndarray, recent: np.ndarray, history: np.ndarray,
+                      elapsed_days: int, days_in_month: int) -> dict:
+    """카테고리별 월말 합계 예측 (run-rate, 월내 분포, 두 모델 평균)
+
+    spent: 이번 달 지금까지 합계, recent: 최근 일별 금액 (카테고리 x 일),
+    history: 과거 달 (카테고리 x 달 x 31) 일별 금액. 반환 값은 모두 카테고리 길이 배열이며
+    low/high는 80% 구간 (이미 쓴 금액보다 낮아지지 않음). 남은 날이 없으면 모두 spent다.
+    """
+    remaining_days = days_in_month - elapsed_days
+    if remaining_days <= 0:
+        keys = ("runrate", "runrate_low", "runrate_high", "projected", "low", "high")
+        if history.shape[1]:
+            keys += ("seasonal", "seasonal_low", "seasonal_high")
+        return {key: spent.copy() for key in keys}
+
+    rate = recent.mean(axis=1) if recent.shape[1] else np.zeros(len(spent))
+    spread = recent.std(axis=1) if recent.shape[1] else np.zeros(len(spent))
+    runrate = spent + rate * remaining_days
+    half = FORECAST_Z * spread * np.sqrt(remaining_days)
+    result = {"runrate": runrate, "runrate_low": runrate - half, "runrate_high": runrate + half}
+
+    if history.shape[1]:
+        # 과거 각 달에서 elapsed_days일 이후 days_in_month일까지 쓴 금액 -> (카테고리 x 달)
+        # (31일까지 더하면 30일 달이나 2월에도 과거 달 말일 지출이 들어감)
+        cumulative = np.cumsum(history, axis=2)
+        before = cumulative[:, :, elapsed_days - 1] if elapsed_days else 0
+        after = cumulative[:, :, days_in_month - 1] - before
+        low_q, high_q = np.percentile(after, FORECAST_QUANTILES, axis=1)
+        seasonal = spent + after.mean(axis=1)
+        result.update(seasonal=seasonal, seasonal_low=spent + low_q, seasonal_high=spent + high_q)
+        projected = (runrate + seasonal) / 2
+        low = (result["runrate_low"] + result["seasonal_low"]) / 2
+        high = (result["runrate_high"] + result["seasonal_high"]) / 2
+    else:
+        projected, low, high = runrate, result["runrate_low"], result["runrate_high"]
+
+    result.update(projected=projected, low=np.maximum(low, spent), high=np.maximum(high, projected))
+    return result
+
+
+def forecast_month(cursor, class_id: int, year: int, month: int, today: date, budgets: dict,
+                   history_months: int = FORECAST_HISTORY_MONTHS) -> dict:
+    """year-month 카테고리별 월말 예상 합계와 예산 초과 예측
+
+    today까지의 거래를 관측값으로 쓰며 이미 끝난 달은 실제 합계가 그대로 나온다.
+    budgets는 {category_id: 예산}이며 예산이 있는 카테고리는 거래가 없어도 포함한다.
+    과거 달은 데이터가 시작된 달 이후의 온전한 달만 월내 분포 모델에 쓴다.
+    """
+    month_start = date(year, month, 1)
+    days_in_month = calendar.monthrange(year, month)[1]
+    as_of = min(today, month_start + timedelta(days=days_in_month - 1))
+    elapsed = (as_of - month_start).days + 1
+    history_start = _shift_month(month_start, -history_months)
+
+    category_ids, matrix = load_daily_matrix(cursor, class_id, history_start, as_of)
+    budget_ids = np.array(sorted(set(budgets) - set(category_ids.tolist())), dtype=np.int64)
+    if budget_ids.size:
+        category_ids = np.concatenate([category_ids, budget_ids])
+        matrix = np.vstack([matrix, np.zeros((budget_ids.size, matrix.shape[1]))])
+
+    offset = (month_start - history_start).days
+    spent = matrix[:, offset:].sum(axis=1)
+    recent = matrix[:, max(0, matrix.shape[1] - RUNRATE_WINDOW):]
+
+    # 데이터가 처음 나온 달은 중간부터일 수 있으므로 그다음 달부터 사용
+    history = month_profile(matrix[:, :offset], history_start, history_months)
+    active_days = np.nonzero(matrix[:, :offset].any(axis=0))[0]
+    if active_days.size:
+        first = history_start + timedelta(days=int(active_days[0]))
+        first_month = (first.year - history_start.year) * 12 + first.month - history_start.month
+        history = history[:, first_month + (first.day > 1):]
+    else:
+        history = history[:, :0]
+
+    projection = project_month_end(spent, recent, history, elapsed, days_in_month)
+    categories = get_reference_data(cursor)["category_by_id"]
+
+    rows = []
+    for i, category_id in enumerate(category_ids.tolist()):
+        category = categories.get(category_id, {})
+        budget = budgets.get(category_id)
+        row = {
+            "category_id": category_id,
+            "category_name": category.get("display_name") or category.get("name"),
+            "spent": round(float(spent[i]), 2),
+            "runrate": round(float(projection["runrate"][i]), 2),
+            "seasonal": round(float(projection["seasonal"][i]), 2) if "seasonal" in projection else None,
+            "projected": round(float(projection["projected"][i]), 2),
+            "low": round(float(projection["low"][i]), 2),
+            "high": round(float(projection["high"][i]), 2),
+            "budget": budget,
+            "overrun": None,
+            "status": None,
+        }
+        if budget is not None:
+            row["overrun"] = round(max(0.0, row["projected"] - budget), 2)
+            row["status"] = _budget_status(row, budget)
+        rows.append(row)
+    rows.sort(key=lambda r: -r["projected"])
+
+    half_widths = (projection["high"] - projection["low"]) / 2
+    total_projected = float(projection["projected"].sum())
+    total_half = float(np.sqrt((half_widths ** 2).sum()))
+    total_budget = sum(budgets.values()) if budgets else None
+    return {
+        "class_id": class_id,
+        "year": year,
+        "month": month,
+        "as_of": as_of.isoformat(),
+        "days_elapsed": elapsed,
+        "days_in_month": days_in_month,
+        "history_months": history.shape[1],
+        "total": {
+            "spent": round(float(spent.sum()), 2),
+            "projected": round(total_projected, 2),
+            "low": round(max(float(spent.sum()), total_projected - total_half), 2),
+            "high": round(total_projected + total_half, 2),
+            "budget": total_budget,
+        },
+        "categories": rows,
+        "overruns": [r for r in sorted(rows, key=lambda r: -(r["overrun"] or 0))
+                     if r["status"] in ("exceeded", "likely", "possible")],
+    }
+
+
+def _budget_status(row: dict, budget: float) -> str:
+    """예산 대비 상태: exceeded(이미 초과) / likely(구간 하한도 초과) / possible(예상치 초과) / ok"""
+    if row["spent"] > budget:
+        return "exceeded"
+    if row["low"] > budget:
+        return "likely"
+    if row["projected"] > budget:
+        return "possible"
+    return "ok"
+
+
+def _shift_month(day: date, months: int) -> date:
+    """day가 속한 달의 1일에서 months개월 이동한 날짜"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _self_check():
+    rng = np.random.default_rng(7)
+    days = 120
+    matrix = np.zeros((3, days))
+    matrix[0] = rng.normal(10000, 1000, days).round()      # 매일 비슷한 지출
+    matrix[0, 100] = 60000                                 # 튀는 하루
+    matrix[1, 60:] = 20000                                 # 60일째부터 매일 지출 시작
+    matrix[2, ::30] = 500000                               # 월 1회 고정비
+
+    zscores, means = rolling_zscores(matrix)
+    assert np.isnan(zscores[:, :ZSCORE_WINDOW]).all()
+    assert zscores[0, 100] > 10 and abs(means[0, 100] - matrix[0, 72:100].mean()) < 1e-6
+    assert np.isnan(zscores[2]).all()                      # 거래일이 드문 카테고리는 생략
+    assert np.nanmax(zscores[0, :100]) < ZSCORE_THRESHOLD + 1
+
+    robust, medians = mad_scores(matrix)
+    assert robust[0, 100] > MAD_THRESHOLD and np.isnan(robust[0]).sum() == 0
+    assert np.isnan(robust[2]).all() and np.isnan(medians[2])   # MAD 0
+
+    shifts, before, after = level_shifts(matrix)
+    assert np.nanargmax(np.abs(shifts[1])) == 60
+    assert before[1, 60] == 0 and after[1, 60] == 20000
+    assert np.nanmax(np.abs(shifts[2])) < SHIFT_THRESHOLD
+
+    empty_z, _ = rolling_zscores(np.zeros((0, 10)))
+    assert empty_z.shape == (0, 10)
+
+    tensor = month_profile(np.arange(59, dtype=float)[None, :], date(2025, 1, 1), 2)
+    assert tensor[0, 1, 0] == 31 and tensor[0, 1, 27] == 58 and tensor[0, 1, 28] == 0
+    assert _shift_month(date(2025, 3, 15), -3) == date(2024, 12, 1)
+
+    history = np.zeros((1, 2, 31))
+    history[0, :, 24] = 500                                # 매달 25일 고정비
+    projection = project_month_end(np.array([100.0]), np.full((1, 28), 10.0), history, 20, 30)
+    assert projection["runrate"][0] == 200 and projection["seasonal"][0] == 600
+    assert projection["projected"][0] == 400 and projection["low"][0] >= 100
+    late = project_month_end(np.array([600.0]), np.zeros((1, 28)), history, 26, 31)
+    assert late["seasonal"][0] == 600                      # 고정비가 이미 나간 뒤
+
+    month_end = np.zeros((1, 2, 31))
+    month_end[0, :, 30] = 1000                             # 과거 달 31일 지출
+    finished = project_month_end(np.array([500.0]), np.full((1, 28), 10.0), month_end, 30, 30)
+    assert all(finished[key][0] == 500 for key in ("projected", "low", "high", "seasonal"))
+    february = project_month_end(np.array([500.0]), np.zeros((1, 28)), month_end, 20, 28)
+    assert february["seasonal"][0] == 500                  # 2월에는 31일 지출이 없음
+    assert _budget_status({"spent": 100, "low": 150, "projected": 400}, 120) == "likely"
+    print("asset_analytics self-check passed")
+
+
+if __name__ == "__main__":
+    _self_check()
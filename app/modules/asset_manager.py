@@ -1,6 +1,17 @@
-from fastapi import APIRouter, HTTPException, status, Query
-from typing import List, Optional
-from datetime import datetime, date as date_type
+import base64
+import calendar
+import csv
+import functools
+import hashlib
+import io
+import json
+from collections import Counter
+from fastapi import APIRouter, HTTPException, status, Query, Response, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import TypeAdapter, ValidationError
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta, date as date_type
 from models.asset import (
     AssetClass, AssetClassCreate,
     AssetCategory, AssetCategoryCreate, AssetCategoryUpdate,
@@ -13,7 +24,14 @@ from models.asset import (
     AssetBudget, AssetBudgetCreate, AssetBudgetUpdate,
     RecurringPayment, RecurringPaymentCreate, RecurringPaymentUpdate, RecurringPaymentDetail
 )
-from utils.database import get_db_connection, build_update_clause, resolve_tier_id
+from utils.database import (
+    get_db_connection, build_update_clause, resolve_tier_id, reserve_asset_ids, rollup_date_filter,
+    get_reference_data, invalidates_reference_cache,
+    tag_index, invalidates_tag_index, SQL_IN_CHUNK, ledger_cache, response_cache,
+)
+from utils.ledger_snapshot import ledger_snapshot, snapshot_enabled
+from modules.recurring_payments import kst_today, run_recurring_payments
+from modules.asset_analytics import detect_anomalies, forecast_month, HISTORY_DAYS, FORECAST_HISTORY_MONTHS
 
 # 라우터 생성
 router = APIRouter(
@@ -24,60 +42,56 @@ router = APIRouter(
 
 # ===== 헬퍼 함수 =====
 
-def get_or_create_tags(cursor, tag_names: List[str]) -> List[int]:
-    """태그 이름 리스트를 받아서 태그 ID 리스트 반환 (없으면 생성)"""
-    tag_ids = []
-    
-    for tag_name in tag_names:
-        tag_name = tag_name.strip()
-        if not tag_name:
-            continue
-        
-        # 기존 태그 확인
-        cursor.execute("SELECT id FROM asset_tags WHERE name = ?", (tag_name,))
-        row = cursor.fetchone()
-        
-        if row:
-            tag_ids.append(row[0])
-        else:
-            # 새 태그 생성
-            cursor.execute("""
-                INSERT INTO asset_tags (name, description, color, is_active)
-                VALUES (?, ?, ?, ?)
-            """, (tag_name, f"자동 생성된 태그: {tag_name}", "#6366f1", True))
-            tag_ids.append(cursor.lastrowid)
-    
+def resolve_tag_ids(cursor, tag_names) -> dict:
+    """태그 이름 집합을 {이름: ID}로 일괄 변환 (인덱스에 없는 태그는 한 번에 생성)"""
+    names = sorted(set(tag_names))
+    tag_ids = tag_index.lookup(cursor, names)
+
+    missing = [name for name in names if name not in tag_ids]
+    if missing:
+        cursor.executemany("""
+            INSERT INTO asset_tags (name, description, color, is_active)
+            VALUES (?, ?, ?, ?)
+        """, [(name, f"자동 생성된 태그: {name}", "#6366f1", True) for name in missing])
+        for i in range(0, len(missing), SQL_IN_CHUNK):
+            chunk = missing[i:i + SQL_IN_CHUNK]
+            cursor.execute(f"SELECT name, id FROM asset_tags WHERE name IN ({','.join('?' * len(chunk))})", chunk)
+            tag_ids.update(cursor.fetchall())
     return tag_ids
 
+def get_or_create_tags(cursor, tag_names: List[str]) -> List[int]:
+    """태그 이름 리스트를 받아서 태그 ID 리스트 반환 (없으면 생성, 중복 제거)"""
+    names = list(dict.fromkeys(name.strip() for name in tag_names if name and name.strip()))
+    tag_ids = resolve_tag_ids(cursor, names)
+    return [tag_ids[name] for name in names]
+
 def sync_asset_tags(cursor, asset_id: int, tag_names: List[str]):
-    """거래의 태그 동기화 (기존 관계 삭제 후 새로 생성)"""
-    # 기존 관계 삭제 및 사용 횟수 감소
-    cursor.execute("""
-        UPDATE asset_tags 
-        SET usage_count = usage_count - 1
-        WHERE id IN (
-            SELECT tag_id FROM asset_tag_relations WHERE asset_id = ?
-        )
-    """, (asset_id,))
-    
-    cursor.execute("DELETE FROM asset_tag_relations WHERE asset_id = ?", (asset_id,))
-    
-    # 새 태그 생성/조회
-    if tag_names:
-        tag_ids = get_or_create_tags(cursor, tag_names)
-        
-        # 새 관계 생성 및 사용 횟수 증가
-        for tag_id in tag_ids:
-            cursor.execute("""
-                INSERT INTO asset_tag_relations (asset_id, tag_id)
-                VALUES (?, ?)
-            """, (asset_id, tag_id))
-            
-            cursor.execute("""
-                UPDATE asset_tags 
-                SET usage_count = usage_count + 1
-                WHERE id = ?
-            """, (tag_id,))
+    """거래의 태그 동기화 (현재 태그와 비교해 추가/제거된 태그만 반영)"""
+    cursor.execute("SELECT tag_id FROM asset_tag_relations WHERE asset_id = ?", (asset_id,))
+    current = {row[0] for row in cursor.fetchall()}
+    wanted = get_or_create_tags(cursor, tag_names) if tag_names else []
+
+    removed = sorted(current - set(wanted))
+    added = [tag_id for tag_id in wanted if tag_id not in current]
+
+    if removed:
+        placeholders = ",".join("?" * len(removed))
+        cursor.execute(f"""
+            DELETE FROM asset_tag_relations
+            WHERE asset_id = ? AND tag_id IN ({placeholders})
+        """, [asset_id] + removed)
+        cursor.execute(f"""
+            UPDATE asset_tags SET usage_count = usage_count - 1
+            WHERE id IN ({placeholders})
+        """, removed)
+
+    if added:
+        cursor.executemany("INSERT INTO asset_tag_relations (asset_id, tag_id) VALUES (?, ?)",
+                           [(asset_id, tag_id) for tag_id in added])
+        cursor.execute(f"""
+            UPDATE asset_tags SET usage_count = usage_count + 1
+            WHERE id IN ({",".join("?" * len(added))})
+        """, added)
 
 def get_asset_tags(cursor, asset_id: int) -> List[str]:
     """거래의 태그 이름 리스트 조회"""
@@ -116,16 +130,7 @@ def get_asset_tags_batch(cursor, asset_ids: List[int]) -> dict:
 @router.get("/classes", response_model=List[AssetClass])
 def get_classes():
     """모든 거래 분류 조회 (지출/수익/저축)"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, name, display_name, description, is_active, created_at
-            FROM asset_classes
-            WHERE is_active = TRUE
-            ORDER BY id
-        """)
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+    return [c for c in get_reference_data()["classes"] if c["is_active"]]
 
 # ===== Categories (카테고리) API =====
 
@@ -134,35 +139,20 @@ def get_categories(
     class_id: Optional[int] = Query(None, description="거래 분류 ID로 필터링")
 ):
     """카테고리 목록 조회 (선택적으로 class_id로 필터링)"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        if class_id:
-            cursor.execute("""
-                SELECT id, class_id, name, display_name, tier_id, description, 
-                       is_active, sort_order, created_at, default_budget, rollover_enabled
-                FROM asset_categories
-                WHERE class_id = ? AND is_active = TRUE
-                ORDER BY sort_order, id
-            """, (class_id,))
-        else:
-            cursor.execute("""
-                SELECT id, class_id, name, display_name, tier_id, description, 
-                       is_active, sort_order, created_at, default_budget, rollover_enabled
-                FROM asset_categories
-                WHERE is_active = TRUE
-                ORDER BY class_id, sort_order, id
-            """)
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+    # 캐시 목록은 class_id, sort_order, id 순으로 정렬되어 있음
+    return [
+        c for c in get_reference_data()["categories"]
+        if c["is_active"] and (not class_id or c["class_id"] == class_id)
+    ]
 
 @router.post("/categories", response_model=AssetCategory, status_code=status.HTTP_201_CREATED)
+@invalidates_reference_cache
 def create_category(category: AssetCategoryCreate):
     """새 카테고리 생성"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         # class_id 유효성 검사
-        cursor.execute("SELECT id FROM asset_classes WHERE id = ?", (category.class_id,))
-        if not cursor.fetchone():
+        if category.class_id not in get_reference_data(cursor)["class_by_id"]:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Class with id {category.class_id} not found"
@@ -207,41 +197,28 @@ def get_sub_categories(
     category_id: Optional[int] = Query(None, description="상위 카테고리 ID로 필터링")
 ):
     """하위 카테고리 목록 조회"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        if category_id:
-            cursor.execute("""
-                SELECT id, category_id, name, tier_id, is_active, created_at
-                FROM asset_sub_categories
-                WHERE category_id = ? AND is_active = TRUE
-                ORDER BY name
-            """, (category_id,))
-        else:
-            cursor.execute("""
-                SELECT id, category_id, name, tier_id, is_active, created_at
-                FROM asset_sub_categories
-                WHERE is_active = TRUE
-                ORDER BY category_id, name
-            """)
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+    # 캐시 목록은 category_id, name 순으로 정렬되어 있음
+    return [
+        sc for sc in get_reference_data()["sub_categories"]
+        if sc["is_active"] and (not category_id or sc["category_id"] == category_id)
+    ]
 
 @router.post("/sub-categories", response_model=AssetSubCategory, status_code=status.HTTP_201_CREATED)
+@invalidates_reference_cache
 def create_sub_category(sub_category: AssetSubCategoryCreate):
     """새 하위 카테고리 생성"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
+        refs = get_reference_data(cursor)
         # category_id 유효성 검사
-        cursor.execute("SELECT id FROM asset_categories WHERE id = ?", (sub_category.category_id,))
-        if not cursor.fetchone():
+        if sub_category.category_id not in refs["category_by_id"]:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Category with id {sub_category.category_id} not found"
             )
             
         # tier_id 유효성 검사
-        cursor.execute("SELECT id FROM asset_tiers WHERE id = ?", (sub_category.tier_id,))
-        if not cursor.fetchone():
+        if sub_category.tier_id not in refs["tier_by_id"]:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Tier with id {sub_category.tier_id} not found"
@@ -261,6 +238,7 @@ def create_sub_category(sub_category: AssetSubCategoryCreate):
         return dict(cursor.fetchone())
 
 @router.delete("/sub-categories/{sub_category_id}")
+@invalidates_reference_cache
 def delete_sub_category(sub_category_id: int):
     """하위 카테고리 삭제 (비활성화)"""
     with get_db_connection() as conn:
@@ -295,35 +273,20 @@ def get_tiers(
     class_id: Optional[int] = Query(None, description="거래 분류 ID로 필터링")
 ):
     """티어 목록 조회 (선택적으로 class_id로 필터링)"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        if class_id:
-            cursor.execute("""
-                SELECT id, class_id, tier_level, name, display_name, description,
-                       is_active, sort_order, created_at
-                FROM asset_tiers
-                WHERE class_id = ? AND is_active = TRUE
-                ORDER BY sort_order, tier_level
-            """, (class_id,))
-        else:
-            cursor.execute("""
-                SELECT id, class_id, tier_level, name, display_name, description,
-                       is_active, sort_order, created_at
-                FROM asset_tiers
-                WHERE is_active = TRUE
-                ORDER BY class_id, sort_order, tier_level
-            """)
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+    # 캐시 목록은 class_id, sort_order, tier_level 순으로 정렬되어 있음
+    return [
+        t for t in get_reference_data()["tiers"]
+        if t["is_active"] and (not class_id or t["class_id"] == class_id)
+    ]
 
 @router.post("/tiers", response_model=AssetTier, status_code=status.HTTP_201_CREATED)
+@invalidates_reference_cache
 def create_tier(tier: AssetTierCreate):
     """새 티어 생성"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         # class_id 유효성 검사
-        cursor.execute("SELECT id FROM asset_classes WHERE id = ?", (tier.class_id,))
-        if not cursor.fetchone():
+        if tier.class_id not in get_reference_data(cursor)["class_by_id"]:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Class with id {tier.class_id} not found"
@@ -345,6 +308,7 @@ def create_tier(tier: AssetTierCreate):
         return dict(cursor.fetchone())
 
 @router.delete("/categories/{category_id}")
+@invalidates_reference_cache
 def delete_category(category_id: int):
     """카테고리 삭제 (비활성화)"""
     with get_db_connection() as conn:
@@ -382,6 +346,7 @@ def delete_category(category_id: int):
         }
 
 @router.delete("/tiers/{tier_id}")
+@invalidates_reference_cache
 def delete_tier(tier_id: int):
     """티어 삭제 (비활성화)"""
     with get_db_connection() as conn:
@@ -426,50 +391,15 @@ def create_transaction(transaction: AssetTransactionCreate):
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
-        # 유효성 검사
-        cursor.execute("SELECT id FROM asset_classes WHERE id = ?", (transaction.class_id,))
-        if not cursor.fetchone():
+        # 유효성 검사 및 티어 결정 (참조 캐시)
+        refs = get_reference_data(cursor)
+        if transaction.class_id not in refs["class_by_id"]:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                               detail=f"Class with id {transaction.class_id} not found")
-        
-        # 카테고리 확인
-        cursor.execute("SELECT id FROM asset_categories WHERE id = ? AND class_id = ?",
-                      (transaction.category_id, transaction.class_id))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                              detail=f"Category {transaction.category_id} does not belong to class {transaction.class_id}")
-        
-        # 하위 카테고리 확인 및 티어 결정
-        final_tier_id = transaction.tier_id
-        
-        if transaction.sub_category_id:
-            cursor.execute("SELECT id, tier_id FROM asset_sub_categories WHERE id = ? AND category_id = ?",
-                          (transaction.sub_category_id, transaction.category_id))
-            sub_cat_row = cursor.fetchone()
-            if not sub_cat_row:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                                  detail=f"Sub Category {transaction.sub_category_id} does not belong to category {transaction.category_id}")
-            
-            # 하위 카테고리의 티어 사용 (명시적 입력이 없으면)
-            if final_tier_id is None:
-                final_tier_id = sub_cat_row[1]
-        else:
-            # 하위 카테고리가 없으면 카테고리의 기본 티어 사용 (하위 호환성)
-            cursor.execute("SELECT tier_id FROM asset_categories WHERE id = ?", (transaction.category_id,))
-            cat_row = cursor.fetchone()
-            if final_tier_id is None and cat_row:
-                final_tier_id = cat_row[0]
-
-        if final_tier_id is None:
-             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                              detail="Tier ID is required and no default tier found")
-
-        # 티어 유효성 검사
-        cursor.execute("SELECT id FROM asset_tiers WHERE id = ? AND class_id = ?",
-                      (final_tier_id, transaction.class_id))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                              detail=f"Tier {final_tier_id} does not belong to class {transaction.class_id}")
+        try:
+            final_tier_id = validate_transaction_refs(transaction, refs)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         
         # 데이터 삽입
         cursor.execute("""
@@ -486,6 +416,9 @@ def create_transaction(transaction: AssetTransactionCreate):
         if transaction.tags:
             sync_asset_tags(cursor, transaction_id, transaction.tags)
         
+        # 과거 달 거래면 이후 달 예산 이월 재계산
+        refresh_budgets_after_change(cursor, [(transaction.category_id, transaction.date)])
+        
         cursor.execute("""
             SELECT id, name, cost, class_id, category_id, sub_category_id, tier_id, date, description,
                    created_at, updated_at
@@ -498,6 +431,192 @@ def create_transaction(transaction: AssetTransactionCreate):
         
         return row
 
+# ===== 거래 일괄 등록 =====
+
+BULK_MAX_ROWS = 20000
+
+def _normalize_bulk_row(raw: dict, refs: dict) -> dict:
+    """CSV/JSON 행을 AssetTransactionCreate 입력으로 정리
+
+    빈 문자열은 None, 문자열 태그는 '|'로 분리하고, *_id 대신 *_name이 오면 ID로 바꾼다.
+    """
+    row = {key: (value.strip() if isinstance(value, str) else value) for key, value in raw.items()}
+    row = {key: (None if value == "" else value) for key, value in row.items()}
+
+    if isinstance(row.get("tags"), str):
+        row["tags"] = row["tags"].split(CSV_TAG_SEPARATOR)
+
+    def resolve(id_key: str, name_key: str, by_name: dict, scope=None):
+        name = row.get(name_key)
+        if row.get(id_key) is not None or name is None:
+            return
+        key = name if scope is None else (scope, name)
+        if key not in by_name:
+            raise ValueError(f"Unknown {name_key.replace('_name', '')} '{name}'")
+        row[id_key] = by_name[key]
+
+    resolve("class_id", "class_name", refs["class_ids_by_name"])
+    class_id = _as_int(row.get("class_id"))
+    resolve("category_id", "category_name", refs["category_ids_by_name"], class_id)
+    resolve("sub_category_id", "sub_category_name", refs["sub_category_ids_by_name"],
+            _as_int(row.get("category_id")))
+    resolve("tier_id", "tier_name", refs["tier_ids_by_name"], class_id)
+    return row
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def validate_transaction_refs(transaction: AssetTransactionCreate, refs: dict) -> int:
+    """참조 ID 검증 후 최종 tier_id 반환 (실패 시 ValueError)
+
+    티어 미지정 시 하위 카테고리 -> 카테고리 기본 티어 순으로 결정한다.
+    """
+    if transaction.class_id not in refs["class_by_id"]:
+        raise ValueError(f"Class with id {transaction.class_id} not found")
+
+    category = refs["category_by_id"].get(transaction.category_id)
+    if not category or category["class_id"] != transaction.class_id:
+        raise ValueError(f"Category {transaction.category_id} does not belong to class {transaction.class_id}")
+
+    final_tier_id = transaction.tier_id
+    if transaction.sub_category_id:
+        sub_category = refs["sub_category_by_id"].get(transaction.sub_category_id)
+        if not sub_category or sub_category["category_id"] != transaction.category_id:
+            raise ValueError(f"Sub Category {transaction.sub_category_id} does not belong to category {transaction.category_id}")
+        if final_tier_id is None:
+            final_tier_id = sub_category["tier_id"]
+    elif final_tier_id is None:
+        final_tier_id = category["tier_id"]
+
+    if final_tier_id is None:
+        raise ValueError("Tier ID is required and no default tier found")
+    tier = refs["tier_by_id"].get(final_tier_id)
+    if not tier or tier["class_id"] != transaction.class_id:
+        raise ValueError(f"Tier {final_tier_id} does not belong to class {transaction.class_id}")
+    return final_tier_id
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()
+    )
+
+def import_transactions(raw_rows: list, dry_run: bool = False) -> dict:
+    """거래 일괄 등록: 검증 실패 행은 건너뛰고 나머지를 한 트랜잭션으로 삽입
+
+    참조 데이터는 캐시에서 검증하고, 거래와 태그 관계는 executemany로 넣는다.
+    """
+    errors = []
+    valid = []  # (행 번호, 거래, tier_id, 태그 이름 목록)
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        refs = get_reference_data(cursor)
+
+        for index, raw in enumerate(raw_rows):
+            try:
+                if not isinstance(raw, dict):
+                    raise ValueError("Row must be an object")
+                transaction = AssetTransactionCreate.model_validate(_normalize_bulk_row(raw, refs))
+                tier_id = validate_transaction_refs(transaction, refs)
+            except ValidationError as e:
+                errors.append({"row": index, "detail": _format_validation_error(e)})
+                continue
+            except ValueError as e:
+                errors.append({"row": index, "detail": str(e)})
+                continue
+            # 같은 행 안의 중복 태그는 한 번만 연결
+            tags = list(dict.fromkeys(t.strip() for t in (transaction.tags or []) if t and t.strip()))
+            valid.append((index, transaction, tier_id, tags))
+
+        result = {
+            "total": len(raw_rows),
+            "inserted": 0,
+            "failed": len(errors),
+            "dry_run": dry_run,
+            "ids": [],
+            "errors": errors,
+        }
+        if dry_run or not valid:
+            return result
+
+        # id를 미리 잡아 넣으므로 executemany 뒤에 거래 id를 다시 읽지 않아도 된다
+        asset_ids = list(reserve_asset_ids(cursor, len(valid)))
+        cursor.executemany("""
+            INSERT INTO assets 
+            (id, name, cost, class_id, category_id, sub_category_id, tier_id, date, description)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (asset_id, tx.name, tx.cost, tx.class_id, tx.category_id, tx.sub_category_id, tier_id,
+             tx.date.isoformat(), tx.description)
+            for asset_id, (_, tx, tier_id, _) in zip(asset_ids, valid)
+        ])
+
+        tag_ids = resolve_tag_ids(cursor, (name for _, _, _, tags in valid for name in tags))
+        relations = [
+            (asset_id, tag_ids[name])
+            for asset_id, (_, _, _, tags) in zip(asset_ids, valid)
+            for name in tags
+        ]
+        if relations:
+            cursor.executemany("INSERT INTO asset_tag_relations (asset_id, tag_id) VALUES (?, ?)", relations)
+            usage = Counter(tag_id for _, tag_id in relations)
+            cursor.executemany(
+                "UPDATE asset_tags SET usage_count = usage_count + ? WHERE id = ?",
+                [(count, tag_id) for tag_id, count in usage.items()]
+            )
+
+        # 카테고리별로 거래가 들어간 달마다 한 번씩만 넘겨 이후 달 예산 이월 재계산
+        refresh_budgets_after_change(cursor, {(tx.category_id, tx.date.replace(day=1)) for _, tx, _, _ in valid})
+
+        result["inserted"] = len(asset_ids)
+        result["ids"] = asset_ids
+        return result
+
+def parse_transactions_csv(content: bytes) -> list:
+    """CSV(헤더 포함)를 행 dict 리스트로 변환. 내보내기 CSV 형식을 그대로 받을 수 있다"""
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+    return list(csv.DictReader(io.StringIO(text)))
+
+@router.post("/transactions/bulk")
+async def bulk_create_transactions(
+    request: Request,
+    dry_run: bool = Query(False, description="검증만 하고 저장하지 않음")
+):
+    """거래 일괄 등록 (JSON 배열, text/csv 본문 또는 multipart 'file' CSV 업로드)
+
+    CSV 열: name, cost, date, class_id|class_name, category_id|category_name,
+    sub_category_id|sub_category_name, tier_id|tier_name, description, tags('|' 구분).
+    실패한 행은 errors에 0부터 시작하는 행 번호와 함께 보고되고 나머지는 저장된다.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="CSV file field 'file' is required")
+        raw_rows = parse_transactions_csv(await upload.read())
+    elif "csv" in content_type:
+        raw_rows = parse_transactions_csv(await request.body())
+    else:
+        try:
+            raw_rows = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or CSV")
+        if not isinstance(raw_rows, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or CSV")
+
+    if len(raw_rows) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                          detail=f"At most {BULK_MAX_ROWS} rows per request")
+
+    return await run_in_threadpool(import_transactions, raw_rows, dry_run)
+
 @router.get("/transactions/unclassified", response_model=List[AssetTransactionDetail])
 def get_unclassified_transactions():
     """분류되지 않은 거래 내역 조회 (sub_category_id가 NULL인 경우)"""
@@ -526,8 +645,128 @@ def get_unclassified_transactions():
 
         return transactions
 
+EXPORT_COLUMNS = [
+    "id", "date", "name", "cost", "description",
+    "class_id", "class_name", "category_id", "category_name",
+    "sub_category_id", "sub_category_name", "tier_id", "tier_name",
+    "tags", "created_at", "updated_at",
+]
+EXPORT_CHUNK_SIZE = 1000
+CSV_TAG_SEPARATOR = "|"
+
+def iter_export_rows(class_id: Optional[int] = None, start_date: Optional[str] = None,
+                     end_date: Optional[str] = None):
+    """내보낼 거래를 청크 단위로 읽어 태그를 붙인 dict 리스트로 생성
+
+    커서를 끝까지 fetchmany로 소비하므로 전체 거래 수와 무관하게 청크 하나 분량만 메모리에 올린다.
+    """
+    query = """
+        SELECT
+            a.id, a.date, a.name, a.cost, a.description,
+            a.class_id, ac.name as class_name, a.category_id, cat.name as category_name,
+            a.sub_category_id, sc.name as sub_category_name, a.tier_id, t.name as tier_name,
+            a.created_at, a.updated_at
+        FROM assets a
+        JOIN asset_classes ac ON a.class_id = ac.id
+        JOIN asset_categories cat ON a.category_id = cat.id
+        LEFT JOIN asset_sub_categories sc ON a.sub_category_id = sc.id
+        JOIN asset_tiers t ON a.tier_id = t.id
+        WHERE 1=1
+    """
+    params = []
+    if class_id:
+        query += " AND a.class_id = ?"
+        params.append(class_id)
+    if start_date:
+        query += " AND a.date >= ?"
+        params.append(start_date)
+    if end_date:
+        query += " AND a.date <= ?"
+        params.append(end_date)
+    query += " ORDER BY a.date, a.id"
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        tag_cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+                if not rows:
+                    break
+                chunk = [dict(row) for row in rows]
+                tags_by_asset = get_asset_tags_batch(tag_cursor, [r['id'] for r in chunk])
+                for r in chunk:
+                    r['tags'] = tags_by_asset[r['id']]
+                yield chunk
+        finally:
+            # 스트리밍 도중 클라이언트가 끊겨도 읽기 스냅샷을 풀에 남기지 않음
+            cursor.close()
+            tag_cursor.close()
+
+def _ndjson_stream(chunks):
+    for chunk in chunks:
+        yield "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in chunk)
+
+def _csv_stream(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # 엑셀에서 한글이 깨지지 않도록 BOM 포함
+    yield "\ufeff" + ",".join(EXPORT_COLUMNS) + "\r\n"
+    for chunk in chunks:
+        for r in chunk:
+            writer.writerow([
+                CSV_TAG_SEPARATOR.join(r['tags']) if col == 'tags' else r[col]
+                for col in EXPORT_COLUMNS
+            ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+@router.get("/transactions/export")
+def export_transactions(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="내보내기 형식 (ndjson, csv)"),
+    class_id: Optional[int] = Query(None, description="거래 분류 ID"),
+    start_date: Optional[date_type] = Query(None, description="시작 날짜 (YYYY-MM-DD)"),
+    end_date: Optional[date_type] = Query(None, description="종료 날짜 (YYYY-MM-DD)")
+):
+    """거래 전체 내보내기 (스트리밍, 날짜 오름차순)
+
+    csv의 tags 열은 '|'로 구분한다.
+    """
+    chunks = iter_export_rows(
+        class_id,
+        start_date.isoformat() if start_date else None,
+        end_date.isoformat() if end_date else None,
+    )
+    if format == "csv":
+        body, media_type, ext = _csv_stream(chunks), "text/csv; charset=utf-8", "csv"
+    else:
+        body, media_type, ext = _ndjson_stream(chunks), "application/x-ndjson", "ndjson"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions.{ext}"'}
+    )
+
+def encode_transaction_cursor(tx_date: str, tx_id: int) -> str:
+    """거래 목록 keyset 커서 인코딩 (마지막 행의 date, id)"""
+    raw = f"{tx_date},{tx_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_transaction_cursor(cursor_token: str) -> tuple:
+    """keyset 커서를 (date, id)로 디코딩. 형식이 잘못되면 400"""
+    try:
+        padded = cursor_token + "=" * (-len(cursor_token) % 4)
+        tx_date, tx_id = base64.urlsafe_b64decode(padded).decode().split(",")
+        return date_type.fromisoformat(tx_date).isoformat(), int(tx_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="잘못된 커서입니다")
+
 @router.get("/transactions", response_model=List[AssetTransactionDetail])
 def get_transactions(
+    response: Response,
     class_id: Optional[int] = Query(None, description="거래 분류 ID (1=지출, 2=수익, 3=저축)"),
     start_date: Optional[date_type] = Query(None, description="시작 날짜 (YYYY-MM-DD)"),
     end_date: Optional[date_type] = Query(None, description="종료 날짜 (YYYY-MM-DD)"),
@@ -535,9 +774,17 @@ def get_transactions(
     sub_category_id: Optional[int] = Query(None, description="하위 카테고리 ID"),
     tier_id: Optional[int] = Query(None, description="티어 ID"),
     limit: int = Query(100, ge=1, le=10000, description="조회 제한"),
-    offset: int = Query(0, ge=0, description="조회 시작 위치")
+    offset: int = Query(0, ge=0, description="조회 시작 위치"),
+    after: Optional[str] = Query(None, description="이전 페이지의 X-Next-Cursor 값 (offset 대신 사용)")
 ):
-    """거래 목록 조회 (상세 정보 포함, 필터링 옵션)"""
+    """거래 목록 조회 (상세 정보 포함, 필터링 옵션)
+
+    페이지가 가득 차면 다음 페이지 커서를 X-Next-Cursor 헤더로 돌려준다.
+    after로 넘기면 (date, id) 인덱스에서 바로 이어 읽으므로 깊은 페이지도 비용이 일정하다.
+    """
+    if after and offset:
+        raise HTTPException(status_code=400, detail="after와 offset은 함께 사용할 수 없습니다")
+
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
@@ -576,12 +823,18 @@ def get_transactions(
         if tier_id:
             query += " AND a.tier_id = ?"
             params.append(tier_id)
+        if after:
+            query += " AND (a.date, a.id) < (?, ?)"
+            params.extend(decode_transaction_cursor(after))
         
         query += " ORDER BY a.date DESC, a.id DESC LIMIT ? OFFSET ?"
         params.extend([limit, offset])
         
         cursor.execute(query, params)
         result = [dict(row) for row in cursor.fetchall()]
+        if len(result) == limit:
+            last = result[-1]
+            response.headers["X-Next-Cursor"] = encode_transaction_cursor(last['date'], last['id'])
 
         # 각 거래의 태그 일괄 조회
         tags_by_asset = get_asset_tags_batch(cursor, [t['id'] for t in result])
@@ -628,13 +881,14 @@ def update_transaction(transaction_id: int, transaction: AssetTransactionUpdate)
         cursor = conn.cursor()
         
         # 거래 존재 확인
-        cursor.execute("SELECT class_id FROM assets WHERE id = ?", (transaction_id,))
+        cursor.execute("SELECT class_id, category_id, date FROM assets WHERE id = ?", (transaction_id,))
         row = cursor.fetchone()
         if not row:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                               detail=f"Transaction with id {transaction_id} not found")
         
         class_id = row[0]
+        old_category_id, old_date = row[1], row[2]
         update_data = transaction.dict(exclude_unset=True)
         
         # 태그는 따로 처리
@@ -651,10 +905,10 @@ def update_transaction(transaction_id: int, transaction: AssetTransactionUpdate)
             cursor.execute("SELECT category_id FROM assets WHERE id = ?", (transaction_id,))
             current_category_id = cursor.fetchone()[0]
 
+        refs = get_reference_data(cursor)
         if 'category_id' in update_data:
-            cursor.execute("SELECT id FROM asset_categories WHERE id = ? AND class_id = ?",
-                          (update_data['category_id'], class_id))
-            if not cursor.fetchone():
+            category = refs["category_by_id"].get(update_data['category_id'])
+            if not category or category["class_id"] != class_id:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                                   detail=f"Category does not belong to the same class")
             
@@ -663,28 +917,24 @@ def update_transaction(transaction_id: int, transaction: AssetTransactionUpdate)
                 update_data['sub_category_id'] = None
                 
         if 'sub_category_id' in update_data and update_data['sub_category_id'] is not None:
-            cursor.execute("SELECT id, tier_id FROM asset_sub_categories WHERE id = ? AND category_id = ?",
-                          (update_data['sub_category_id'], current_category_id))
-            sub_cat_row = cursor.fetchone()
-            if not sub_cat_row:
+            sub_category = refs["sub_category_by_id"].get(update_data['sub_category_id'])
+            if not sub_category or sub_category["category_id"] != current_category_id:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                                   detail=f"Sub Category does not belong to the category")
             
             # 하위 카테고리가 변경되면 티어도 자동 업데이트 (명시적 업데이트가 없으면)
             if 'tier_id' not in update_data:
-                update_data['tier_id'] = sub_cat_row[1]
+                update_data['tier_id'] = sub_category["tier_id"]
         
         # 하위 카테고리가 없고 카테고리만 변경된 경우, 카테고리의 기본 티어 사용 (하위 호환성)
         if 'category_id' in update_data and 'sub_category_id' not in update_data and 'tier_id' not in update_data:
-             cursor.execute("SELECT tier_id FROM asset_categories WHERE id = ?", (update_data['category_id'],))
-             cat_row = cursor.fetchone()
-             if cat_row and cat_row[0]:
-                 update_data['tier_id'] = cat_row[0]
+             category_tier_id = refs["category_by_id"][update_data['category_id']]["tier_id"]
+             if category_tier_id:
+                 update_data['tier_id'] = category_tier_id
 
         if 'tier_id' in update_data:
-            cursor.execute("SELECT id FROM asset_tiers WHERE id = ? AND class_id = ?",
-                          (update_data['tier_id'], class_id))
-            if not cursor.fetchone():
+            tier = refs["tier_by_id"].get(update_data['tier_id'])
+            if not tier or tier["class_id"] != class_id:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                                   detail=f"Tier does not belong to the same class")
         
@@ -710,6 +960,11 @@ def update_transaction(transaction_id: int, transaction: AssetTransactionUpdate)
         """, (transaction_id,))
         
         row_dict = dict(cursor.fetchone())
+        
+        # 금액/날짜/카테고리가 바뀌었으면 영향받는 달 이후 예산 이월 재계산
+        if {'cost', 'date', 'category_id'} & update_data.keys():
+            refresh_budgets_after_change(cursor, [(old_category_id, old_date),
+                                                  (row_dict['category_id'], row_dict['date'])])
         # 태그 조회
         row_dict['tags'] = get_asset_tags(cursor, transaction_id)
         
@@ -726,21 +981,66 @@ def delete_transaction(transaction_id: int):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                               detail=f"Transaction with id {transaction_id} not found")
         
+        # 태그 관계 정리 (사용 횟수 감소) 후 삭제
+        sync_asset_tags(cursor, transaction_id, [])
         cursor.execute("DELETE FROM assets WHERE id = ?", (transaction_id,))
+        refresh_budgets_after_change(cursor, [(row['category_id'], row['date'])])
         return {
             "message": f"Transaction {transaction_id} deleted successfully",
             "deleted_transaction": dict(row)
         }
 
+# ===== 조회 응답 캐시 (ETag) =====
+
+@functools.lru_cache(maxsize=None)
+def _response_adapter(response_model) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더가 etag와 일치하는지 (목록, '*', 약한 비교 W/ 허용)"""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag in (c[2:] if c.startswith("W/") else c for c in candidates)
+
+def cached_json_response(request: Request, key: tuple, response_model, compute) -> Response:
+    """원장 버전 기준으로 캐시한 JSON 응답 (강한 ETag, If-None-Match 일치 시 304)
+
+    compute() 결과를 response_model로 검증/직렬화한 본문과 그 해시(ETag)를 저장하므로
+    버전이 그대로인 재요청은 ledger_state 조회 한 번과 딕셔너리 조회로 끝난다.
+    버전이 바뀌어 다시 계산해도 내용이 같으면 ETag가 같아 304를 돌려줄 수 있다.
+    """
+    def render():
+        adapter = _response_adapter(response_model)
+        body = adapter.dump_json(adapter.validate_python(compute()))
+        return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', body
+
+    with get_db_connection() as conn:
+        etag, body = response_cache.get_or_compute(conn.cursor(), key, render)
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 # ===== 통계 및 분석 API =====
 
 @router.get("/statistics/period", response_model=PeriodSummary)
 def get_period_statistics(
+    request: Request,
     class_id: int = Query(..., description="거래 분류 ID (1=지출, 2=수익, 3=저축)"),
     start_date: Optional[date_type] = Query(None, description="시작 날짜"),
     end_date: Optional[date_type] = Query(None, description="종료 날짜")
 ):
-    """기간별 통계 (카테고리별, 티어별 집계)"""
+    """기간별 통계 (카테고리별, 티어별 집계, 원장 변경 전까지 캐시 + ETag)"""
+    return cached_json_response(
+        request, ("statistics/period", class_id, start_date, end_date), PeriodSummary,
+        lambda: compute_period_statistics(class_id, start_date, end_date),
+    )
+
+def compute_period_statistics(class_id: int, start_date: Optional[date_type],
+                              end_date: Optional[date_type]) -> dict:
+    """기간별 통계 계산 (카테고리별, 티어별 집계)"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
@@ -751,21 +1051,19 @@ def get_period_statistics(
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                               detail=f"Class with id {class_id} not found")
         
-        where_clause = "WHERE a.class_id = ?"
-        params = [class_id]
-        
-        if start_date:
-            where_clause += " AND a.date >= ?"
-            params.append(start_date)
-        if end_date:
-            where_clause += " AND a.date <= ?"
-            params.append(end_date)
+        if snapshot_enabled():
+            return _snapshot_period_statistics(cursor, class_id, class_row, start_date, end_date)
+
+        # 일/월 집계 테이블에서 조회 (거래 건수와 무관하게 버킷 수에 비례)
+        rollup_table, conditions, params = rollup_date_filter(start_date, end_date)
+        where_clause = " AND ".join(["s.class_id = ?"] + conditions)
+        params = [class_id] + params
         
         # 전체 통계
         cursor.execute(f"""
-            SELECT COUNT(*) as count, COALESCE(SUM(cost), 0) as total
-            FROM assets a
-            {where_clause}
+            SELECT COALESCE(SUM(s.tx_count), 0) as count, COALESCE(SUM(s.total_cost), 0) as total
+            FROM {rollup_table} s
+            WHERE {where_clause}
         """, params)
         total_row = cursor.fetchone()
         
@@ -773,10 +1071,10 @@ def get_period_statistics(
         cursor.execute(f"""
             SELECT 
                 cat.id, cat.name, cat.display_name,
-                COUNT(*) as count, SUM(a.cost) as total
-            FROM assets a
-            JOIN asset_categories cat ON a.category_id = cat.id
-            {where_clause}
+                SUM(s.tx_count) as count, SUM(s.total_cost) as total
+            FROM {rollup_table} s
+            JOIN asset_categories cat ON s.category_id = cat.id
+            WHERE {where_clause}
             GROUP BY cat.id
             ORDER BY total DESC
         """, params)
@@ -786,10 +1084,10 @@ def get_period_statistics(
         cursor.execute(f"""
             SELECT 
                 t.id, t.tier_level, t.name, t.display_name,
-                COUNT(*) as count, SUM(a.cost) as total
-            FROM assets a
-            JOIN asset_tiers t ON a.tier_id = t.id
-            {where_clause}
+                SUM(s.tx_count) as count, SUM(s.total_cost) as total
+            FROM {rollup_table} s
+            JOIN asset_tiers t ON s.tier_id = t.id
+            WHERE {where_clause}
             GROUP BY t.id
             ORDER BY t.tier_level
         """, params)
@@ -823,60 +1121,93 @@ def get_period_statistics(
             ]
         }
 
+def _snapshot_period_statistics(cursor, class_id: int, class_row, start_date: Optional[date_type],
+                                end_date: Optional[date_type]) -> dict:
+    """compute_period_statistics와 같은 결과를 열 지향 스냅샷의 배열 연산으로 계산"""
+    refs = get_reference_data(cursor)
+    columns = ledger_snapshot.get(cursor)
+    selected = columns.mask(start=start_date, end=end_date, class_id=class_id)
+
+    category_ids, category_counts, category_totals = columns.group_sum("category_id", selected)
+    by_category = []
+    for category_id, count, total in zip(category_ids.tolist(), category_counts.tolist(), category_totals.tolist()):
+        category = refs["category_by_id"].get(category_id)
+        if category:
+            by_category.append({
+                "category_id": category_id,
+                "category_name": category["name"],
+                "category_display_name": category["display_name"],
+                "count": count,
+                "total_cost": total
+            })
+    by_category.sort(key=lambda c: c["total_cost"], reverse=True)
+
+    tier_ids, tier_counts, tier_totals = columns.group_sum("tier_id", selected)
+    by_tier = []
+    for tier_id, count, total in zip(tier_ids.tolist(), tier_counts.tolist(), tier_totals.tolist()):
+        tier = refs["tier_by_id"].get(tier_id)
+        if tier:
+            by_tier.append({
+                "tier_id": tier_id,
+                "tier_level": tier["tier_level"],
+                "tier_name": tier["name"],
+                "tier_display_name": tier["display_name"],
+                "count": count,
+                "total_cost": total
+            })
+    by_tier.sort(key=lambda t: t["tier_level"])
+
+    return {
+        "class_name": class_row[0],
+        "class_display_name": class_row[1],
+        "total_count": int(category_counts.sum()),
+        "total_cost": float(category_totals.sum()),
+        "by_category": by_category,
+        "by_tier": by_tier
+    }
+
 @router.get("/statistics/monthly", response_model=MonthlyStatistics)
 def get_monthly_statistics(
+    request: Request,
     year: int = Query(..., description="연도"),
     month: int = Query(..., ge=1, le=12, description="월")
 ):
-    """월별 통합 통계 (지출/수익/저축 모두)"""
+    """월별 통합 통계 (지출/수익/저축 모두, 원장 변경 전까지 캐시 + ETag)"""
+    return cached_json_response(
+        request, ("statistics/monthly", year, month), MonthlyStatistics,
+        lambda: compute_monthly_statistics(year, month),
+    )
+
+def compute_monthly_statistics(year: int, month: int) -> dict:
+    """월별 통합 통계 계산"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
-        # 지출 합계
-        cursor.execute("""
-            SELECT COALESCE(SUM(cost), 0)
-            FROM assets a
-            JOIN asset_classes ac ON a.class_id = ac.id
-            WHERE ac.name = 'spend'
-            AND strftime('%Y', a.date) = ?
-            AND strftime('%m', a.date) = ?
-        """, (str(year), f"{month:02d}"))
-        spend_total = cursor.fetchone()[0]
-        
-        # 수익 합계
-        cursor.execute("""
-            SELECT COALESCE(SUM(cost), 0)
-            FROM assets a
-            JOIN asset_classes ac ON a.class_id = ac.id
-            WHERE ac.name = 'earn'
-            AND strftime('%Y', a.date) = ?
-            AND strftime('%m', a.date) = ?
-        """, (str(year), f"{month:02d}"))
-        earn_total = cursor.fetchone()[0]
+        ym = year * 100 + month
         
-        # 저축 합계
+        # 분류별 합계 (월 집계 테이블)
         cursor.execute("""
-            SELECT COALESCE(SUM(cost), 0)
-            FROM assets a
-            JOIN asset_classes ac ON a.class_id = ac.id
-            WHERE ac.name = 'save'
-            AND strftime('%Y', a.date) = ?
-            AND strftime('%m', a.date) = ?
-        """, (str(year), f"{month:02d}"))
-        save_total = cursor.fetchone()[0]
+            SELECT ac.name, COALESCE(SUM(s.total_cost), 0)
+            FROM asset_monthly_stats s
+            JOIN asset_classes ac ON s.class_id = ac.id
+            WHERE s.ym = ?
+            GROUP BY ac.name
+        """, (ym,))
+        class_totals = {row[0]: row[1] for row in cursor.fetchall()}
+        spend_total = class_totals.get('spend', 0)
+        earn_total = class_totals.get('earn', 0)
+        save_total = class_totals.get('save', 0)
 
         # 지출 티어별 합계
         cursor.execute("""
-            SELECT t.name, t.display_name, COALESCE(SUM(a.cost), 0) as total
-            FROM assets a
-            JOIN asset_classes ac ON a.class_id = ac.id
-            JOIN asset_tiers t ON a.tier_id = t.id
-            WHERE ac.name = 'spend'
-            AND strftime('%Y', a.date) = ?
-            AND strftime('%m', a.date) = ?
+            SELECT t.name, t.display_name, COALESCE(SUM(s.total_cost), 0) as total
+            FROM asset_monthly_stats s
+            JOIN asset_classes ac ON s.class_id = ac.id
+            JOIN asset_tiers t ON s.tier_id = t.id
+            WHERE ac.name = 'spend' AND s.ym = ?
             GROUP BY t.id
             ORDER BY t.sort_order
-        """, (str(year), f"{month:02d}"))
+        """, (ym,))
         spend_by_tier = [dict(row) for row in cursor.fetchall()]
         
         return {
@@ -891,6 +1222,222 @@ def get_monthly_statistics(
 
 # ===== Period Comparison (기간별 비교) API =====
 
+def _comparison_buckets(period_unit, end: date_type, periods: int) -> List[tuple]:
+    """비교할 기간들의 (레이블, 시작일, 종료일) 목록 계산 (최신순)"""
+    from models.asset import PeriodUnit
+
+    buckets = []
+    for i in range(periods):
+        if period_unit == PeriodUnit.day:
+            period_end = end - timedelta(days=i)
+            period_start = period_end
+            label = period_end.strftime("%Y-%m-%d")
+            
+        elif period_unit == PeriodUnit.week:
+            # 주 단위: 월요일~일요일
+            period_end = end - timedelta(weeks=i)
+            weekday = period_end.weekday()  # 0=월요일, 6=일요일
+            period_end = period_end - timedelta(days=weekday) + timedelta(days=6)  # 일요일
+            period_start = period_end - timedelta(days=6)  # 월요일
+            label = f"{period_start.strftime('%m/%d')}~{period_end.strftime('%m/%d')}"
+            
+        elif period_unit == PeriodUnit.month:
+            # 월 단위
+            year = end.year
+            month = end.month - i
+            while month < 1:
+                month += 12
+                year -= 1
+            
+            # 해당 월의 첫날과 마지막날
+            period_start = date_type(year, month, 1)
+            if month == 12:
+                period_end = date_type(year, 12, 31)
+            else:
+                period_end = date_type(year, month + 1, 1) - timedelta(days=1)
+            label = f"{year}년 {month}월"
+            
+        else:  # year
+            year = end.year - i
+            period_start = date_type(year, 1, 1)
+            period_end = date_type(year, 12, 31)
+            label = f"{year}년"
+
+        buckets.append((label, period_start, period_end))
+    return buckets
+
+def _buckets_cte(buckets: List[tuple], monthly: bool) -> tuple[str, list]:
+    """기간 목록을 buckets(idx, start_key, end_key) CTE로 변환"""
+    rows, params = [], []
+    for idx, (_, start, end) in enumerate(buckets):
+        rows.append("(?, ?, ?)")
+        if monthly:
+            params.extend([idx, start.year * 100 + start.month, end.year * 100 + end.month])
+        else:
+            params.extend([idx, start.isoformat(), end.isoformat()])
+    return f"buckets(idx, start_key, end_key) AS (VALUES {', '.join(rows)})", params
+
+def _comparison_totals(cursor, buckets: List[tuple], monthly: bool) -> List[dict]:
+    """모든 기간의 분류별 합계와 지출 카테고리별 합계를 집계 테이블 한 번 조회로 계산"""
+    cte, params = _buckets_cte(buckets, monthly)
+    rollup_table, bucket_col = ("asset_monthly_stats", "ym") if monthly else ("asset_daily_stats", "date")
+    cursor.execute(f"""
+        WITH {cte}
+        SELECT 
+            b.idx, ac.name as class_name,
+            cat.id, cat.name, cat.display_name,
+            SUM(s.tx_count) as count,
+            SUM(s.total_cost) as total
+        FROM buckets b
+        JOIN {rollup_table} s ON s.{bucket_col} BETWEEN b.start_key AND b.end_key
+        JOIN asset_classes ac ON s.class_id = ac.id
+        JOIN asset_categories cat ON s.category_id = cat.id
+        GROUP BY b.idx, s.class_id, cat.id
+    """, params)
+
+    totals = [{"class_totals": {}, "count": 0, "by_category": []} for _ in buckets]
+    for row in cursor.fetchall():
+        bucket = totals[row[0]]
+        bucket["class_totals"][row[1]] = bucket["class_totals"].get(row[1], 0) + row[6]
+        bucket["count"] += row[5]
+        if row[1] == 'spend':
+            bucket["by_category"].append({
+                "category_id": row[2],
+                "category_name": row[3],
+                "category_display_name": row[4],
+                "count": row[5],
+                "total_cost": row[6]
+            })
+    for bucket in totals:
+        bucket["by_category"].sort(key=lambda c: c["total_cost"], reverse=True)
+    return totals
+
+def _comparison_top_candidates(cursor, buckets: List[tuple], monthly: bool, top_n: int) -> tuple[str, list]:
+    """기간별 상위 지출 후보를 고르는 ranked CTE와 파라미터
+
+    월/연 단위는 (class_id, ym, cost) 인덱스로 각 월의 상위 top_n건만 읽고,
+    연 단위는 그 월별 후보 중에서 다시 순위를 매긴다 (연 상위 N건은 반드시 어느 월의 상위 N건).
+    일/주 단위는 날짜 커버링 인덱스만 읽어 기간 내 지출의 순위를 매기고, 상위 top_n건만 본문을 읽는다.
+    """
+    if not monthly:
+        cte, params = _buckets_cte(buckets, monthly=False)
+        return f"""
+            {cte},
+            candidates AS (
+                -- '+': class 인덱스 대신 날짜 커버링 인덱스를 타도록 함 (테이블 접근 없음)
+                SELECT 
+                    b.idx, c.id,
+                    ROW_NUMBER() OVER (PARTITION BY b.idx ORDER BY c.cost DESC, c.id DESC) as rn
+                FROM buckets b
+                JOIN assets c ON c.date BETWEEN b.start_key AND b.end_key
+                WHERE +c.class_id IN (SELECT id FROM asset_classes WHERE name = 'spend')
+            ),
+            ranked AS (
+                -- 상위 N건만 본문을 읽음
+                SELECT 
+                    r.idx, a.id, a.name, a.cost, a.class_id, a.category_id,
+                    a.tier_id, a.date, a.description, r.rn
+                FROM candidates r
+                JOIN assets a ON a.id = r.id
+                WHERE r.rn <= ?
+            )
+        """, params + [top_n]
+
+    rows, params = [], []
+    for idx, (_, start, end) in enumerate(buckets):
+        for ym in _ym_range(start.year * 100 + start.month, end.year * 100 + end.month):
+            rows.append("(?, ?)")
+            params.extend([idx, ym])
+    spend_class_id = get_reference_data(cursor)["class_ids_by_name"].get("spend")
+    return f"""
+        months(idx, ym) AS (VALUES {', '.join(rows)}),
+        ranked AS (
+            SELECT 
+                m.idx, a.id, a.name, a.cost, a.class_id, a.category_id,
+                a.tier_id, a.date, a.description,
+                ROW_NUMBER() OVER (PARTITION BY m.idx ORDER BY a.cost DESC, a.id DESC) as rn
+            FROM months m
+            JOIN assets a ON a.id IN (
+                SELECT id FROM assets
+                WHERE class_id = ? AND ym = m.ym
+                ORDER BY cost DESC, id DESC
+                LIMIT ?
+            )
+        )
+    """, params + [spend_class_id, top_n]
+
+def _snapshot_top_candidates(cursor, buckets: List[tuple], top_n: int) -> tuple[str, list]:
+    """_comparison_top_candidates와 같은 ranked CTE를 열 지향 스냅샷의 상위 N건으로 구성
+
+    순위는 배열 연산으로 정하고 SQL은 고른 id의 본문만 읽는다.
+    """
+    columns = ledger_snapshot.get(cursor)
+    spend_class_id = get_reference_data(cursor)["class_ids_by_name"].get("spend")
+    rows, params = [], []
+    for idx, (_, start, end) in enumerate(buckets):
+        top = columns.top_n(top_n, columns.mask(start=start, end=end, class_id=spend_class_id))
+        for rn, asset_id in enumerate(columns.id[top].tolist(), start=1):
+            rows.append("(?, ?, ?)")
+            params.extend([idx, asset_id, rn])
+    picked = f"VALUES {', '.join(rows)}" if rows else "SELECT 0, 0, 0 WHERE 0"
+    return f"""
+        picked(idx, id, rn) AS ({picked}),
+        ranked AS (
+            SELECT 
+                p.idx, a.id, a.name, a.cost, a.class_id, a.category_id,
+                a.tier_id, a.date, a.description, p.rn
+            FROM picked p
+            JOIN assets a ON a.id = p.id
+        )
+    """, params
+
+def _comparison_top_transactions(cursor, buckets: List[tuple], monthly: bool = False, top_n: int = 5) -> List[list]:
+    """모든 기간의 상위 지출 거래를 윈도 함수 한 번 조회로 계산"""
+    if snapshot_enabled():
+        ranked, params = _snapshot_top_candidates(cursor, buckets, top_n)
+    else:
+        ranked, params = _comparison_top_candidates(cursor, buckets, monthly, top_n)
+    cursor.execute(f"""
+        WITH {ranked}
+        SELECT 
+            r.idx, r.id, r.name, r.cost, r.class_id, r.category_id,
+            r.tier_id, r.date, r.description,
+            ac.name as class_name, ac.display_name as class_display_name,
+            cat.name as category_name, cat.display_name as category_display_name,
+            t.tier_level, t.name as tier_name, t.display_name as tier_display_name
+        FROM ranked r
+        JOIN asset_classes ac ON r.class_id = ac.id
+        JOIN asset_categories cat ON r.category_id = cat.id
+        JOIN asset_tiers t ON r.tier_id = t.id
+        WHERE r.rn <= ?
+        ORDER BY r.idx, r.rn
+    """, params + [top_n])
+
+    rows = cursor.fetchall()
+    tags_by_asset = get_asset_tags_batch(cursor, [row[1] for row in rows])
+
+    top_transactions = [[] for _ in buckets]
+    for row in rows:
+        top_transactions[row[0]].append({
+            "id": row[1],
+            "name": row[2],
+            "cost": row[3],
+            "class_id": row[4],
+            "category_id": row[5],
+            "tier_id": row[6],
+            "date": row[7],
+            "description": row[8],
+            "class_name": row[9],
+            "class_display_name": row[10],
+            "category_name": row[11],
+            "category_display_name": row[12],
+            "tier_level": row[13],
+            "tier_name": row[14],
+            "tier_display_name": row[15],
+            "tags": tags_by_asset[row[1]]
+        })
+    return top_transactions
+
 @router.get("/statistics/period-comparison")
 def get_period_comparison(
     unit: str = Query("week", description="비교 단위: day, week, month, year"),
@@ -898,8 +1445,7 @@ def get_period_comparison(
     end_date: Optional[str] = Query(None, description="기준 종료일 (YYYY-MM-DD), 미지정시 오늘")
 ):
     """기간별 비교 통계 조회"""
-    from datetime import timedelta
-    from models.asset import PeriodUnit, PeriodComparison, PeriodData
+    from models.asset import PeriodUnit
     
     # 단위 검증
     try:
@@ -922,139 +1468,22 @@ def get_period_comparison(
     else:
         end = datetime.now().date()
     
+    # 기간 경계를 먼저 계산한 뒤 모든 기간을 한 번에 집계
+    buckets = _comparison_buckets(period_unit, end, periods)
+    monthly = period_unit in (PeriodUnit.month, PeriodUnit.year)
+    
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
-        period_data_list = []
+        totals = _comparison_totals(cursor, buckets, monthly)
+        top_transactions = _comparison_top_transactions(cursor, buckets, monthly)
         
-        for i in range(periods):
-            # 각 기간의 시작/종료 계산
-            if period_unit == PeriodUnit.day:
-                period_end = end - timedelta(days=i)
-                period_start = period_end
-                label = period_end.strftime("%Y-%m-%d")
-                
-            elif period_unit == PeriodUnit.week:
-                # 주 단위: 월요일~일요일
-                period_end = end - timedelta(weeks=i)
-                weekday = period_end.weekday()  # 0=월요일, 6=일요일
-                period_end = period_end - timedelta(days=weekday) + timedelta(days=6)  # 일요일
-                period_start = period_end - timedelta(days=6)  # 월요일
-                label = f"{period_start.strftime('%m/%d')}~{period_end.strftime('%m/%d')}"
-                
-            elif period_unit == PeriodUnit.month:
-                # 월 단위
-                year = end.year
-                month = end.month - i
-                while month < 1:
-                    month += 12
-                    year -= 1
-                
-                # 해당 월의 첫날과 마지막날
-                period_start = date_type(year, month, 1)
-                if month == 12:
-                    period_end = date_type(year, 12, 31)
-                else:
-                    period_end = date_type(year, month + 1, 1) - timedelta(days=1)
-                label = f"{year}년 {month}월"
-                
-            else:  # year
-                year = end.year - i
-                period_start = date_type(year, 1, 1)
-                period_end = date_type(year, 12, 31)
-                label = f"{year}년"
-            
-            # 해당 기간의 거래 조회
-            cursor.execute("""
-                SELECT 
-                    ac.name as class_name,
-                    SUM(a.cost) as total,
-                    COUNT(*) as count
-                FROM assets a
-                JOIN asset_classes ac ON a.class_id = ac.id
-                WHERE a.date BETWEEN ? AND ?
-                GROUP BY ac.name
-            """, (period_start.strftime("%Y-%m-%d"), period_end.strftime("%Y-%m-%d")))
-            
-            class_totals = {}
-            total_count = 0
-            for row in cursor.fetchall():
-                class_totals[row[0]] = row[1]
-                total_count += row[2]
-            
+        period_data_list = []
+        for idx, (label, period_start, period_end) in enumerate(buckets):
+            class_totals = totals[idx]["class_totals"]
             spend_total = class_totals.get('spend', 0.0)
             earn_total = class_totals.get('earn', 0.0)
             save_total = class_totals.get('save', 0.0)
-            balance = earn_total - spend_total - save_total
-            
-            # 카테고리별 통계 (지출만)
-            cursor.execute("""
-                SELECT 
-                    cat.id,
-                    cat.name,
-                    cat.display_name,
-                    COUNT(*) as count,
-                    SUM(a.cost) as total
-                FROM assets a
-                JOIN asset_categories cat ON a.category_id = cat.id
-                JOIN asset_classes ac ON a.class_id = ac.id
-                WHERE a.date BETWEEN ? AND ?
-                  AND ac.name = 'spend'
-                GROUP BY cat.id
-                ORDER BY total DESC
-            """, (period_start.strftime("%Y-%m-%d"), period_end.strftime("%Y-%m-%d")))
-            
-            by_category = []
-            for row in cursor.fetchall():
-                by_category.append({
-                    "category_id": row[0],
-                    "category_name": row[1],
-                    "category_display_name": row[2],
-                    "count": row[3],
-                    "total_cost": row[4]
-                })
-            
-            # 상위 거래 5건 (지출액 기준)
-            cursor.execute("""
-                SELECT 
-                    a.id, a.name, a.cost, a.class_id, a.category_id, 
-                    a.tier_id, a.date, a.description,
-                    ac.name as class_name, ac.display_name as class_display_name,
-                    cat.name as category_name, cat.display_name as category_display_name,
-                    t.tier_level, t.name as tier_name, t.display_name as tier_display_name
-                FROM assets a
-                JOIN asset_classes ac ON a.class_id = ac.id
-                JOIN asset_categories cat ON a.category_id = cat.id
-                JOIN asset_tiers t ON a.tier_id = t.id
-                WHERE a.date BETWEEN ? AND ?
-                  AND ac.name = 'spend'
-                ORDER BY a.cost DESC
-                LIMIT 5
-            """, (period_start.strftime("%Y-%m-%d"), period_end.strftime("%Y-%m-%d")))
-            
-            top_rows = cursor.fetchall()
-            tags_by_asset = get_asset_tags_batch(cursor, [row[0] for row in top_rows])
-
-            top_transactions = []
-            for row in top_rows:
-                top_transactions.append({
-                    "id": row[0],
-                    "name": row[1],
-                    "cost": row[2],
-                    "class_id": row[3],
-                    "category_id": row[4],
-                    "tier_id": row[5],
-                    "date": row[6],
-                    "description": row[7],
-                    "class_name": row[8],
-                    "class_display_name": row[9],
-                    "category_name": row[10],
-                    "category_display_name": row[11],
-                    "tier_level": row[12],
-                    "tier_name": row[13],
-                    "tier_display_name": row[14],
-                    "tags": tags_by_asset[row[0]]
-                })
             
             period_data_list.append({
                 "period_label": label,
@@ -1063,10 +1492,10 @@ def get_period_comparison(
                 "spend_total": spend_total,
                 "earn_total": earn_total,
                 "save_total": save_total,
-                "balance": balance,
-                "transaction_count": total_count,
-                "by_category": by_category,
-                "top_transactions": top_transactions
+                "balance": earn_total - spend_total - save_total,
+                "transaction_count": totals[idx]["count"],
+                "by_category": totals[idx]["by_category"],
+                "top_transactions": top_transactions[idx]
             })
         
         # 평균 및 트렌드 계산
@@ -1100,11 +1529,413 @@ def get_period_comparison(
             "earn_trend": earn_trend
         }
 
+def _ym_range(start_ym: int, end_ym: int) -> List[int]:
+    """start_ym ~ end_ym (포함) 월 키 목록"""
+    months = []
+    ym = start_ym
+    while ym <= end_ym:
+        months.append(ym)
+        ym = _shift_ym(ym, 1)
+    return months
+
+def _ym_label(ym: int) -> str:
+    return f"{ym // 100:04d}-{ym % 100:02d}"
+
+@router.get("/statistics/tags")
+def get_tag_statistics(
+    start: Optional[str] = Query(None, description="시작 월 (YYYY-MM), 미지정시 종료 월 기준 12개월"),
+    end: Optional[str] = Query(None, description="종료 월 (YYYY-MM), 미지정시 이번 달"),
+    bucket: str = Query("month", pattern="^(month|year)$", description="집계 단위 (month, year)"),
+    class_id: Optional[int] = Query(None, description="거래 분류 ID (미지정시 지출)")
+):
+    """태그별 기간 금액 추이 (태그 x 월 집계 테이블 사용)
+
+    buckets와 같은 길이의 series를 태그마다 채워서(빈 구간은 0) 총액 내림차순으로 반환한다.
+    한 거래에 태그가 여러 개면 각 태그에 모두 합산된다.
+    """
+    today = date_type.today()
+    end_ym = _parse_year_month(end) if end else today.year * 100 + today.month
+    start_ym = _parse_year_month(start) if start else _shift_ym(end_ym, -11)
+    if start_ym > end_ym:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="start must not be after end")
+
+    if class_id is None:
+        class_id = get_reference_data()["class_ids_by_name"]["spend"]
+
+    if bucket == "year":
+        bucket_keys = list(range(start_ym // 100, end_ym // 100 + 1))
+        labels = [str(year) for year in bucket_keys]
+        bucket_expr = "s.ym / 100"
+    else:
+        bucket_keys = _ym_range(start_ym, end_ym)
+        labels = [_ym_label(ym) for ym in bucket_keys]
+        bucket_expr = "s.ym"
+    position = {key: i for i, key in enumerate(bucket_keys)}
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT {bucket_expr} as bucket, s.tag_id, t.name, t.color,
+                   SUM(s.tx_count) as count, SUM(s.total_cost) as total
+            FROM asset_tag_monthly_stats s
+            JOIN asset_tags t ON t.id = s.tag_id
+            WHERE s.class_id = ? AND s.ym BETWEEN ? AND ?
+            GROUP BY 1, s.tag_id
+        """, (class_id, start_ym, end_ym))
+
+        tags = {}
+        for row in cursor.fetchall():
+            entry = tags.setdefault(row['tag_id'], {
+                "tag_id": row['tag_id'],
+                "name": row['name'],
+                "color": row['color'],
+                "total": 0.0,
+                "count": 0,
+                "series": [0.0] * len(bucket_keys),
+            })
+            entry["series"][position[row['bucket']]] = row['total']
+            entry["total"] += row['total']
+            entry["count"] += row['count']
+
+    return {
+        "start": _ym_label(start_ym),
+        "end": _ym_label(end_ym),
+        "bucket": bucket,
+        "class_id": class_id,
+        "buckets": labels,
+        "tags": sorted(tags.values(), key=lambda t: (-t["total"], t["name"]))
+    }
+
+@router.get("/statistics/daily")
+def get_daily_statistics(
+    year: int = Query(..., ge=1900, le=9999, description="연도"),
+    month: int = Query(..., ge=1, le=12, description="월"),
+    tier_id: Optional[List[int]] = Query(None, description="포함할 티어 ID (여러 번 지정 가능, 미지정시 전체)")
+):
+    """달력용 일별 분류 합계 (일 단위 집계 테이블 사용)
+
+    분류마다 해당 월 일수 길이의 totals/counts 배열을 채워 반환한다 (인덱스 0 = 1일).
+    """
+    days_in_month = calendar.monthrange(year, month)[1]
+    first_day = date_type(year, month, 1)
+    last_day = date_type(year, month, days_in_month)
+
+    # 일 집계 테이블 PK(date, ...)의 범위 검색
+    query = """
+        SELECT s.date, s.class_id, SUM(s.tx_count) as count, SUM(s.total_cost) as total
+        FROM asset_daily_stats s
+        WHERE s.date BETWEEN ? AND ?
+    """
+    params = [first_day.isoformat(), last_day.isoformat()]
+    if tier_id:
+        query += f" AND s.tier_id IN ({','.join('?' * len(tier_id))})"
+        params.extend(tier_id)
+    query += " GROUP BY s.date, s.class_id"
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        refs = get_reference_data(cursor)
+        classes = {
+            c["id"]: {
+                "class_id": c["id"],
+                "name": c["name"],
+                "display_name": c["display_name"],
+                "total": 0.0,
+                "count": 0,
+                "totals": [0.0] * days_in_month,
+                "counts": [0] * days_in_month,
+            }
+            for c in refs["classes"] if c["is_active"]
+        }
+
+        cursor.execute(query, params)
+        for row in cursor.fetchall():
+            entry = classes.get(row['class_id'])
+            if entry is None:
+                continue
+            day_index = date_type.fromisoformat(str(row['date'])[:10]).day - 1
+            entry["totals"][day_index] += row['total']
+            entry["counts"][day_index] += row['count']
+            entry["total"] += row['total']
+            entry["count"] += row['count']
+
+    by_name = {c["name"]: c for c in classes.values()}
+    zeros = [0.0] * days_in_month
+    earn = by_name.get("earn", {}).get("totals", zeros)
+    spend = by_name.get("spend", {}).get("totals", zeros)
+    save = by_name.get("save", {}).get("totals", zeros)
+
+    return {
+        "year": year,
+        "month": month,
+        "days": days_in_month,
+        "classes": list(classes.values()),
+        "balance": [earn[i] - spend[i] - save[i] for i in range(days_in_month)],
+    }
+
+TREND_GROUPS = {
+    # group: (집계 열, 참조 캐시 맵)
+    "class": ("class_id", "class_by_id"),
+    "category": ("category_id", "category_by_id"),
+    "tier": ("tier_id", "tier_by_id"),
+}
+
+@router.get("/statistics/trend")
+def get_trend_statistics(
+    from_month: str = Query(..., alias="from", description="시작 월 (YYYY-MM)"),
+    to_month: Optional[str] = Query(None, alias="to", description="종료 월 (YYYY-MM), 미지정시 이번 달"),
+    group: str = Query("class", pattern="^(class|category|tier)$", description="계열 기준 (class, category, tier)"),
+    class_id: Optional[int] = Query(None, description="거래 분류 ID로 필터링")
+):
+    """월 x 계열 금액 행렬 (월 집계 테이블 한 번의 GROUP BY)
+
+    series[i].values[j]는 months[j]의 금액이며 거래가 없는 달은 0이다.
+    """
+    start_ym = _parse_year_month(from_month)
+    if to_month:
+        end_ym = _parse_year_month(to_month)
+    else:
+        today = date_type.today()
+        end_ym = today.year * 100 + today.month
+    if start_ym > end_ym:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="from must not be after to")
+
+    months = _ym_range(start_ym, end_ym)
+    position = {ym: i for i, ym in enumerate(months)}
+    column, ref_map = TREND_GROUPS[group]
+
+    query = f"""
+        SELECT s.ym, s.class_id, s.{column} as series_id,
+               SUM(s.tx_count) as count, SUM(s.total_cost) as total
+        FROM asset_monthly_stats s
+        WHERE s.ym BETWEEN ? AND ?
+    """
+    params = [start_ym, end_ym]
+    if class_id:
+        query += " AND s.class_id = ?"
+        params.append(class_id)
+    query += f" GROUP BY s.ym, s.class_id, s.{column}"
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        refs = get_reference_data(cursor)
+        cursor.execute(query, params)
+
+        series = {}
+        for row in cursor.fetchall():
+            key = (row['class_id'], row['series_id'])
+            entry = series.get(key)
+            if entry is None:
+                ref = refs[ref_map].get(row['series_id'], {})
+                entry = series[key] = {
+                    "id": row['series_id'],
+                    "class_id": row['class_id'],
+                    "label": ref.get("display_name") or ref.get("name") or str(row['series_id']),
+                    "total": 0.0,
+                    "count": 0,
+                    "values": [0.0] * len(months),
+                }
+            entry["values"][position[row['ym']]] += row['total']
+            entry["total"] += row['total']
+            entry["count"] += row['count']
+
+    return {
+        "from": _ym_label(start_ym),
+        "to": _ym_label(end_ym),
+        "group": group,
+        "months": [_ym_label(ym) for ym in months],
+        "series": sorted(series.values(), key=lambda e: (e["class_id"], -e["total"])),
+    }
+
+def _compute_flows(cursor, start: date_type, end: date_type) -> dict:
+    """수입 -> 분류 -> 카테고리 -> 하위 카테고리 흐름을 한 번의 GROUP BY로 집계"""
+    cursor.execute("""
+        SELECT class_id, category_id, sub_category_id, tier_id,
+               COUNT(*) as count, SUM(cost) as total
+        FROM assets
+        WHERE date BETWEEN ? AND ?
+        GROUP BY class_id, category_id, sub_category_id, tier_id
+    """, (start.isoformat(), end.isoformat()))
+    rows = cursor.fetchall()
+
+    refs = get_reference_data(cursor)
+    earn_class_id = refs["class_ids_by_name"].get("earn")
+    nodes = {}
+    links = {}
+    tiers = {}
+
+    def node(node_id: str, label: str, level: int):
+        nodes.setdefault(node_id, {"id": node_id, "label": label, "level": level})
+
+    def link(source: str, target: str, value: float):
+        links[(source, target)] = links.get((source, target), 0.0) + value
+
+    node("income", "수입", 1)
+    income_total = outflow_total = 0.0
+    for class_id, category_id, sub_category_id, tier_id, count, total in rows:
+        category = refs["category_by_id"].get(category_id, {})
+        category_label = category.get("display_name") or category.get("name") or "기타"
+        category_node = f"category:{category_id}"
+
+        if class_id == earn_class_id:
+            node(category_node, category_label, 0)
+            link(category_node, "income", total)
+            income_total += total
+        else:
+            klass = refs["class_by_id"].get(class_id, {})
+            class_node = f"class:{class_id}"
+            sub_category = refs["sub_category_by_id"].get(sub_category_id)
+            sub_node = f"sub:{category_id}:{sub_category_id or 0}"
+            node(class_node, klass.get("display_name", str(class_id)), 2)
+            node(category_node, category_label, 3)
+            node(sub_node, sub_category["name"] if sub_category else "미분류", 4)
+            link("income", class_node, total)
+            link(class_node, category_node, total)
+            link(category_node, sub_node, total)
+            outflow_total += total
+
+        tier_key = (class_id, tier_id)
+        tier = tiers.setdefault(tier_key, {
+            "class_id": class_id,
+            "tier_id": tier_id,
+            "label": refs["tier_by_id"].get(tier_id, {}).get("display_name", str(tier_id)),
+            "count": 0,
+            "value": 0.0,
+        })
+        tier["count"] += count
+        tier["value"] += total
+
+    # 수입과 지출/저축 차이는 잉여 또는 부족 노드로 맞춘다
+    if income_total > outflow_total:
+        node("surplus", "잔액", 2)
+        link("income", "surplus", income_total - outflow_total)
+    elif outflow_total > income_total:
+        node("deficit", "부족분", 0)
+        link("deficit", "income", outflow_total - income_total)
+
+    inflow, outflow = {}, {}
+    for (source, target), value in links.items():
+        outflow[source] = outflow.get(source, 0.0) + value
+        inflow[target] = inflow.get(target, 0.0) + value
+    for node_id, entry in nodes.items():
+        entry["value"] = max(inflow.get(node_id, 0.0), outflow.get(node_id, 0.0))
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "income_total": income_total,
+        "outflow_total": outflow_total,
+        "nodes": sorted(nodes.values(), key=lambda n: (n["level"], -n["value"], n["id"])),
+        "links": [
+            {"source": source, "target": target, "value": value}
+            for (source, target), value in sorted(links.items(), key=lambda item: -item[1])
+        ],
+        "tiers": sorted(tiers.values(), key=lambda t: (t["class_id"], -t["value"])),
+    }
+
+@router.get("/statistics/flows")
+def get_flow_statistics(
+    start: Optional[date_type] = Query(None, description="시작 날짜 (YYYY-MM-DD), 미지정시 이번 달 1일"),
+    end: Optional[date_type] = Query(None, description="종료 날짜 (YYYY-MM-DD), 미지정시 오늘")
+):
+    """Sankey 차트용 자금 흐름 (노드/링크)
+
+    수익 카테고리 -> 수입 -> 지출/저축 -> 카테고리 -> 하위 카테고리 순서의 링크와 티어별 합계를 반환한다.
+    결과는 기간별로 캐시되며 거래가 바뀌면(원장 버전 증가) 다시 계산한다.
+    """
+    today = date_type.today()
+    start = start or today.replace(day=1)
+    end = end or today
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="start must not be after end")
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        return ledger_cache.get_or_compute(
+            cursor, ("flows", start.isoformat(), end.isoformat()),
+            lambda: _compute_flows(cursor, start, end)
+        )
+
+# ===== 분석 API =====
+
+@router.get("/analytics/anomalies")
+def get_anomalies(
+    class_id: int = Query(1, description="거래 분류 ID (1=지출, 2=수익, 3=저축)"),
+    start: Optional[date_type] = Query(None, description="분석 시작 날짜 (YYYY-MM-DD), 미지정시 종료 30일 전"),
+    end: Optional[date_type] = Query(None, description="분석 종료 날짜 (YYYY-MM-DD), 미지정시 오늘"),
+    history_days: int = Query(HISTORY_DAYS, ge=28, le=730, description="기준선으로 쓸 시작 이전 일수")
+):
+    """카테고리별 일별 금액의 이상치와 수준 변화
+
+    이동 z-score(zscore), MAD 기준 이상치(mad), 전후 평균 변화(level_shift)를 점수 절댓값 순으로 반환한다.
+    결과는 원장 버전이 바뀔 때까지 캐시된다.
+    """
+    end = end or date_type.today()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="start must not be after end")
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if class_id not in get_reference_data(cursor)["class_by_id"]:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail=f"Class with id {class_id} not found")
+        return ledger_cache.get_or_compute(
+            cursor, ("anomalies", class_id, start.isoformat(), end.isoformat(), history_days),
+            lambda: detect_anomalies(cursor, class_id, start, end, history_days)
+        )
+
+@router.get("/analytics/forecast")
+def get_forecast(
+    year: Optional[int] = Query(None, description="연도, 미지정시 이번 달"),
+    month: Optional[int] = Query(None, ge=1, le=12, description="월, 미지정시 이번 달"),
+    class_id: int = Query(1, description="거래 분류 ID (1=지출, 2=수익, 3=저축)"),
+    history_months: int = Query(FORECAST_HISTORY_MONTHS, ge=1, le=36, description="월내 분포 모델에 쓸 과거 달 수")
+):
+    """카테고리별 월말 예상 합계 (run-rate + 월내 분포 모델, 80% 구간)와 예산 초과 예측
+
+    overruns는 이미 초과(exceeded), 구간 하한도 초과(likely), 예상치가 초과(possible)한 카테고리다.
+    결과는 원장 버전이 바뀌거나 날짜가 바뀔 때까지 캐시된다.
+    """
+    today = date_type.today()
+    year, month = year or today.year, month or today.month
+    if (year, month) > (today.year, today.month):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="forecast month must not be after the current month")
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if class_id not in get_reference_data(cursor)["class_by_id"]:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail=f"Class with id {class_id} not found")
+
+        def compute():
+            # 조회 전용이라 예산을 저장하지 않음 (저장하면 원장 버전이 올라 캐시/ETag가 모두 무효화됨)
+            # 예산 0은 예산 미설정
+            budgets = {b["category_id"]: b["budget_amount"]
+                       for b in calculate_budgets_for_month(cursor, year, month, class_id=class_id, persist=False)
+                       if b["budget_amount"] > 0}
+            return forecast_month(cursor, class_id, year, month, today, budgets, history_months)
+
+        return ledger_cache.get_or_compute(
+            cursor, ("forecast", class_id, year, month, today.isoformat(), history_months), compute
+        )
+
 # ===== Tags (태그) API =====
 
 @router.get("/tags", response_model=List[AssetTag])
-def get_all_tags(active_only: bool = Query(True, description="활성 태그만 조회")):
-    """모든 태그 목록 조회"""
+def get_all_tags(request: Request, active_only: bool = Query(True, description="활성 태그만 조회")):
+    """모든 태그 목록 조회 (원장 변경 전까지 캐시 + ETag)"""
+    return cached_json_response(
+        request, ("tags", active_only), List[AssetTag], lambda: list_tags(active_only),
+    )
+
+def list_tags(active_only: bool = True) -> List[dict]:
+    """태그 목록 (사용 횟수 순)"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
@@ -1153,6 +1984,7 @@ def create_tag(tag: AssetTagCreate):
         return dict(cursor.fetchone())
 
 @router.put("/tags/{tag_id}", response_model=AssetTag)
+@invalidates_tag_index
 def update_tag(tag_id: int, tag: AssetTagUpdate):
     """태그 정보 수정"""
     with get_db_connection() as conn:
@@ -1201,6 +2033,7 @@ def update_tag(tag_id: int, tag: AssetTagUpdate):
         return dict(cursor.fetchone())
 
 @router.delete("/tags/{tag_id}")
+@invalidates_tag_index
 def delete_tag(tag_id: int, force: bool = Query(False, description="강제 삭제")):
     """태그 삭제 (또는 비활성화)"""
     with get_db_connection() as conn:
@@ -1240,23 +2073,79 @@ def delete_tag(tag_id: int, force: bool = Query(False, description="강제 삭
             "tag": dict(tag)
         }
 
+def _fts_phrase(term: str) -> str:
+    """FTS5 MATCH 구문용 문자열 리터럴 (큰따옴표 이스케이프)"""
+    return '"' + term.replace('"', '""') + '"'
+
+def _like_pattern(term: str) -> str:
+    """부분 문자열 LIKE 패턴 (ESCAPE '\\')"""
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+def build_search_match(query: str) -> tuple:
+    """검색어를 (trigram MATCH 식 또는 None, 짧은 용어 LIKE 패턴 목록)으로 변환
+
+    3글자 이상 용어는 trigram 인덱스의 부분 문자열 검색, 1~2글자 용어는
+    trigram으로 찾을 수 없으므로 LIKE 부분 문자열 검색으로 처리한다
+    (단어 중간도 찾음, 예: '벅스' -> '스타벅스'). 모든 용어는 AND.
+    """
+    terms = query.split()
+    long_terms = [_fts_phrase(term) for term in terms if len(term) >= 3]
+    short_terms = [_like_pattern(term) for term in terms if len(term) < 3]
+    return " AND ".join(long_terms) or None, short_terms
+
 @router.get("/search")
 def search_transactions(
-    query: str = Query(..., min_length=1, description="검색어 (거래명 또는 설명)"),
-    class_id: Optional[int] = Query(None, description="거래 분류 ID로 필터링")
+    query: str = Query(..., min_length=1, description="검색어 (거래명, 설명 또는 태그)"),
+    class_id: Optional[int] = Query(None, description="거래 분류 ID로 필터링"),
+    limit: int = Query(50, ge=1, le=200, description="페이지 크기"),
+    offset: int = Query(0, ge=0, description="건너뛸 결과 수")
 ):
-    """거래 검색 (이름 또는 설명)"""
+    """거래 검색 (이름, 설명, 태그 전문 검색 - 관련도 순)
+
+    3글자 이상 용어가 하나라도 있으면 trigram 인덱스 후보만 보므로 원장 크기와 거의 무관하다.
+    1~2글자 용어만 있으면 인덱스를 쓸 수 없어 거래 전체를 LIKE로 훑으므로(기존 LIKE 검색과 같은 비용)
+    응답 시간이 거래 수에 비례하고, 관련도 대신 최신순으로 정렬한다.
+    """
+    trigram_match, like_patterns = build_search_match(query)
+    if not trigram_match and not like_patterns:
+        raise HTTPException(status_code=400, detail="검색어가 비어 있습니다")
+
+    # 긴 용어는 trigram 인덱스로 후보를 찾고, 짧은 용어는 거래명/설명/태그 이름에 LIKE로 거른다
+    # (FTS 테이블 열을 읽는 것보다 빠름). 짧은 용어만 있으면 기존 LIKE 검색처럼 거래 전체를 훑는다.
+    fts_table = "asset_search_trigram"
+    conditions, params = [], []
+    if trigram_match:
+        from_clause = f"{fts_table} JOIN assets a ON a.id = {fts_table}.rowid"
+        conditions.append(f"{fts_table} MATCH ?")
+        params.append(trigram_match)
+    else:
+        from_clause = "assets a"
+    for pattern in like_patterns:
+        conditions.append("""(
+            a.name LIKE ? ESCAPE '\\' OR a.description LIKE ? ESCAPE '\\'
+            OR EXISTS (SELECT 1 FROM asset_tag_relations r JOIN asset_tags tg ON tg.id = r.tag_id
+                       WHERE r.asset_id = a.id AND tg.name LIKE ? ESCAPE '\\')
+        )""")
+        params.extend([pattern] * 3)
+    where_clause = "WHERE " + " AND ".join(conditions)
+    if class_id:
+        where_clause += " AND a.class_id = ?"
+        params.append(class_id)
+
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        
-        search_query = f"%{query}%"
-        where_clause = "WHERE (a.name LIKE ? OR a.description LIKE ?)"
-        params = [search_query, search_query]
-        
-        if class_id:
-            where_clause += " AND a.class_id = ?"
-            params.append(class_id)
-        
+
+        cursor.execute(f"""
+            SELECT COUNT(*)
+            FROM {from_clause}
+            {where_clause}
+        """, params)
+        total = cursor.fetchone()[0]
+
+        # 열 가중치: 거래명 10, 설명 1, 태그 5 (bm25는 MATCH가 있을 때만 사용 가능)
+        order_by = "a.date DESC, a.id DESC"
+        if trigram_match:
+            order_by = f"bm25({fts_table}, 10.0, 1.0, 5.0), " + order_by
         cursor.execute(f"""
             SELECT 
                 a.id, a.name, a.cost, a.date, a.description,
@@ -1264,20 +2153,28 @@ def search_transactions(
                 cat.name as category_name, cat.display_name as category_display_name,
                 t.tier_level, t.name as tier_name, t.display_name as tier_display_name,
                 a.created_at, a.updated_at
-            FROM assets a
+            FROM {from_clause}
             JOIN asset_classes ac ON a.class_id = ac.id
             JOIN asset_categories cat ON a.category_id = cat.id
             JOIN asset_tiers t ON a.tier_id = t.id
             {where_clause}
-            ORDER BY a.date DESC
-            LIMIT 50
-        """, params)
-        
+            ORDER BY {order_by}
+            LIMIT ? OFFSET ?
+        """, params + [limit, offset])
+
         rows = cursor.fetchall()
+        results = [dict(row) for row in rows]
+        tags_map = get_asset_tags_batch(cursor, [r['id'] for r in results])
+        for result in results:
+            result['tags'] = tags_map.get(result['id'], [])
+
         return {
             "query": query,
-            "total_results": len(rows),
-            "results": [dict(row) for row in rows]
+            "total_results": total,
+            "limit": limit,
+            "offset": offset,
+            "has_more": offset + len(results) < total,
+            "results": results
         }
 
 # ===== Budget (예산) API =====
@@ -1290,135 +2187,288 @@ def _apply_budget_cap(amount: float, default_budget: float, rollover_amount: flo
         return 0
     return amount
 
+def _calculate_rollover(default_budget: float, class_id: int, rollover_enabled: bool,
+                        prev_budget: Optional[float], prev_spent: float) -> float:
+    """이전 달 잔액 기반 이월액 계산 (잔액의 50%, 최대 기본 예산의 50%)"""
+    if class_id != 1 or not rollover_enabled or prev_budget is None:
+        return 0
+    remaining = prev_budget - prev_spent
+    if remaining <= 0:
+        return 0
+    if remaining > default_budget:
+        return default_budget * 0.5
+    return remaining * 0.5
+
+def _resolve_budget_amount(default_budget: float, rollover_amount: float, existing: Optional[dict]) -> Optional[float]:
+    """저장할 예산액 계산 (기존 레코드의 이월액이 그대로면 None)"""
+    if existing is None:
+        return _apply_budget_cap(default_budget + rollover_amount, default_budget, rollover_amount)
+    if existing['rollover_amount'] == rollover_amount:
+        return None
+    # 이월 로직에 따른 롤오버가 기존과 달라졌다면 (과거 지출 수정 또는 이월 설정 변경)
+    # budget_amount는 (기존 예산액 - 기존 이월액 + 새 이월액)으로 보정
+    new_budget_amount = existing['budget_amount'] - existing['rollover_amount'] + rollover_amount
+    return _apply_budget_cap(new_budget_amount, default_budget, rollover_amount)
+
+BUDGET_UPSERT_SQL = """
+    INSERT INTO asset_budgets (category_id, year, month, budget_amount, rollover_amount)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (category_id, year, month) DO UPDATE SET
+        budget_amount = excluded.budget_amount,
+        rollover_amount = excluded.rollover_amount,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+def calculate_budgets_for_month(cursor, year: int, month: int,
+                                class_id: Optional[int] = None,
+                                category_ids: Optional[List[int]] = None,
+                                persist: bool = True) -> List[dict]:
+    """특정 월의 카테고리별 예산을 한 번에 계산하고 DB에 저장 (이월 로직 포함)
+
+    category_ids가 없으면 활성 카테고리 전체(선택적으로 class_id 필터)를 대상으로 한다.
+    카테고리 수와 무관하게 조회 4번 + 변경분 executemany 1번으로 처리한다.
+    persist=False면 같은 계산 결과를 저장하지 않고 반환만 한다 (원장 버전이 바뀌지 않음).
+    """
+    # 1. 대상 카테고리 조회
+    if category_ids is not None:
+        placeholders = ",".join("?" * len(category_ids))
+        cursor.execute(f"""
+            SELECT id, default_budget, class_id, rollover_enabled
+            FROM asset_categories WHERE id IN ({placeholders})
+            ORDER BY id
+        """, category_ids)
+    elif class_id:
+        cursor.execute("""
+            SELECT id, default_budget, class_id, rollover_enabled
+            FROM asset_categories WHERE class_id = ? AND is_active = TRUE
+            ORDER BY id
+        """, (class_id,))
+    else:
+        cursor.execute("""
+            SELECT id, default_budget, class_id, rollover_enabled
+            FROM asset_categories WHERE is_active = TRUE
+            ORDER BY id
+        """)
+    categories = cursor.fetchall()
+    if not categories:
+        return []
+
+    prev_year, prev_month = (year - 1, 12) if month == 1 else (year, month - 1)
+
+    # 2. 이전 달 예산 / 이번 달 기존 예산 (한 번에 조회)
+    cursor.execute("""
+        SELECT id, category_id, year, month, budget_amount, rollover_amount, created_at, updated_at
+        FROM asset_budgets
+        WHERE (year = ? AND month = ?) OR (year = ? AND month = ?)
+    """, (prev_year, prev_month, year, month))
+    prev_budgets, existing_budgets = {}, {}
+    for row in cursor.fetchall():
+        if row['year'] == year and row['month'] == month:
+            existing_budgets[row['category_id']] = dict(row)
+        else:
+            prev_budgets[row['category_id']] = row['budget_amount']
+
+    # 3. 이전 달 카테고리별 지출 (월 집계 테이블)
+    cursor.execute("""
+        SELECT category_id, SUM(total_cost)
+        FROM asset_monthly_stats
+        WHERE ym = ?
+        GROUP BY category_id
+    """, (prev_year * 100 + prev_month,))
+    prev_spent = {row[0]: row[1] for row in cursor.fetchall()}
+
+    # 4. 이월액 / 예산액 계산 후 변경분만 일괄 저장
+    upserts = []
+    for category in categories:
+        category_id = category['id']
+        default_budget = category['default_budget'] or 0
+        rollover_amount = _calculate_rollover(
+            default_budget, category['class_id'], bool(category['rollover_enabled']),
+            prev_budgets.get(category_id), prev_spent.get(category_id) or 0
+        )
+        budget_amount = _resolve_budget_amount(default_budget, rollover_amount, existing_budgets.get(category_id))
+        if budget_amount is not None:
+            upserts.append((category_id, year, month, budget_amount, rollover_amount))
+
+    if upserts and not persist:
+        for category_id, _, _, budget_amount, rollover_amount in upserts:
+            existing = existing_budgets.get(category_id) or {"category_id": category_id, "year": year, "month": month}
+            existing_budgets[category_id] = {**existing, "budget_amount": budget_amount,
+                                             "rollover_amount": rollover_amount}
+    elif upserts:
+        cursor.executemany(BUDGET_UPSERT_SQL, upserts)
+
+        # 변경된 레코드만 다시 조회
+        changed_ids = [row[0] for row in upserts]
+        placeholders = ",".join("?" * len(changed_ids))
+        cursor.execute(f"""
+            SELECT id, category_id, year, month, budget_amount, rollover_amount, created_at, updated_at
+            FROM asset_budgets
+            WHERE year = ? AND month = ? AND category_id IN ({placeholders})
+        """, [year, month] + changed_ids)
+        for row in cursor.fetchall():
+            existing_budgets[row['category_id']] = dict(row)
+
+    return [existing_budgets[category['id']] for category in categories]
+
 def calculate_budget_for_month(cursor, category_id: int, year: int, month: int) -> dict:
-    """특정 월의 예산을 계산하고 DB에 저장 (이월 로직 포함)"""
-    
-    # 1. 카테고리 기본 정보 조회
-    cursor.execute("SELECT default_budget, class_id, rollover_enabled FROM asset_categories WHERE id = ?", (category_id,))
-    category = cursor.fetchone()
-    if not category:
+    """특정 카테고리 한 개의 월 예산 계산 및 저장"""
+    budgets = calculate_budgets_for_month(cursor, year, month, category_ids=[category_id])
+    if not budgets:
         raise HTTPException(status_code=404, detail="Category not found")
-    
-    default_budget = category['default_budget'] or 0
-    class_id = category['class_id']
-    rollover_enabled = bool(category['rollover_enabled'])
+    return budgets[0]
 
-    # 2. 이전 달 정보 조회 (이월 계산용)
-    rollover_amount = 0
-    
-    if class_id == 1 and rollover_enabled:
-        prev_year = year
-        prev_month = month - 1
-        if prev_month == 0:
-            prev_year -= 1
-            prev_month = 12
-        
-        # 이전 달 예산 조회
+def _shift_ym(ym: int, months: int) -> int:
+    """YYYYMM 정수 키를 months개월만큼 이동"""
+    index = (ym // 100) * 12 + (ym % 100 - 1) + months
+    return (index // 12) * 100 + index % 12 + 1
+
+def _parse_year_month(value: str) -> int:
+    """'YYYY-MM' 문자열을 YYYYMM 정수 키로 변환"""
+    try:
+        parsed = datetime.strptime(value, "%Y-%m")
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Invalid month: {value}. Use YYYY-MM")
+    return parsed.year * 100 + parsed.month
+
+def recompute_budget_chain(cursor, start_ym: int, end_ym: int,
+                           category_ids: Optional[List[int]] = None,
+                           changed_months: Optional[Dict[int, List[int]]] = None) -> dict:
+    """start_ym ~ end_ym 구간의 월별 예산을 이월 체인을 따라 한 번에 재계산
+
+    카테고리마다 월 순서대로 한 번씩만 진행하며, 직전 달 예산은 DB를 다시 읽지 않고
+    메모리에 들고 간다. 빠진 달은 새로 생성하고 모든 변경은 executemany 한 번으로 저장한다.
+    changed_months({카테고리 ID: [지출이 바뀐 YYYYMM]})가 주어지면 카테고리마다 가장 이른 변경 달의
+    다음 달부터 진행하고, 마지막 변경 달을 지난 뒤 예산이 그대로인 달에서 멈춘다
+    (그 뒤 달은 영향을 받지 않으므로).
+    """
+    if category_ids is not None:
+        placeholders = ",".join("?" * len(category_ids))
+        cursor.execute(f"""
+            SELECT id, default_budget, class_id, rollover_enabled
+            FROM asset_categories WHERE id IN ({placeholders})
+        """, category_ids)
+    else:
         cursor.execute("""
-            SELECT budget_amount
-            FROM asset_budgets
-            WHERE category_id = ? AND year = ? AND month = ?
-        """, (category_id, prev_year, prev_month))
-        prev_budget_row = cursor.fetchone()
-        
-        if prev_budget_row:
-            prev_budget = prev_budget_row['budget_amount']
-            
-            # 이전 달 지출 조회
-            start_date = f"{prev_year}-{prev_month:02d}-01"
-            if prev_month == 12:
-                end_date = f"{prev_year+1}-01-01"
-            else:
-                end_date = f"{prev_year}-{prev_month+1:02d}-01"
-                
-            cursor.execute("""
-                SELECT SUM(cost) 
-                FROM assets 
-                WHERE category_id = ? AND date >= ? AND date < ?
-            """, (category_id, start_date, end_date))
-            prev_spent_row = cursor.fetchone()
-            prev_spent = prev_spent_row[0] if prev_spent_row and prev_spent_row[0] else 0
-            
-            remaining = prev_budget - prev_spent
-            if remaining > 0:
-                if remaining > default_budget:
-                    rollover_amount = default_budget * 0.5
-                else:
-                    rollover_amount = remaining * 0.5
-
-    # 3. 이미 존재하는지 확인
-    cursor.execute("""
-        SELECT id, category_id, year, month, budget_amount, rollover_amount, created_at, updated_at
+            SELECT id, default_budget, class_id, rollover_enabled
+            FROM asset_categories WHERE is_active = TRUE
+        """)
+    categories = cursor.fetchall()
+    if not categories or start_ym > end_ym:
+        return {"categories": 0, "months": 0, "updated": 0}
+
+    ids = [category['id'] for category in categories]
+    placeholders = ",".join("?" * len(ids))
+    prev_start_ym = _shift_ym(start_ym, -1)
+
+    # 구간(+직전 달)의 기존 예산과 월별 지출을 한 번씩만 조회
+    cursor.execute(f"""
+        SELECT category_id, year * 100 + month as ym, budget_amount, rollover_amount
         FROM asset_budgets
-        WHERE category_id = ? AND year = ? AND month = ?
-    """, (category_id, year, month))
-    existing = cursor.fetchone()
-    
-    if existing:
-        existing_dict = dict(existing)
-        # 이월 로직에 따른 롤오버가 기존과 달라졌다면 업데이트 (과거 지출 수정으로 인한 변경 또는 이월 설정 변경)
-        if existing_dict['rollover_amount'] != rollover_amount:
-            # budget_amount는 (기존 예산액 - 기존 이월액 + 새 이월액)으로 보정
-            new_budget_amount = existing_dict['budget_amount'] - existing_dict['rollover_amount'] + rollover_amount
-            new_budget_amount = _apply_budget_cap(new_budget_amount, default_budget, rollover_amount)
+        WHERE category_id IN ({placeholders}) AND year * 100 + month BETWEEN ? AND ?
+    """, ids + [prev_start_ym, end_ym])
+    budgets = {(row[0], row[1]): {"budget_amount": row[2], "rollover_amount": row[3]}
+               for row in cursor.fetchall()}
 
-            cursor.execute("""
-                UPDATE asset_budgets
-                SET budget_amount = ?, rollover_amount = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (new_budget_amount, rollover_amount, existing_dict['id']))
-            
-            # 다시 조회하여 최신본 반환
-            cursor.execute("""
-                SELECT id, category_id, year, month, budget_amount, rollover_amount, created_at, updated_at
-                FROM asset_budgets
-                WHERE id = ?
-            """, (existing_dict['id'],))
-            return dict(cursor.fetchone())
-        return existing_dict
+    cursor.execute(f"""
+        SELECT category_id, ym, SUM(total_cost)
+        FROM asset_monthly_stats
+        WHERE category_id IN ({placeholders}) AND ym BETWEEN ? AND ?
+        GROUP BY category_id, ym
+    """, ids + [prev_start_ym, end_ym])
+    spent = {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+
+    months = []
+    ym = start_ym
+    while ym <= end_ym:
+        months.append(ym)
+        ym = _shift_ym(ym, 1)
+
+    upserts = []
+    for category in categories:
+        category_id = category['id']
+        default_budget = category['default_budget'] or 0
+        category_months, last_changed = months, None
+        if changed_months is not None:
+            changed = changed_months.get(category_id)
+            if not changed:
+                continue
+            first_ym = _shift_ym(min(changed), 1)
+            category_months = [ym for ym in months if ym >= first_ym]
+            last_changed = max(changed)
+        if not category_months:
+            continue
+        prev_ym = _shift_ym(category_months[0], -1)
+        prev_row = budgets.get((category_id, prev_ym))
+        prev_budget = prev_row['budget_amount'] if prev_row else None
+
+        for ym in category_months:
+            rollover_amount = _calculate_rollover(
+                default_budget, category['class_id'], bool(category['rollover_enabled']),
+                prev_budget, spent.get((category_id, prev_ym)) or 0
+            )
+            existing = budgets.get((category_id, ym))
+            budget_amount = _resolve_budget_amount(default_budget, rollover_amount, existing)
+            if budget_amount is None:
+                # 이 달 이후에 지출이 바뀐 달이 남아 있으면 체인을 계속 따라간다
+                if last_changed is not None and ym > last_changed:
+                    break
+                budget_amount = existing['budget_amount']
+            else:
+                upserts.append((category_id, ym // 100, ym % 100, budget_amount, rollover_amount))
+            prev_ym, prev_budget = ym, budget_amount
 
-    # 4. 새 예산 계산
-    new_budget = default_budget + rollover_amount
-    new_budget = _apply_budget_cap(new_budget, default_budget, rollover_amount)
+    if upserts:
+        cursor.executemany(BUDGET_UPSERT_SQL, upserts)
 
-    # 5. DB 저장
-    cursor.execute("""
-        INSERT INTO asset_budgets (category_id, year, month, budget_amount, rollover_amount)
-        VALUES (?, ?, ?, ?, ?)
-    """, (category_id, year, month, new_budget, rollover_amount))
-    
-    new_id = cursor.lastrowid
-    
-    cursor.execute("""
-        SELECT id, category_id, year, month, budget_amount, rollover_amount, created_at, updated_at
-        FROM asset_budgets WHERE id = ?
-    """, (new_id,))
-    return dict(cursor.fetchone())
+    return {"categories": len(categories), "months": len(months), "updated": len(upserts)}
+
+def refresh_budgets_after_change(cursor, changes: Iterable[Tuple[int, object]]) -> dict:
+    """거래 변경 후 영향받는 이월 체인의 뒷부분만 재계산
+
+    changes는 지출이 바뀐 (카테고리 ID, 날짜) 쌍이다. 카테고리마다 변경된 달의 다음 달부터
+    이미 저장된 예산이 있는 마지막 달까지만 진행한다.
+    """
+    changed_months = {}
+    for category_id, changed_date in changes:
+        if category_id and changed_date:
+            changed = date_type.fromisoformat(str(changed_date))
+            changed_months.setdefault(category_id, set()).add(changed.year * 100 + changed.month)
+    if not changed_months:
+        return {"categories": 0, "months": 0, "updated": 0}
+
+    category_ids = sorted(changed_months)
+    start_ym = _shift_ym(min(min(yms) for yms in changed_months.values()), 1)
+
+    placeholders = ",".join("?" * len(category_ids))
+    cursor.execute(f"""
+        SELECT MAX(year * 100 + month) FROM asset_budgets
+        WHERE category_id IN ({placeholders})
+    """, category_ids)
+    end_ym = cursor.fetchone()[0]
+    if end_ym is None or end_ym < start_ym:
+        return {"categories": 0, "months": 0, "updated": 0}
+
+    return recompute_budget_chain(cursor, start_ym, end_ym, category_ids,
+                                  {category_id: sorted(yms) for category_id, yms in changed_months.items()})
 
 @router.get("/budgets", response_model=List[AssetBudget])
 def get_budgets(
+    request: Request,
     year: int,
     month: int,
     class_id: Optional[int] = Query(None, description="거래 분류 ID로 필터링")
 ):
-    """특정 월의 모든 카테고리 예산 조회 (없으면 자동 생성)"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        # 대상 카테고리 조회
-        if class_id:
-            cursor.execute("SELECT id FROM asset_categories WHERE class_id = ? AND is_active = TRUE", (class_id,))
-        else:
-            cursor.execute("SELECT id FROM asset_categories WHERE is_active = TRUE")
-            
-        categories = cursor.fetchall()
-        
-        budgets = []
-        for cat in categories:
-            budget = calculate_budget_for_month(cursor, cat['id'], year, month)
-            budgets.append(budget)
-            
-        return budgets
+    """특정 월의 모든 카테고리 예산 조회 (없으면 자동 생성, 원장 변경 전까지 캐시 + ETag)
+
+    자동 생성은 첫 조회에서만 일어나고 이후에는 바뀐 예산이 없으므로 버전도 그대로다.
+    """
+    def compute():
+        with get_db_connection() as conn:
+            return calculate_budgets_for_month(conn.cursor(), year, month, class_id=class_id)
+
+    return cached_json_response(request, ("budgets", year, month, class_id), List[AssetBudget], compute)
 
 @router.put("/budgets/{category_id}/{year}/{month}", response_model=AssetBudget)
 def update_budget(
@@ -1449,11 +2499,47 @@ def update_budget(
         
         return dict(cursor.fetchone())
 
+@router.post("/budgets/recompute")
+def recompute_budgets(
+    from_month: str = Query(..., alias="from", description="재계산 시작 월 (YYYY-MM)"),
+    to_month: Optional[str] = Query(None, alias="to", description="재계산 종료 월 (YYYY-MM), 미지정시 이번 달"),
+    category_id: Optional[int] = Query(None, description="특정 카테고리만 재계산")
+):
+    """지정 월부터 예산 이월 체인을 재계산 (빠진 달은 생성)"""
+    start_ym = _parse_year_month(from_month)
+    if to_month:
+        end_ym = _parse_year_month(to_month)
+    else:
+        today = date_type.today()
+        end_ym = today.year * 100 + today.month
+    if start_ym > end_ym:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="'from' must not be after 'to'")
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        result = recompute_budget_chain(
+            cursor, start_ym, end_ym,
+            category_ids=[category_id] if category_id else None
+        )
+        return {
+            "from": f"{start_ym // 100}-{start_ym % 100:02d}",
+            "to": f"{end_ym // 100}-{end_ym % 100:02d}",
+            **result
+        }
+
 # ===== Recurring Payments (정기 결제) API =====
 
 @router.get("/recurring-payments", response_model=List[RecurringPaymentDetail])
-def get_recurring_payments(active_only: bool = Query(True, description="활성 항목만 조회")):
-    """정기 결제 목록 조회"""
+def get_recurring_payments(request: Request, active_only: bool = Query(True, description="활성 항목만 조회")):
+    """정기 결제 목록 조회 (원장 변경 전까지 캐시 + ETag)"""
+    return cached_json_response(
+        request, ("recurring-payments", active_only), List[RecurringPaymentDetail],
+        lambda: list_recurring_payments(active_only),
+    )
+
+def list_recurring_payments(active_only: bool = True) -> List[dict]:
+    """정기 결제 목록 (결제일, 이름 순)"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         where = "WHERE rp.is_active = TRUE" if active_only else ""
@@ -1475,6 +2561,17 @@ def get_recurring_payments(active_only: bool = Query(True, description="활성 
         """)
         return [dict(row) for row in cursor.fetchall()]
 
+@router.get("/recurring-payments/preview")
+def preview_recurring_payments(
+    through: Optional[date_type] = Query(None, description="확인할 마지막 날짜 (YYYY-MM-DD), 미지정시 오늘 (KST)")
+):
+    """다음 정기 결제 실행 시 등록될 건 미리 보기 (dry-run, 아무것도 쓰지 않음)
+
+    마지막 실행일부터 through까지 도래했지만 아직 실행 기록이 없는 결제 건을 날짜 순으로 반환한다.
+    """
+    with get_db_connection() as conn:
+        return run_recurring_payments(conn, through or kst_today(), dry_run=True)
+
 @router.post("/recurring-payments", response_model=RecurringPaymentDetail, status_code=status.HTTP_201_CREATED)
 def create_recurring_payment(payment: RecurringPaymentCreate):
     """정기 결제 등록"""
@@ -1559,14 +2656,14 @@ def delete_recurring_payment(payment_id: int):
         return {"message": f"Recurring payment '{row[1]}' deleted"}
 
 @router.put("/categories/{category_id}", response_model=AssetCategory)
+@invalidates_reference_cache
 def update_category(category_id: int, category: AssetCategoryUpdate):
     """카테고리 정보 수정"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
         # 카테고리 존재 확인
-        cursor.execute("SELECT id FROM asset_categories WHERE id = ?", (category_id,))
-        if not cursor.fetchone():
+        if category_id not in get_reference_data(cursor)["category_by_id"]:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Category with id {category_id} not found"
@@ -1603,8 +2700,101 @@ def _self_check():
     assert _apply_budget_cap(150, 100, 50) == 150   # under cap, unchanged
     assert _apply_budget_cap(30, 0, 30) == 0         # no default budget, rollover exists -> 0
     assert _apply_budget_cap(0, 0, 0) == 0           # no default budget, no rollover -> unchanged
+    assert _calculate_rollover(100, 1, True, 100, 40) == 30      # 50% of remaining 60
+    assert _calculate_rollover(100, 1, True, 300, 0) == 50       # capped at 50% of default
+    assert _calculate_rollover(100, 1, False, 100, 40) == 0      # rollover disabled
+    assert _calculate_rollover(100, 2, True, 100, 40) == 0       # only spend class rolls over
+    assert _calculate_rollover(100, 1, True, None, 0) == 0       # no previous budget
+    assert _resolve_budget_amount(100, 30, None) == 130
+    assert _resolve_budget_amount(100, 30, {"budget_amount": 130, "rollover_amount": 30}) is None
+    assert _resolve_budget_amount(100, 10, {"budget_amount": 150, "rollover_amount": 30}) == 130
+    assert _shift_ym(202501, -1) == 202412 and _shift_ym(202412, 1) == 202501
+    assert _shift_ym(202503, 14) == 202605
+    assert _ym_range(202411, 202502) == [202411, 202412, 202501, 202502]
+    assert _ym_label(202501) == "2025-01"
+    assert build_search_match('커피 스타벅스') == ('"스타벅스"', ['%커피%'])
+    assert build_search_match('a"bc') == ('"a""bc"', [])
+    assert build_search_match('  ') == (None, [])
+    assert build_search_match('5%') == (None, ['%5\\%%'])
+    assert decode_transaction_cursor(encode_transaction_cursor("2025-03-01", 42)) == ("2025-03-01", 42)
+    assert _etag_matches('"a", W/"b"', '"b"') and _etag_matches('*', '"a"')
+    assert not _etag_matches('"a"', '"b"') and not _etag_matches(None, '"a"')
+    _budget_chain_self_check()
+    _import_budget_self_check()
     print("asset_manager self-check passed")
 
 
+def _budget_chain_self_check():
+    """여러 달에 걸친 거래 수정 후 부분 재계산이 전체 재계산과 같은지 확인 (인메모리 DB)"""
+    import sqlite3
+    from utils.database import run_migrations, MIGRATIONS
+
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    run_migrations(conn, MIGRATIONS)
+    cursor = conn.cursor()
+    cursor.execute("UPDATE asset_categories SET default_budget = 100, rollover_enabled = TRUE WHERE id = 3")
+    cursor.execute("""
+        INSERT INTO assets (name, cost, class_id, category_id, tier_id, date)
+        VALUES ('점심', 20, 1, 3, 2, '2025-01-10')
+    """)
+    recompute_budget_chain(cursor, 202501, 202504, [3])
+
+    def budgets():
+        cursor.execute("""
+            SELECT month, budget_amount, rollover_amount FROM asset_budgets
+            WHERE category_id = 3 AND year = 2025 ORDER BY month
+        """)
+        return [tuple(row) for row in cursor.fetchall()]
+
+    assert budgets() == [(1, 100, 0), (2, 140, 40), (3, 150, 50), (4, 150, 50)]
+
+    # 1월 거래를 3월로 옮기고 금액 변경: 3월 이월액은 그대로(상한 50)지만 4월은 바뀌어야 함
+    cursor.execute("UPDATE assets SET date = '2025-03-10', cost = 140 WHERE id = 1")
+    refresh_budgets_after_change(cursor, [(3, "2025-01-10"), (3, "2025-03-10")])
+    assert budgets() == [(1, 100, 0), (2, 150, 50), (3, 150, 50), (4, 105, 5)]
+    assert recompute_budget_chain(cursor, 202502, 202504, [3])["updated"] == 0
+    conn.close()
+
+
+def _import_budget_self_check():
+    """여러 달에 걸친 일괄 등록 후 이후 달 예산이 모두 갱신되는지 확인 (임시 DB)"""
+    import shutil
+    import tempfile
+    from pathlib import Path
+    import utils.database as database
+
+    original_path, workdir = database.DB_PATH, Path(tempfile.mkdtemp())
+    database.DB_PATH = workdir / "import_self_check.db"
+    try:
+        database.init_database()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE asset_categories SET default_budget = 100, rollover_enabled = TRUE WHERE id = 3")
+            recompute_budget_chain(cursor, 202501, 202504, [3])
+
+        result = import_transactions([
+            {"name": "점심", "cost": 80, "date": "2025-01-10", "class_id": 1, "category_id": 3},
+            {"name": "회식", "cost": 140, "date": "2025-03-10", "class_id": 1, "category_id": 3},
+        ])
+        assert result["inserted"] == 2, result
+
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT month, budget_amount, rollover_amount FROM asset_budgets
+                WHERE category_id = 3 AND year = 2025 ORDER BY month
+            """)
+            # 3월 이월액은 그대로지만 3월 지출이 바뀌었으므로 4월까지 갱신되어야 함
+            assert [tuple(row) for row in cursor.fetchall()] == [
+                (1, 100, 0), (2, 110, 10), (3, 150, 50), (4, 105, 5)
+            ]
+            assert recompute_budget_chain(cursor, 202502, 202504, [3])["updated"] == 0
+    finally:
+        database.close_pool()
+        database.DB_PATH = original_path
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
 if __name__ == "__main__":
     _self_check()
@@ -5,7 +5,10 @@ from datetime import datetime, date, timedelta
 import calendar
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from utils.database import get_db_connection, resolve_tier_id
+from utils.database import get_db_connection, get_reference_data, rollup_date_filter
+from utils.ledger_snapshot import ledger_snapshot, snapshot_enabled
+from modules.asset_analytics import detect_anomalies
+from modules.recurring_payments import kst_today, run_recurring_payments
 
 
 def _prev_month(year: int, month: int) -> tuple:
@@ -22,27 +25,33 @@ def get_period_statistics(start_date: str, end_date: str) -> dict:
     with get_db_connection() as conn:
         cursor = conn.cursor()
 
-        def _sum(class_name):
-            cursor.execute("""
-                SELECT COALESCE(SUM(a.cost), 0)
-                FROM assets a JOIN asset_classes ac ON a.class_id = ac.id
-                WHERE ac.name = ? AND a.date BETWEEN ? AND ?
-            """, (class_name, start_date, end_date))
-            return cursor.fetchone()[0]
-
-        spend_total = _sum('spend')
-        earn_total  = _sum('earn')
-        save_total  = _sum('save')
-
-        cursor.execute("""
-            SELECT ac_cat.display_name, COALESCE(SUM(a.cost), 0) as total
-            FROM assets a
-            JOIN asset_classes ac       ON a.class_id    = ac.id
-            JOIN asset_categories ac_cat ON a.category_id = ac_cat.id
-            WHERE ac.name = 'spend' AND a.date BETWEEN ? AND ?
+        if snapshot_enabled():
+            return _snapshot_period_statistics(cursor, start_date, end_date)
+
+        # 일/월 집계 테이블에서 조회
+        rollup_table, conditions, params = rollup_date_filter(start_date, end_date)
+        where_clause = " AND ".join(conditions)
+
+        cursor.execute(f"""
+            SELECT ac.name, COALESCE(SUM(s.total_cost), 0)
+            FROM {rollup_table} s JOIN asset_classes ac ON s.class_id = ac.id
+            WHERE {where_clause}
+            GROUP BY ac.name
+        """, params)
+        class_totals = {row[0]: row[1] for row in cursor.fetchall()}
+        spend_total = class_totals.get('spend', 0)
+        earn_total  = class_totals.get('earn', 0)
+        save_total  = class_totals.get('save', 0)
+
+        cursor.execute(f"""
+            SELECT ac_cat.display_name, COALESCE(SUM(s.total_cost), 0) as total
+            FROM {rollup_table} s
+            JOIN asset_classes ac        ON s.class_id    = ac.id
+            JOIN asset_categories ac_cat ON s.category_id = ac_cat.id
+            WHERE ac.name = 'spend' AND {where_clause}
             GROUP BY ac_cat.id
             ORDER BY total DESC
-        """, (start_date, end_date))
+        """, params)
         categories = [{"name": row[0], "total": row[1]} for row in cursor.fetchall()]
 
         return {
@@ -54,6 +63,66 @@ def get_period_statistics(start_date: str, end_date: str) -> dict:
         }
 
 
+def _snapshot_period_statistics(cursor, start_date: str, end_date: str) -> dict:
+    """get_period_statistics와 같은 결과를 열 지향 스냅샷의 배열 연산으로 계산합니다."""
+    refs = get_reference_data(cursor)
+    columns = ledger_snapshot.get(cursor)
+    in_period = columns.mask(start=start_date, end=end_date)
+
+    class_ids, _, class_sums = columns.group_sum("class_id", in_period)
+    class_totals = {refs["class_by_id"][cid]["name"]: total
+                    for cid, total in zip(class_ids.tolist(), class_sums.tolist()) if cid in refs["class_by_id"]}
+    spend_total = class_totals.get('spend', 0)
+    earn_total  = class_totals.get('earn', 0)
+    save_total  = class_totals.get('save', 0)
+
+    spend = in_period & (columns.class_id == refs["class_ids_by_name"]["spend"])
+    category_ids, _, category_sums = columns.group_sum("category_id", spend)
+    categories = [
+        {"name": refs["category_by_id"][cid]["display_name"], "total": total}
+        for cid, total in zip(category_ids.tolist(), category_sums.tolist()) if cid in refs["category_by_id"]
+    ]
+    categories.sort(key=lambda c: c["total"], reverse=True)
+
+    return {
+        "earn_total":  earn_total,
+        "spend_total": spend_total,
+        "save_total":  save_total,
+        "balance":     earn_total - spend_total - save_total,
+        "categories":  categories,
+    }
+
+
+def get_spend_anomalies(start_date: str, end_date: str, limit: int = 6) -> list:
+    """기간 내 지출 이상 징후를 점수 큰 순으로 반환합니다 (같은 날 같은 카테고리는 한 번만)."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        spend_id = get_reference_data(cursor)["class_ids_by_name"]["spend"]
+        result = detect_anomalies(cursor, spend_id, date.fromisoformat(start_date), date.fromisoformat(end_date))
+
+    anomalies, seen = [], set()
+    for a in result["anomalies"]:
+        if (a["category_id"], a["date"]) in seen:
+            continue
+        seen.add((a["category_id"], a["date"]))
+        anomalies.append(a)
+    return anomalies[:limit]
+
+
+def _format_anomalies(anomalies: list) -> str:
+    """이상 징후 목록을 프롬프트용 텍스트로 변환합니다."""
+    lines = []
+    for a in anomalies:
+        if a["type"] == "level_shift":
+            lines.append(f"  - {a['date']}부터 {a['category_name']}: 일평균 {a['before_avg']:,.0f}원 → "
+                         f"{a['after_avg']:,.0f}원 (수준 변화 점수 {a['score']:+.1f})")
+        else:
+            basis = "최근 28일 평균" if a["type"] == "zscore" else "평소 거래일 중앙값"
+            lines.append(f"  - {a['date']} {a['category_name']}: {a['amount']:,.0f}원 "
+                         f"({basis} {a['expected']:,.0f}원, 점수 {a['score']:+.1f})")
+    return "\n".join(lines) or "  (없음)"
+
+
 # ── Discord 전송 헬퍼 ───────────────────────────────────────────────────────
 
 def _send_discord_chunked(webhook_url: str, content: str, username: str = "AI 재무비서"):
@@ -219,13 +288,16 @@ def generate_monthly_report(year: int, month: int, send_discord: bool = True) ->
     if spend_diff_pct is not None:
         comparison_text += f" ({spend_diff_pct:+.1f}%)"
 
+    anomalies_text = _format_anomalies(get_spend_anomalies(start, end))
+
     prompt = f"""아래 데이터를 바탕으로 {year}년 {month}월 월간 지출 리포트를 Discord 메시지로 작성하세요.
 
 작성 규칙:
 - 지출 항목만 다룰 것. 수입·저축·응원·격려 문구는 포함하지 말 것.
 - 총 지출액과 카테고리별 금액·비중을 명시할 것
 - 저번 달의 지출과 비교하여 증감 추이를 언급할 것
-- 지출 패턴에서 눈에 띄는 점(비중이 큰 항목, 이례적 지출 등)을 간략히 분석할 것
+- 지출 패턴에서 눈에 띄는 점(비중이 큰 항목 등)을 간략히 분석할 것
+- 이례적 지출은 아래 '통계적 이상 징후'에 있는 항목만 근거로 언급할 것 (없으면 언급하지 말 것)
 - 이모지와 마크다운 사용, 600자 이내
 
 데이터:
@@ -234,7 +306,10 @@ def generate_monthly_report(year: int, month: int, send_discord: bool = True) ->
 {cats_text}
 
 전월 비교:
-{comparison_text}"""
+{comparison_text}
+
+통계적 이상 징후 (점수 큰 순, 점수는 평소 대비 표준편차 단위):
+{anomalies_text}"""
 
     try:
         content = _call_llm(prompt, f"{year}-{month:02d} 월간")
@@ -392,88 +467,40 @@ def send_monthly_report_to_discord():
 
 # ── 정기결제 자동 처리 ─────────────────────────────────────────────────────
 
-def process_recurring_payments():
+def process_recurring_payments(through: date = None):
     """
-    매일 KST 정오(12:00)에 실행.
-    오늘 날짜가 정기 결제일인 항목을 자동으로 assets에 등록하고 Discord로 알림 전송.
+    매일 KST 정오(12:00)에 실행 (서버 시작 시에도 어제까지 한 번 따라잡음).
+    마지막 성공 실행일부터 through(기본: 오늘 KST)까지 도래한 정기 결제를 모두 assets에 등록하고
+    Discord로 알림 전송. 서버가 꺼져 있던 날의 결제도 이때 함께 등록된다.
     월말(28~31일) 처리: 해당 월에 그 날이 없으면 말일에 실행.
     """
     webhook_url = os.getenv("DISCORD_WEBHOOK_URL", "").strip()
-    kst_today = (datetime.utcnow() + timedelta(hours=9)).date()
+    through = through or kst_today()
 
-    year  = kst_today.year
-    month = kst_today.month
-    day   = kst_today.day
-    last_day_of_month = calendar.monthrange(year, month)[1]
-
-    print(f"[RecurringPayment] Checking recurring payments for KST date: {kst_today}")
+    print(f"[RecurringPayment] Checking recurring payments through KST date: {through}")
 
     try:
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                SELECT rp.id, rp.name, rp.cost, rp.class_id, rp.category_id,
-                       rp.sub_category_id, rp.tier_id, rp.day_of_month, rp.description
-                FROM recurring_payments rp
-                WHERE rp.is_active = TRUE
-                  AND (
-                      rp.day_of_month = ?
-                      OR (rp.day_of_month > ? AND ? = ?)
-                  )
-            """, (day, last_day_of_month, day, last_day_of_month))
-
-            payments = cursor.fetchall()
-
-            if not payments:
-                print(f"[RecurringPayment] No recurring payments scheduled for today ({kst_today}).")
-                return
-
-            executed = []
-
-            for p in payments:
-                p = dict(p)
-                payment_id = p['id']
-                executed_date_str = kst_today.isoformat()
-
-                cursor.execute("""
-                    SELECT id FROM recurring_payment_logs
-                    WHERE recurring_payment_id = ? AND executed_date = ?
-                """, (payment_id, executed_date_str))
-                if cursor.fetchone():
-                    print(f"[RecurringPayment] Already executed today: {p['name']} (id={payment_id})")
-                    continue
-
-                tier_id = resolve_tier_id(cursor, p['tier_id'], p['sub_category_id'], p['category_id'])
-
-                cursor.execute("""
-                    INSERT INTO assets (name, cost, class_id, category_id, sub_category_id, tier_id, date, description)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    p['name'], p['cost'], p['class_id'], p['category_id'],
-                    p['sub_category_id'], tier_id, executed_date_str,
-                    p['description'] or "정기결제 자동등록"
-                ))
-                asset_id = cursor.lastrowid
-
-                cursor.execute("""
-                    INSERT INTO recurring_payment_logs (recurring_payment_id, executed_date, asset_id)
-                    VALUES (?, ?, ?)
-                """, (payment_id, executed_date_str, asset_id))
-
-                executed.append(p)
-                print(f"[RecurringPayment] Registered: {p['name']} / {p['cost']:,.0f}원 (asset_id={asset_id})")
-
-        if executed and webhook_url:
-            lines = [f"💳 **정기결제 자동등록** ({kst_today.strftime('%Y-%m-%d')})\n"]
-            total = 0
+            result = run_recurring_payments(conn, through)
+
+        executed = result["occurrences"]
+        if not executed:
+            print(f"[RecurringPayment] No recurring payments due ({result['start_date']} ~ {result['end_date']}).")
+            return
+        for p in executed:
+            print(f"[RecurringPayment] Registered: {p['name']} / {p['cost']:,.0f}원 "
+                  f"({p['date']}, asset_id={p['asset_id']})")
+
+        if webhook_url:
+            period = result["end_date"] if result["start_date"] == result["end_date"] \
+                else f"{result['start_date']} ~ {result['end_date']}"
+            lines = [f"💳 **정기결제 자동등록** ({period})\n"]
             for p in executed:
-                lines.append(f"• **{p['name']}** — {p['cost']:,.0f}원")
-                total += p['cost']
-            lines.append(f"\n💰 합계: **{total:,.0f}원**")
+                day = "" if p['date'] == result["end_date"] else f" ({p['date']})"
+                lines.append(f"• **{p['name']}** — {p['cost']:,.0f}원{day}")
+            lines.append(f"\n💰 합계: **{result['total_cost']:,.0f}원**")
             try:
-                res = requests.post(webhook_url, json={"username": "자산관리봇", "content": "\n".join(lines)})
-                res.raise_for_status()
+                _send_discord_chunked(webhook_url, "\n".join(lines), username="자산관리봇")
                 print(f"[RecurringPayment] Discord notification sent ({len(executed)} items).")
             except Exception as e:
                 print(f"[RecurringPayment] Discord notification failed: {e}")
@@ -503,6 +530,14 @@ def init_scheduler():
         replace_existing=True
     )
 
+    # 꺼져 있던 동안 놓친 결제를 시작하자마자 따라잡음 (오늘 결제는 정오 실행에 맡김)
+    scheduler.add_job(
+        process_recurring_payments,
+        kwargs={"through": kst_today() - timedelta(days=1)},
+        id='recurring_payment_catch_up',
+        replace_existing=True
+    )
+
     scheduler.start()
     print("[Report] Monthly report scheduler initialized.")
     print("[RecurringPayment] Recurring payment scheduler initialized (KST 12:00 daily).")
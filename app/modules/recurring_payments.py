@@ -0,0 +1,219 @@
+"""
+정기 결제 실행 엔진
+마지막 성공 실행일(recurring_payment_state)부터 기준일까지 도래한 모든 결제 건을 계산해
+이미 기록된 건(recurring_payment_logs)을 한 번의 조회로 제외하고, 거래와 실행 기록을
+executemany로 한꺼번에 넣는다. 서버가 꺼져 있던 날의 결제도 다음 실행에서 등록된다.
+
+결제일이 그 달에 없으면(예: 31일 결제의 4월) 말일에 실행한다.
+"""
+import calendar
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from utils.database import resolve_tier_id, reserve_asset_ids, SQL_IN_CHUNK
+
+DEFAULT_DESCRIPTION = "정기결제 자동등록"
+CATCH_UP_MAX_DAYS = 366  # 오래 꺼져 있었더라도 이 일수보다 이전 결제는 만들지 않음
+KST_OFFSET = timedelta(hours=9)
+
+
+def kst_today() -> date:
+    return (datetime.utcnow() + KST_OFFSET).date()
+
+
+def due_dates(day_of_month: int, start: date, end: date) -> List[date]:
+    """start~end(양끝 포함) 중 day_of_month 결제일 (그 달에 없는 날이면 말일)"""
+    dates = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        due = date(year, month, min(day_of_month, calendar.monthrange(year, month)[1]))
+        if start <= due <= end:
+            dates.append(due)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return dates
+
+
+def get_last_run_date(cursor) -> Optional[date]:
+    cursor.execute("SELECT last_run_date FROM recurring_payment_state WHERE id = 1")
+    row = cursor.fetchone()
+    return date.fromisoformat(row[0]) if row and row[0] else None
+
+
+def catch_up_start(last_run: Optional[date], through: date) -> date:
+    """이번 실행에서 확인할 첫 날짜
+
+    마지막 실행일 당일도 다시 확인한다 (그날 실행 뒤에 추가된 결제를 잡고, 중복은 실행 기록으로 거름).
+    기록이 없으면(첫 실행) 기준일 하루만 처리한다.
+    """
+    start = min(last_run, through) if last_run else through
+    return max(start, through - timedelta(days=CATCH_UP_MAX_DAYS))
+
+
+def plan_recurring_payments(cursor, start: date, end: date) -> List[dict]:
+    """start~end에 도래했지만 아직 실행 기록이 없는 결제 건 (날짜, 결제 ID 순)
+
+    결제 등록일(KST) 이전 날짜는 만들지 않는다.
+    """
+    cursor.execute("""
+        SELECT id, name, cost, class_id, category_id, sub_category_id, tier_id,
+               day_of_month, description, DATE(created_at, '+9 hours') as created_date
+        FROM recurring_payments
+        WHERE is_active = TRUE
+    """)
+    payments = cursor.fetchall()
+    if not payments:
+        return []
+
+    # 기간 내 기존 실행 기록을 한 번에 조회 (UNIQUE(recurring_payment_id, executed_date) 인덱스 사용)
+    executed = set()
+    payment_ids = [p['id'] for p in payments]
+    for i in range(0, len(payment_ids), SQL_IN_CHUNK):
+        chunk = payment_ids[i:i + SQL_IN_CHUNK]
+        cursor.execute(f"""
+            SELECT recurring_payment_id, executed_date FROM recurring_payment_logs
+            WHERE recurring_payment_id IN ({",".join("?" * len(chunk))})
+              AND executed_date BETWEEN ? AND ?
+        """, chunk + [start.isoformat(), end.isoformat()])
+        executed.update((row[0], row[1]) for row in cursor.fetchall())
+
+    occurrences = []
+    for p in payments:
+        first = max(start, date.fromisoformat(p['created_date'])) if p['created_date'] else start
+        tier_id = resolve_tier_id(cursor, p['tier_id'], p['sub_category_id'], p['category_id'])
+        for due in due_dates(p['day_of_month'], first, end):
+            if (p['id'], due.isoformat()) in executed:
+                continue
+            occurrences.append({
+                "recurring_payment_id": p['id'],
+                "name": p['name'],
+                "cost": p['cost'],
+                "class_id": p['class_id'],
+                "category_id": p['category_id'],
+                "sub_category_id": p['sub_category_id'],
+                "tier_id": tier_id,
+                "date": due.isoformat(),
+                "description": p['description'] or DEFAULT_DESCRIPTION,
+            })
+    occurrences.sort(key=lambda o: (o["date"], o["recurring_payment_id"]))
+    return occurrences
+
+
+def apply_recurring_payments(cursor, occurrences: List[dict]) -> List[dict]:
+    """결제 건을 거래와 실행 기록으로 저장하고 asset_id를 채워 반환
+
+    쓰기 트랜잭션 안에서 reserve_asset_ids로 id를 직접 지정하므로
+    executemany로 넣어도 실행 기록이 가리킬 거래 id를 알 수 있다.
+    지난 달 결제를 따라잡았을 수 있으므로 다른 거래 쓰기 경로처럼 이후 달 예산 이월도 다시 계산한다.
+    """
+    # asset_manager가 이 모듈을 import하므로 함수 안에서 import
+    from modules.asset_manager import refresh_budgets_after_change
+
+    if not occurrences:
+        return []
+    asset_ids = reserve_asset_ids(cursor, len(occurrences))
+    applied = [{**o, "asset_id": asset_id} for asset_id, o in zip(asset_ids, occurrences)]
+    cursor.executemany("""
+        INSERT INTO assets (id, name, cost, class_id, category_id, sub_category_id, tier_id, date, description)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (o['asset_id'], o['name'], o['cost'], o['class_id'], o['category_id'],
+         o['sub_category_id'], o['tier_id'], o['date'], o['description'])
+        for o in applied
+    ])
+    cursor.executemany("""
+        INSERT INTO recurring_payment_logs (recurring_payment_id, executed_date, asset_id)
+        VALUES (?, ?, ?)
+    """, [(o['recurring_payment_id'], o['date'], o['asset_id']) for o in applied])
+    refresh_budgets_after_change(cursor, {(o['category_id'], o['date']) for o in applied})
+    return applied
+
+
+def run_recurring_payments(conn, through: Optional[date] = None, dry_run: bool = False) -> dict:
+    """마지막 실행일부터 through(기본: 오늘 KST)까지의 정기 결제 처리
+
+    dry_run이면 등록할 건만 계산하고 아무것도 쓰지 않는다. 실제 실행은 쓰기 잠금을 먼저 잡아
+    (BEGIN IMMEDIATE) 계획과 저장 사이에 다른 실행이 끼어들지 않게 하고, 끝나면 마지막 실행일을 갱신한다.
+    """
+    through = through or kst_today()
+    if not dry_run and not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    cursor = conn.cursor()
+    last_run = get_last_run_date(cursor)
+    start = catch_up_start(last_run, through)
+    occurrences = plan_recurring_payments(cursor, start, through)
+
+    if not dry_run:
+        occurrences = apply_recurring_payments(cursor, occurrences)
+        cursor.execute("""
+            UPDATE recurring_payment_state SET last_run_date = MAX(COALESCE(last_run_date, ''), ?) WHERE id = 1
+        """, (through.isoformat(),))
+
+    return {
+        "last_run_date": last_run.isoformat() if last_run else None,
+        "start_date": start.isoformat(),
+        "end_date": through.isoformat(),
+        "dry_run": dry_run,
+        "count": len(occurrences),
+        "total_cost": sum(o["cost"] for o in occurrences),
+        "occurrences": occurrences,
+    }
+
+
+def _self_check():
+    assert due_dates(31, date(2025, 1, 15), date(2025, 4, 30)) == [
+        date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30)
+    ]
+    assert due_dates(10, date(2025, 1, 11), date(2025, 2, 9)) == []
+    assert due_dates(1, date(2024, 12, 1), date(2025, 1, 1)) == [date(2024, 12, 1), date(2025, 1, 1)]
+    assert catch_up_start(None, date(2025, 3, 10)) == date(2025, 3, 10)
+    assert catch_up_start(date(2020, 1, 1), date(2025, 3, 10)) == date(2024, 3, 9)
+
+    import sqlite3
+    import utils.database as database
+
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    database.run_migrations(conn, database.MIGRATIONS)
+    conn.execute("""
+        INSERT INTO recurring_payments (name, cost, class_id, category_id, day_of_month, created_at)
+        VALUES ('구독', 10000, 1, 1, 31, '2025-01-01 00:00:00'), ('월세', 500000, 1, 2, 5, '2025-03-01 00:00:00')
+    """)
+    conn.commit()
+
+    first = run_recurring_payments(conn, date(2025, 3, 10))
+    conn.commit()
+    assert first["start_date"] == "2025-03-10" and first["count"] == 0   # 첫 실행은 당일만
+
+    # 따라잡기 전에 3~5월 예산을 만들어 둠 (구독 카테고리: 기본 예산 100000, 이월 사용)
+    from modules.asset_manager import recompute_budget_chain
+    conn.execute("UPDATE asset_categories SET default_budget = 100000, rollover_enabled = TRUE WHERE id = 1")
+    recompute_budget_chain(conn.cursor(), 202503, 202505, [1])
+    conn.commit()
+
+    preview = run_recurring_payments(conn, date(2025, 5, 6), dry_run=True)
+    assert [(o["name"], o["date"]) for o in preview["occurrences"]] == [
+        ("구독", "2025-03-31"), ("월세", "2025-04-05"), ("구독", "2025-04-30"), ("월세", "2025-05-05")
+    ]
+    assert conn.execute("SELECT COUNT(*) FROM assets").fetchone()[0] == 0
+
+    applied = run_recurring_payments(conn, date(2025, 5, 6))
+    conn.commit()
+    assert applied["count"] == 4 and applied["total_cost"] == 1020000
+    logged = conn.execute("""
+        SELECT COUNT(*) FROM recurring_payment_logs l JOIN assets a ON a.id = l.asset_id
+        WHERE a.date = l.executed_date
+    """).fetchone()[0]
+    assert logged == 4 and get_last_run_date(conn.cursor()) == date(2025, 5, 6)
+    # 3월 31일 결제가 뒤늦게 들어갔으므로 4월 이월액은 (100000 - 10000) * 0.5
+    april = conn.execute("""
+        SELECT budget_amount, rollover_amount FROM asset_budgets WHERE category_id = 1 AND year = 2025 AND month = 4
+    """).fetchone()
+    assert tuple(april) == (145000, 45000)
+    assert recompute_budget_chain(conn.cursor(), 202504, 202505, [1])["updated"] == 0
+    assert run_recurring_payments(conn, date(2025, 5, 6))["count"] == 0          # 같은 날 재실행은 중복 없음
+    conn.close()
+    print("recurring_payments self-check passed")
+
+
+if __name__ == "__main__":
+    _self_check()
@@ -0,0 +1,286 @@
+"""
+asset-manager 성능 측정 스크립트
+크기별 임시 DB에 fixture 원장을 채우고, FastAPI 앱을 TestClient로 프로세스 안에서 호출해
+엔드포인트별 p50/p95 응답 시간과 요청당 SQL 실행 수를 측정한다. 원장 버전 캐시를 비운 cold 호출
+(실제 계산과 SQL 비용)과 캐시가 찬 warm 호출(운영 중 반복 조회)을 따로 기록한다.
+결과는 JSON 기준값(baseline)으로 저장하고, 다음 실행에서 기준값보다 느려지거나
+쿼리 수가 늘어난 엔드포인트를 회귀로 표시한다 (회귀가 있으면 exit code 1).
+
+사용법 (app 디렉토리에서):
+    python utils/benchmark.py --sizes 10000,100000 --save-baseline   # 기준값 저장
+    python utils/benchmark.py --sizes 10000,100000                   # 기준값과 비교
+"""
+import argparse
+import json
+import math
+import platform
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import utils.database as database
+from utils.generate_dummy_data import generate_ledger
+from utils.ledger_snapshot import LedgerSnapshot
+from utils.query_plans import capture_queries
+
+# 결과를 비교할 수 있도록 fixture 원장의 기간은 고정
+FIXTURE_END = date(2025, 12, 31)
+FIXTURE_YEARS = 2
+
+
+def seed_transactions(rows: int, seed: int = 42) -> dict:
+    """FIXTURE_END까지 FIXTURE_YEARS년에 걸쳐 약 rows건의 원장 생성"""
+    tx_per_day = rows / (FIXTURE_YEARS * 365)
+    return generate_ledger(years=FIXTURE_YEARS, tx_per_day=tx_per_day, seed=seed, end=FIXTURE_END)
+
+
+# 측정할 엔드포인트: 이름 -> (경로, 파라미터). 날짜는 fixture 기간(FIXTURE_END 기준) 안쪽
+ENDPOINTS = {
+    "transactions": ("/transactions", {"limit": 100}),
+    "transactions?class_id": ("/transactions", {"class_id": 1, "limit": 100}),
+    "transactions?range": ("/transactions", {"start_date": "2025-10-01", "end_date": "2025-12-31"}),
+    "statistics/period": ("/statistics/period", {"class_id": 1}),
+    "statistics/period?range": ("/statistics/period", {"class_id": 1, "start_date": "2025-01-05", "end_date": "2025-12-20"}),
+    "statistics/monthly": ("/statistics/monthly", {"year": 2025, "month": 12}),
+    "statistics/period-comparison?day": ("/statistics/period-comparison", {"unit": "day", "periods": 8, "end_date": "2025-12-31"}),
+    "statistics/period-comparison?week": ("/statistics/period-comparison", {"unit": "week", "periods": 8, "end_date": "2025-12-31"}),
+    "statistics/period-comparison?month": ("/statistics/period-comparison", {"unit": "month", "periods": 8, "end_date": "2025-12-31"}),
+    "statistics/period-comparison?year": ("/statistics/period-comparison", {"unit": "year", "periods": 2, "end_date": "2025-12-31"}),
+    "statistics/tags": ("/statistics/tags", {"start": "2025-01", "end": "2025-12"}),
+    "statistics/daily": ("/statistics/daily", {"year": 2025, "month": 12}),
+    "statistics/trend": ("/statistics/trend", {"from": "2024-01", "to": "2025-12", "group": "category"}),
+    "statistics/flows": ("/statistics/flows", {"start_date": "2025-10-01", "end_date": "2025-12-31"}),
+    "analytics/anomalies": ("/analytics/anomalies", {"start": "2025-12-01", "end": "2025-12-31"}),
+    "analytics/forecast": ("/analytics/forecast", {"year": 2025, "month": 12}),
+    "budgets": ("/budgets", {"year": 2025, "month": 12}),
+    "search?trigram": ("/search", {"query": "스타벅스"}),
+    "search?short": ("/search", {"query": "택시"}),
+}
+
+# 회귀 판정: p50이 기준값의 REGRESSION_RATIO배를 넘고 그 차이가 REGRESSION_FLOOR_MS 이상일 때
+# (p95는 반복 횟수가 적으면 한두 번의 튐에 좌우되므로 기록만 하고 판정에는 p50을 씀)
+REGRESSION_RATIO = 1.5
+REGRESSION_FLOOR_MS = 5.0
+BASELINE_PATH = Path(__file__).resolve().parent / "benchmark_baseline.json"
+
+
+def percentile(values: list, pct: float) -> float:
+    """nearest-rank 백분위수"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def measure(func, repeat: int = 5, setup=None) -> dict:
+    """func를 repeat번 실행한 응답 시간의 p50/p95 (ms). setup은 매번 시간 측정 밖에서 먼저 실행"""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"p50_ms": round(percentile(timings, 50), 3), "p95_ms": round(percentile(timings, 95), 3)}
+
+
+def count_queries(func) -> int:
+    """func 한 번 실행 동안 앱이 실행한 SQL 문 수 (연결 PRAGMA/트랜잭션 제어/내부 문 제외)"""
+    with capture_queries() as statements:
+        func()
+    skipped = ("PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "--")
+    return sum(1 for sql in statements if not sql.lstrip().upper().startswith(skipped))
+
+
+def clear_ledger_caches():
+    """원장 버전 캐시(계산 결과/응답 본문)를 비워 다음 호출이 실제로 계산하게 함"""
+    database.ledger_cache.clear()
+    database.response_cache.clear()
+
+
+def bench_endpoints(client, repeat: int) -> dict:
+    """ENDPOINTS 각각의 {"cold": ..., "warm": ...} p50/p95와 쿼리 수
+
+    먼저 한 번 호출해 예산 자동 생성 같은 첫 조회의 쓰기를 끝낸 뒤,
+    cold는 매번 원장 버전 캐시를 비우고, warm은 캐시가 찬 상태로 쿼리 수를 세고 시간을 잰다.
+    """
+    results = {}
+    for name, (path, params) in ENDPOINTS.items():
+        def call():
+            response = client.get("/asset-manager" + path, params=params)
+            assert response.status_code == 200, f"{name}: {response.status_code} {response.text[:200]}"
+
+        call()
+        cold = measure(call, repeat, setup=clear_ledger_caches)
+        clear_ledger_caches()
+        cold["queries"] = count_queries(call)
+        warm = {**measure(call, repeat), "queries": count_queries(call)}
+        results[name] = {"cold": cold, "warm": warm}
+        print(f"  {name:<36} cold p50 {cold['p50_ms']:8.2f} ms  p95 {cold['p95_ms']:8.2f} ms  "
+              f"queries {cold['queries']:3d}  | warm p50 {warm['p50_ms']:8.2f} ms  queries {warm['queries']:3d}")
+    return results
+
+
+def find_regressions(baseline: dict, current: dict) -> list:
+    """기준값 대비 느려졌거나 쿼리 수가 늘어난 (크기, 엔드포인트, 사유) 목록"""
+    regressions = []
+    for size, endpoints in current.items():
+        for name, modes in endpoints.items():
+            for mode, result in modes.items():
+                base = baseline.get(size, {}).get(name, {}).get(mode)
+                if not base:
+                    continue
+                label = f"{name} ({mode})"
+                if result["queries"] > base["queries"]:
+                    regressions.append((size, label, f"queries {base['queries']} -> {result['queries']}"))
+                slower = result["p50_ms"] - base["p50_ms"]
+                if result["p50_ms"] > base["p50_ms"] * REGRESSION_RATIO and slower >= REGRESSION_FLOOR_MS:
+                    regressions.append((size, label, f"p50 {base['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms "
+                                                     f"(p95 {base['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms)"))
+    return regressions
+
+
+# 같은 결과(한 달치 상위 지출 5건)를 날짜 식으로 거를 때(v10 이전: 쓸 인덱스 없음)와 ym 인덱스로 찾을 때
+MONTH_TOP_QUERIES = {
+    "strftime(date)": """
+        SELECT id FROM assets
+        WHERE +class_id = ? AND CAST(strftime('%Y%m', date) AS INTEGER) = ?
+        ORDER BY cost DESC, id DESC LIMIT 5
+    """,
+    "ym": """
+        SELECT id FROM assets
+        WHERE class_id = ? AND ym = ?
+        ORDER BY cost DESC, id DESC LIMIT 5
+    """,
+}
+
+
+def bench_query_plans(repeat: int):
+    """월 단위 조회의 실행 계획(SCAN/SEARCH)과 응답 시간 비교"""
+    with database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM asset_classes WHERE name = 'spend'")
+        spend_id = cursor.fetchone()[0]
+        params = (spend_id, FIXTURE_END.year * 100 + FIXTURE_END.month)
+
+        results = []
+        for label, sql in MONTH_TOP_QUERIES.items():
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = " / ".join(row[3] for row in cursor.fetchall())
+            timing = measure(lambda: cursor.execute(sql, params).fetchall(), repeat)
+            results.append(cursor.execute(sql, params).fetchall())
+            print(f"  month top-5 by {label:<15}: {timing['p50_ms']:8.2f} ms  [{plan}]")
+        assert results[0] == results[1]
+
+
+def bench_snapshot(repeat: int):
+    """같은 기간 집계/상위 N건을 SQL(assets)과 열 지향 스냅샷으로 계산한 시간 비교"""
+    start, end = "2025-01-01", "2025-12-31"
+    with database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        spend_id = database.get_reference_data(cursor)["class_ids_by_name"]["spend"]
+        snapshot = LedgerSnapshot()
+        started = time.perf_counter()
+        columns = snapshot.get(cursor)
+        print(f"  snapshot load ({len(columns):,} rows): {(time.perf_counter() - started) * 1000:8.2f} ms")
+
+        group_sql = """
+            SELECT category_id, COUNT(*), SUM(cost) FROM assets
+            WHERE date BETWEEN ? AND ? AND class_id = ? GROUP BY category_id
+        """
+        top_sql = """
+            SELECT id FROM assets WHERE date BETWEEN ? AND ? AND class_id = ?
+            ORDER BY cost DESC, id DESC LIMIT 5
+        """
+        params = (start, end, spend_id)
+
+        def group_snapshot():
+            return columns.group_sum("category_id", columns.mask(start=start, end=end, class_id=spend_id))
+
+        def top_snapshot():
+            return columns.id[columns.top_n(5, columns.mask(start=start, end=end, class_id=spend_id))].tolist()
+
+        keys, counts, totals = group_snapshot()
+        assert sorted(tuple(r) for r in cursor.execute(group_sql, params).fetchall()) == \
+            list(zip(keys.tolist(), counts.tolist(), totals.tolist()))
+        assert [r[0] for r in cursor.execute(top_sql, params).fetchall()] == top_snapshot()
+        for label, func in (("category group-by (SQL)", lambda: cursor.execute(group_sql, params).fetchall()),
+                            ("category group-by (snapshot)", group_snapshot),
+                            ("top-5 (SQL)", lambda: cursor.execute(top_sql, params).fetchall()),
+                            ("top-5 (snapshot)", top_snapshot)):
+            print(f"  {label:<30}: {measure(func, repeat)['p50_ms']:8.3f} ms")
+
+
+def _self_check():
+    assert percentile([5, 1, 3, 2, 4], 50) == 3
+    assert percentile(list(range(1, 21)), 95) == 19
+    base = {"1000": {"a": {"cold": {"p50_ms": 10.0, "p95_ms": 20.0, "queries": 3},
+                           "warm": {"p50_ms": 1.0, "p95_ms": 2.0, "queries": 1}}}}
+    same_warm = {"p50_ms": 1.0, "p95_ms": 2.0, "queries": 1}
+    assert find_regressions(base, {"1000": {"a": {"cold": {"p50_ms": 11.0, "p95_ms": 90.0, "queries": 3},
+                                                  "warm": same_warm}}}) == []
+    assert len(find_regressions(base, {"1000": {"a": {"cold": {"p50_ms": 20.0, "p95_ms": 30.0, "queries": 4},
+                                                      "warm": same_warm}}})) == 2
+    assert find_regressions(base, {"1000": {"a": {"cold": base["1000"]["a"]["cold"],
+                                                  "warm": {"p50_ms": 1.0, "p95_ms": 2.0, "queries": 2}}}}) == \
+        [("1000", "a (warm)", "queries 1 -> 2")]
+    assert find_regressions(base, {"5000": {"a": {"cold": same_warm, "warm": same_warm}}}) == []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="asset-manager API 벤치마크")
+    parser.add_argument("--sizes", default="10000,100000", help="DB 크기 목록 (거래 수, 쉼표 구분)")
+    parser.add_argument("--repeat", type=int, default=20, help="엔드포인트별 측정 반복 횟수")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="기준값 JSON 경로")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준값으로 저장")
+    args = parser.parse_args()
+
+    _self_check()
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from modules import asset_manager
+
+    app = FastAPI()
+    app.include_router(asset_manager.router)
+    client = TestClient(app)
+
+    workdir = Path(tempfile.mkdtemp())
+    results = {}
+    for size in [int(s) for s in args.sizes.split(",")]:
+        database.DB_PATH = workdir / f"benchmark_{size}.db"
+        database.init_database()
+        started = time.perf_counter()
+        summary = seed_transactions(size)
+        print(f"\n[{size:,}] {summary['assets']:,}건 생성: {time.perf_counter() - started:.1f}s")
+        results[str(size)] = bench_endpoints(client, args.repeat)
+    bench_query_plans(args.repeat)
+    bench_snapshot(args.repeat)
+    database.close_pool()
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": database.sqlite3.sqlite_version,
+            "repeat": args.repeat,
+            "results": results,
+        }, ensure_ascii=False, indent=2) + "\n")
+        print(f"\n기준값 저장: {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"\n기준값 없음 ({args.baseline}) - --save-baseline으로 먼저 저장")
+        return
+    regressions = find_regressions(json.loads(args.baseline.read_text())["results"], results)
+    for size, name, reason in regressions:
+        print(f"  [REGRESSION] {size:>8} {name}: {reason}")
+    if regressions:
+        sys.exit(1)
+    print("\n기준값 대비 회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
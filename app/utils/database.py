@@ -1,6 +1,12 @@
+import functools
+import os
+import queue
 import sqlite3
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from contextlib import contextmanager
+from datetime import date as date_type, timedelta
 from typing import Optional
 
 # 데이터베이스 파일 경로
@@ -8,19 +14,156 @@ DB_DIR = Path(__file__).parent.parent / "data"
 DB_DIR.mkdir(exist_ok=True)
 DB_PATH = DB_DIR / "assets.db"
 
+# 연결 풀 설정 (환경변수로 조정 가능)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+
+# 연결마다 적용할 PRAGMA (WAL + 읽기 성능 튜닝)
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -16000",      # 약 16MB 페이지 캐시
+    "PRAGMA mmap_size = 268435456",    # 256MB 메모리 맵 I/O
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    """PRAGMA가 적용된 새 SQLite 연결 생성"""
+    conn = sqlite3.connect(str(db_path), check_same_thread=False)
+    conn.row_factory = sqlite3.Row  # 딕셔너리처럼 접근 가능하게
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    """스레드 간 공유되는 SQLite 연결 풀
+
+    최대 max_size개의 연결을 열어 두고 재사용한다. 모든 연결이 사용 중이면
+    대기하지 않고 임시(overflow) 연결을 열었다가 반납 시 닫는다.
+    """
+
+    def __init__(self, db_path: Path, max_size: int = DB_POOL_SIZE):
+        self.db_path = db_path
+        self.max_size = max_size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._pooled = set()
+        self._in_use = 0
+        self._counters = {"acquired": 0, "reused": 0, "created": 0, "overflow": 0, "discarded": 0}
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            conn = self._idle.get_nowait()
+            reused = True
+        except queue.Empty:
+            conn = None
+            reused = False
+
+        with self._lock:
+            self._counters["acquired"] += 1
+            self._in_use += 1
+            if reused:
+                self._counters["reused"] += 1
+                return conn
+            self._counters["created"] += 1
+            pooled = len(self._pooled) < self.max_size
+            if not pooled:
+                self._counters["overflow"] += 1
+
+        conn = _connect(self.db_path)
+        if pooled:
+            with self._lock:
+                self._pooled.add(id(conn))
+        return conn
+
+    def release(self, conn: sqlite3.Connection, discard: bool = False):
+        with self._lock:
+            self._in_use -= 1
+            pooled = id(conn) in self._pooled
+            if discard and pooled:
+                self._pooled.discard(id(conn))
+                self._counters["discarded"] += 1
+
+        if pooled and not discard:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    def close_all(self):
+        """유휴 연결을 모두 닫는다 (사용 중인 연결은 반납 시 닫힘)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._pooled.discard(id(conn))
+            conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "db_path": str(self.db_path),
+                "max_size": self.max_size,
+                "open": len(self._pooled),
+                "idle": self._idle.qsize(),
+                "in_use": self._in_use,
+                **self._counters,
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """현재 DB_PATH에 대한 연결 풀 반환 (최초 호출 시 생성)"""
+    global _pool
+    if _pool is None or _pool.db_path != DB_PATH:
+        with _pool_lock:
+            if _pool is None or _pool.db_path != DB_PATH:
+                if _pool is not None:
+                    _pool.close_all()
+                _pool = ConnectionPool(DB_PATH)
+    return _pool
+
+
+def close_pool():
+    """연결 풀 종료 (앱 종료 시 호출)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+            _pool = None
+
+
+def get_pool_stats() -> dict:
+    """연결 풀 사용 현황"""
+    return get_pool().stats()
+
+
 @contextmanager
 def get_db_connection():
-    """데이터베이스 연결 컨텍스트 매니저"""
-    conn = sqlite3.connect(str(DB_PATH))
-    conn.row_factory = sqlite3.Row  # 딕셔너리처럼 접근 가능하게
+    """데이터베이스 연결 컨텍스트 매니저 (풀에서 연결을 빌려 쓰고 반납)"""
+    pool = get_pool()
+    conn = pool.acquire()
+    discard = False
     try:
         yield conn
         conn.commit()
     except Exception as e:
-        conn.rollback()
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            # 롤백조차 실패한 연결은 풀에 돌려놓지 않음
+            discard = True
         raise e
     finally:
-        conn.close()
+        pool.release(conn, discard=discard)
 
 def build_update_clause(update_data: dict, touch_updated_at: bool = False) -> tuple[str, list]:
     """update_data 딕셔너리로부터 UPDATE SET 절과 파라미터 리스트 생성"""
@@ -30,393 +173,1198 @@ def build_update_clause(update_data: dict, touch_updated_at: bool = False) -> tu
         set_parts.append("updated_at = CURRENT_TIMESTAMP")
     return ", ".join(set_parts), params
 
+def rollup_date_filter(start_date=None, end_date=None, alias: str = "s") -> tuple[str, list, list]:
+    """기간 조건에 맞는 집계 테이블명과 WHERE 조건/파라미터 반환
+
+    기간 경계가 월 단위로 맞아떨어지면 월 집계(asset_monthly_stats),
+    아니면 일 집계(asset_daily_stats)를 사용한다.
+    """
+    start = date_type.fromisoformat(str(start_date)) if start_date else None
+    end = date_type.fromisoformat(str(end_date)) if end_date else None
+
+    month_aligned = (start is None or start.day == 1) and \
+                    (end is None or (end + timedelta(days=1)).day == 1)
+    conditions, params = [], []
+    if month_aligned:
+        if start:
+            conditions.append(f"{alias}.ym >= ?")
+            params.append(start.year * 100 + start.month)
+        if end:
+            conditions.append(f"{alias}.ym <= ?")
+            params.append(end.year * 100 + end.month)
+        return "asset_monthly_stats", conditions, params
+
+    if start:
+        conditions.append(f"{alias}.date >= ?")
+        params.append(start.isoformat())
+    if end:
+        conditions.append(f"{alias}.date <= ?")
+        params.append(end.isoformat())
+    return "asset_daily_stats", conditions, params
+
+# ===== 참조 데이터 캐시 (분류/카테고리/하위 카테고리/티어) =====
+
+REFERENCE_QUERIES = {
+    "classes": """
+        SELECT id, name, display_name, description, is_active, created_at
+        FROM asset_classes ORDER BY id
+    """,
+    "categories": """
+        SELECT id, class_id, name, display_name, tier_id, description,
+               is_active, sort_order, created_at, default_budget, rollover_enabled
+        FROM asset_categories ORDER BY class_id, sort_order, id
+    """,
+    "sub_categories": """
+        SELECT id, category_id, name, tier_id, is_active, created_at
+        FROM asset_sub_categories ORDER BY category_id, name
+    """,
+    "tiers": """
+        SELECT id, class_id, tier_level, name, display_name, description,
+               is_active, sort_order, created_at
+        FROM asset_tiers ORDER BY class_id, sort_order, tier_level
+    """,
+}
+
+def _build_reference_snapshot(cursor) -> dict:
+    """참조 테이블 전체를 읽어 목록 + ID/이름 조회 맵 구성
+
+    이름 맵은 name과 display_name 모두 키로 등록한다 (CSV에 '식비'처럼 적어도 되도록).
+    """
+    snapshot = {}
+    for key, query in REFERENCE_QUERIES.items():
+        cursor.execute(query)
+        snapshot[key] = [dict(row) for row in cursor.fetchall()]
+
+    snapshot["class_by_id"] = {r["id"]: r for r in snapshot["classes"]}
+    snapshot["category_by_id"] = {r["id"]: r for r in snapshot["categories"]}
+    snapshot["sub_category_by_id"] = {r["id"]: r for r in snapshot["sub_categories"]}
+    snapshot["tier_by_id"] = {r["id"]: r for r in snapshot["tiers"]}
+
+    snapshot["class_ids_by_name"] = {}
+    for r in snapshot["classes"]:
+        snapshot["class_ids_by_name"][r["display_name"]] = r["id"]
+        snapshot["class_ids_by_name"][r["name"]] = r["id"]
+    snapshot["category_ids_by_name"] = {}
+    for r in snapshot["categories"]:
+        snapshot["category_ids_by_name"][(r["class_id"], r["display_name"])] = r["id"]
+        snapshot["category_ids_by_name"][(r["class_id"], r["name"])] = r["id"]
+    snapshot["sub_category_ids_by_name"] = {
+        (r["category_id"], r["name"]): r["id"] for r in snapshot["sub_categories"]
+    }
+    snapshot["tier_ids_by_name"] = {}
+    for r in snapshot["tiers"]:
+        snapshot["tier_ids_by_name"][(r["class_id"], r["display_name"])] = r["id"]
+        snapshot["tier_ids_by_name"][(r["class_id"], r["name"])] = r["id"]
+    return snapshot
+
+
+class ReferenceCache:
+    """자주 바뀌지 않는 참조 테이블의 프로세스 내 스냅샷
+
+    쓰기 API가 커밋 후 invalidate()로 버전을 올리면 다음 조회 때 다시 읽는다.
+    읽는 도중 무효화되면 그 결과는 저장하지 않아 오래된 스냅샷이 남지 않는다.
+    반환된 스냅샷은 공유되므로 호출 측에서 수정하지 않는다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._db_path = None
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, cursor=None) -> dict:
+        """스냅샷 반환 (없으면 cursor 또는 풀 연결로 로드)"""
+        db_path = str(DB_PATH)
+        with self._lock:
+            if self._snapshot is not None and self._db_path == db_path:
+                self.hits += 1
+                return self._snapshot
+            self.misses += 1
+            version = self._version
+
+        if cursor is not None:
+            snapshot = _build_reference_snapshot(cursor)
+        else:
+            with get_db_connection() as conn:
+                snapshot = _build_reference_snapshot(conn.cursor())
+
+        with self._lock:
+            if self._version == version:
+                self._snapshot = snapshot
+                self._db_path = db_path
+        return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "version": self._version,
+                "loaded": self._snapshot is not None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+reference_cache = ReferenceCache()
+
+def get_reference_data(cursor=None) -> dict:
+    """참조 데이터 스냅샷 (캐시)"""
+    return reference_cache.get(cursor)
+
+def get_reference_cache_stats() -> dict:
+    return reference_cache.stats()
+
+def _invalidates(cache):
+    """cache를 바꾸는 엔드포인트용 데코레이터 생성 (함수가 끝나 커밋된 뒤 무효화)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                cache.invalidate()
+        return wrapper
+    return decorator
+
+invalidates_reference_cache = _invalidates(reference_cache)
+
+# ===== 원장 버전 캐시 =====
+
+def get_ledger_version(cursor) -> int:
+    """거래 원장 변경 카운터 (원장/참조 테이블 트리거가 증가)"""
+    cursor.execute("SELECT version FROM ledger_state WHERE id = 1")
+    return cursor.fetchone()[0]
+
+
+class LedgerCache:
+    """원장 버전으로 태깅한 계산 결과 캐시 (LRU)
+
+    조회 때마다 ledger_state를 한 번 읽어 저장된 버전과 다르면 다시 계산한다.
+    반환 값은 공유되므로 호출 측에서 수정하지 않는다.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, cursor, key: tuple, compute):
+        key = (str(DB_PATH),) + tuple(key)
+        version = get_ledger_version(cursor)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+ledger_cache = LedgerCache()
+
+def get_ledger_cache_stats() -> dict:
+    return ledger_cache.stats()
+
+# 조회 API 응답 본문(JSON bytes) 캐시: 원장 버전이 같으면 다시 계산하지 않음
+response_cache = LedgerCache(max_entries=512)
+
+def get_response_cache_stats() -> dict:
+    return response_cache.stats()
+
+# ===== 태그 이름 인덱스 =====
+
+SQL_IN_CHUNK = 500  # IN (...) 바인딩 변수 개수 상한 대비 청크 크기
+
+class TagIndex:
+    """태그 이름 -> ID 프로세스 전역 인덱스
+
+    SELECT로 확인한 태그만 담는다. 같은 요청에서 새로 만든 태그는 롤백될 수 있으므로
+    넣지 않고, 다음 조회 때 DB에서 찾아 채운다. 이름 변경/삭제 API가 커밋 후 무효화한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = None
+        self._db_path = None
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def lookup(self, cursor, names) -> dict:
+        """이름 목록 중 이미 존재하는 태그의 {이름: ID}"""
+        names = set(names)
+        db_path = str(DB_PATH)
+        with self._lock:
+            if self._ids is None or self._db_path != db_path:
+                ids, loaded = None, False
+            else:
+                ids, loaded = self._ids, True
+            version = self._version
+
+        if not loaded:
+            cursor.execute("SELECT name, id FROM asset_tags")
+            ids = dict(cursor.fetchall())
+
+        found = {name: ids[name] for name in names if name in ids}
+        missing = sorted(names - found.keys())
+        if loaded:
+            # 인덱스를 만든 뒤 새로 생긴 태그
+            for i in range(0, len(missing), SQL_IN_CHUNK):
+                chunk = missing[i:i + SQL_IN_CHUNK]
+                cursor.execute(f"SELECT name, id FROM asset_tags WHERE name IN ({','.join('?' * len(chunk))})", chunk)
+                found.update(cursor.fetchall())
+
+        with self._lock:
+            self.hits += len(names) - len(missing)
+            self.misses += len(missing)
+            if self._version == version:
+                if not loaded:
+                    self._ids, self._db_path = ids, db_path
+                for name in missing:
+                    if name in found:
+                        self._ids[name] = found[name]
+        return found
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._ids = None
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._ids) if self._ids is not None else 0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+tag_index = TagIndex()
+
+def get_tag_index_stats() -> dict:
+    return tag_index.stats()
+
+invalidates_tag_index = _invalidates(tag_index)
+
 def resolve_tier_id(cursor, tier_id: Optional[int], sub_category_id: Optional[int], category_id: int) -> Optional[int]:
-    """tier_id 미지정 시 sub_category -> category 순으로 기본 tier 조회"""
+    """tier_id 미지정 시 sub_category -> category 순으로 기본 tier 조회 (참조 캐시 사용)"""
     if tier_id:
         return tier_id
+    refs = get_reference_data(cursor)
     if sub_category_id:
-        cursor.execute("SELECT tier_id FROM asset_sub_categories WHERE id = ?", (sub_category_id,))
-        row = cursor.fetchone()
-        if row:
-            return row[0]
-    cursor.execute("SELECT tier_id FROM asset_categories WHERE id = ?", (category_id,))
-    row = cursor.fetchone()
-    return row[0] if row else None
+        sub_category = refs["sub_category_by_id"].get(sub_category_id)
+        if sub_category:
+            return sub_category["tier_id"]
+    category = refs["category_by_id"].get(category_id)
+    return category["tier_id"] if category else None
 
-def init_database():
-    """데이터베이스 테이블 생성 및 초기 데이터 삽입"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        # 1. asset_classes 테이블
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS asset_classes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                display_name TEXT NOT NULL,
-                description TEXT,
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # 2. asset_categories 테이블
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS asset_categories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                class_id INTEGER NOT NULL,
-                name TEXT NOT NULL,
-                display_name TEXT NOT NULL,
-                tier_id INTEGER,
-                description TEXT,
-                is_active BOOLEAN DEFAULT TRUE,
-                sort_order INTEGER DEFAULT 0,
-                default_budget REAL DEFAULT 0,
-                rollover_enabled BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (class_id) REFERENCES asset_classes(id),
-                FOREIGN KEY (tier_id) REFERENCES asset_tiers(id),
-                UNIQUE(class_id, name)
-            )
-        """)
+def reserve_asset_ids(cursor, n: int) -> range:
+    """assets에 직접 지정해 넣을 다음 id n개를 반환
+
+    AUTOINCREMENT가 기억하는 sqlite_sequence 값 다음부터 잡으므로 끝쪽 거래가 삭제됐어도 id를 재사용하지 않는다.
+    쓰기 트랜잭션 안에서 호출하고 같은 트랜잭션에서 이 id로 INSERT해야 한다 (INSERT가 sqlite_sequence를 올린다).
+    """
+    cursor.execute("SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'assets'), 0)")
+    first = cursor.fetchone()[0] + 1
+    return range(first, first + n)
+
+def add_column_if_missing(cursor, table: str, column: str, definition: str) -> bool:
+    """테이블에 컬럼이 없으면 ALTER TABLE로 추가 (추가했으면 True)
+
+    table_info는 generated 컬럼을 빠뜨리므로 table_xinfo로 확인한다.
+    """
+    cursor.execute(f"PRAGMA table_xinfo({table})")
+    if any(row[1] == column for row in cursor.fetchall()):
+        return False
+    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    print(f"Added {column} column to {table} table")
+    return True
 
-        # 마이그레이션: asset_categories 테이블에 tier_id 컬럼 추가
+def run_migrations(conn: sqlite3.Connection, migrations: list) -> int:
+    """PRAGMA user_version 기반 마이그레이션 실행
+
+    migrations[i]는 스키마 버전 i+1로 올리는 함수(cursor를 인자로 받음)이다.
+    이미 최신 버전이면 user_version 한 번만 읽고 반환한다.
+    각 단계는 별도 트랜잭션에서 실행되고 성공 시 user_version이 함께 커밋된다.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= len(migrations):
+        return version
+
+    if conn.in_transaction:
+        conn.commit()
+    while version < len(migrations):
+        conn.execute("BEGIN IMMEDIATE")
         try:
-            cursor.execute("ALTER TABLE asset_categories ADD COLUMN tier_id INTEGER REFERENCES asset_tiers(id)")
-            print("Added tier_id column to asset_categories table")
-        except sqlite3.OperationalError:
-            # 이미 컬럼이 존재하는 경우 무시
-            pass
-        
-        # 3. asset_tiers 테이블
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS asset_tiers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                class_id INTEGER NOT NULL,
-                tier_level INTEGER NOT NULL,
-                name TEXT NOT NULL,
-                display_name TEXT NOT NULL,
-                description TEXT,
-                is_active BOOLEAN DEFAULT TRUE,
-                sort_order INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (class_id) REFERENCES asset_classes(id),
-                UNIQUE(class_id, tier_level),
-                UNIQUE(class_id, name)
-            )
-        """)
-        
-        # 4. assets 테이블
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS assets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                cost REAL NOT NULL,
-                class_id INTEGER NOT NULL,
-                category_id INTEGER NOT NULL,
-                tier_id INTEGER NOT NULL,
-                date DATE NOT NULL,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (class_id) REFERENCES asset_classes(id),
-                FOREIGN KEY (category_id) REFERENCES asset_categories(id),
-                FOREIGN KEY (tier_id) REFERENCES asset_tiers(id)
-            )
-        """)        
-        
-        # 5. asset_tags 테이블 (태그 마스터)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS asset_tags (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                description TEXT,
-                color TEXT DEFAULT '#6366f1',
-                is_active BOOLEAN DEFAULT TRUE,
-                usage_count INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+            # 다른 프로세스가 먼저 올렸을 수 있으므로 잠금 후 다시 확인
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= len(migrations):
+                conn.commit()
+                break
+            migration = migrations[version]
+            migration(conn.cursor())
+            version += 1
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+            print(f"Applied migration v{version}: {migration.__name__}")
+        except Exception:
+            conn.rollback()
+            raise
+    return version
+
+# ===== 스키마 마이그레이션 (순서대로 추가만 할 것) =====
+
+def _migrate_base_schema(cursor):
+    """v1: 기본 테이블/인덱스 생성 (user_version 도입 이전 DB와도 호환)"""
+    # 1. asset_classes 테이블
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS asset_classes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            display_name TEXT NOT NULL,
+            description TEXT,
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # 2. asset_categories 테이블
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS asset_categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            class_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            display_name TEXT NOT NULL,
+            tier_id INTEGER,
+            description TEXT,
+            is_active BOOLEAN DEFAULT TRUE,
+            sort_order INTEGER DEFAULT 0,
+            default_budget REAL DEFAULT 0,
+            rollover_enabled BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (class_id) REFERENCES asset_classes(id),
+            FOREIGN KEY (tier_id) REFERENCES asset_tiers(id),
+            UNIQUE(class_id, name)
+        )
+    """)
+
+    # 구버전 DB: asset_categories 테이블에 tier_id 컬럼 추가
+    add_column_if_missing(cursor, "asset_categories", "tier_id", "INTEGER REFERENCES asset_tiers(id)")
+    
+    # 3. asset_tiers 테이블
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS asset_tiers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            class_id INTEGER NOT NULL,
+            tier_level INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            display_name TEXT NOT NULL,
+            description TEXT,
+            is_active BOOLEAN DEFAULT TRUE,
+            sort_order INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (class_id) REFERENCES asset_classes(id),
+            UNIQUE(class_id, tier_level),
+            UNIQUE(class_id, name)
+        )
+    """)
+    
+    # 4. assets 테이블
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS assets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            cost REAL NOT NULL,
+            class_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            tier_id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (class_id) REFERENCES asset_classes(id),
+            FOREIGN KEY (category_id) REFERENCES asset_categories(id),
+            FOREIGN KEY (tier_id) REFERENCES asset_tiers(id)
+        )
+    """)        
+    
+    # 5. asset_tags 테이블 (태그 마스터)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS asset_tags (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            description TEXT,
+            color TEXT DEFAULT '#6366f1',
+            is_active BOOLEAN DEFAULT TRUE,
+            usage_count INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # 6. asset_tag_relations 테이블 (거래-태그 다대다 관계)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS asset_tag_relations (
+            asset_id INTEGER NOT NULL,
+            tag_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (asset_id, tag_id),
+            FOREIGN KEY (asset_id) REFERENCES assets(id) ON DELETE CASCADE,
+            FOREIGN KEY (tag_id) REFERENCES asset_tags(id) ON DELETE CASCADE
+        )
+    """)
+
+    # 7. asset_sub_categories 테이블 (새로 추가)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS asset_sub_categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            tier_id INTEGER NOT NULL,
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (category_id) REFERENCES asset_categories(id),
+            FOREIGN KEY (tier_id) REFERENCES asset_tiers(id),
+            UNIQUE(category_id, name)
+        )
+    """)
+
+    # 8. asset_budgets 테이블 (월별 예산)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS asset_budgets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            budget_amount REAL NOT NULL DEFAULT 0,
+            rollover_amount REAL NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (category_id) REFERENCES asset_categories(id),
+            UNIQUE(category_id, year, month)
+        )
+    """)
+
+    # 9. recurring_schedules 테이블 (n주 단위 스케줄)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS recurring_schedules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            cycle_weeks INTEGER NOT NULL DEFAULT 1,
+            day_of_week INTEGER, -- 0: Mon, 6: Sun
+            start_date DATE NOT NULL,
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # 10. schedule_logs 테이블 (스케줄 수행 기록)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schedule_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            schedule_id INTEGER NOT NULL,
+            cycle_start_date DATE NOT NULL,
+            is_completed BOOLEAN DEFAULT FALSE,
+            completed_at TIMESTAMP,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (schedule_id) REFERENCES recurring_schedules(id)
+        )
+    """)
+
+    # 11. long_term_plans 테이블 (기간 일정)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS long_term_plans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            start_date DATE NOT NULL,
+            end_date DATE NOT NULL,
+            color TEXT,
+            progress INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # 구버전 DB: long_term_plans 테이블에 progress 컬럼 추가
+    add_column_if_missing(cursor, "long_term_plans", "progress", "INTEGER DEFAULT 0")
+
+    # 12. todos 테이블 (할일 관리)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS todos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            start_date DATE NOT NULL,
+            end_date DATE NOT NULL,
+            color TEXT DEFAULT '#10B981',
+            is_completed BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # 13. weekly_schedules 테이블 (주간 타임테이블)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS weekly_schedules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            day_of_week INTEGER NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            color TEXT DEFAULT '#4ECDC4',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # 구버전 DB: asset_categories 예산 컬럼, assets 하위 카테고리 컬럼 추가
+    add_column_if_missing(cursor, "asset_categories", "default_budget", "REAL DEFAULT 0")
+    add_column_if_missing(cursor, "asset_categories", "rollover_enabled", "BOOLEAN DEFAULT TRUE")
+    add_column_if_missing(cursor, "assets", "sub_category_id", "INTEGER REFERENCES asset_sub_categories(id)")
+
+    # 14. recurring_payments 테이블 (정기 결제)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS recurring_payments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            cost REAL NOT NULL,
+            class_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            sub_category_id INTEGER,
+            tier_id INTEGER,
+            day_of_month INTEGER NOT NULL CHECK(day_of_month >= 1 AND day_of_month <= 31),
+            description TEXT,
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (class_id) REFERENCES asset_classes(id),
+            FOREIGN KEY (category_id) REFERENCES asset_categories(id),
+            FOREIGN KEY (sub_category_id) REFERENCES asset_sub_categories(id),
+            FOREIGN KEY (tier_id) REFERENCES asset_tiers(id)
+        )
+    """)
+
+    # 15. recurring_payment_logs 테이블 (정기 결제 실행 기록)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS recurring_payment_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recurring_payment_id INTEGER NOT NULL,
+            executed_date DATE NOT NULL,
+            asset_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (recurring_payment_id) REFERENCES recurring_payments(id),
+            FOREIGN KEY (asset_id) REFERENCES assets(id),
+            UNIQUE(recurring_payment_id, executed_date)
+        )
+    """)
+
+    # 인덱스 생성
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_date ON assets(date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_class ON assets(class_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_category ON assets(category_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_sub_category ON assets(sub_category_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_date_class ON assets(date, class_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_categories_class ON asset_categories(class_id, is_active)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sub_categories_category ON asset_sub_categories(category_id, is_active)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tiers_class ON asset_tiers(class_id, is_active)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tags_name ON asset_tags(name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tag_relations_asset ON asset_tag_relations(asset_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tag_relations_tag ON asset_tag_relations(tag_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_todos_date ON todos(start_date, end_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_weekly_schedules_day ON weekly_schedules(day_of_week)")
+
+def _migrate_initial_data(cursor):
+    """v2: 기본 분류/카테고리/티어 데이터 삽입"""
+    # 초기 데이터 삽입 (데이터가 없을 때만)
+    cursor.execute("SELECT COUNT(*) FROM asset_classes")
+    if cursor.fetchone()[0] == 0:
+        insert_initial_data(cursor)
+
+def _migrate_category_tiers(cursor):
+    """v3: 기존 카테고리에 기본 tier_id 할당"""
+    # 데이터 마이그레이션 1: 기존 카테고리에 tier_id 할당 (tier_id가 NULL인 경우)
+    cursor.execute("SELECT id, class_id FROM asset_categories WHERE tier_id IS NULL")
+    categories_to_update = cursor.fetchall()
+    
+    if categories_to_update:
+        print(f"Migrating {len(categories_to_update)} categories to have tier_id...")
+        for cat_id, class_id in categories_to_update:
+            # 해당 카테고리의 거래 내역에서 가장 많이 사용된 tier_id 조회
+            cursor.execute("""
+                SELECT tier_id, COUNT(*) as count 
+                FROM assets 
+                WHERE category_id = ? 
+                GROUP BY tier_id 
+                ORDER BY count DESC 
+                LIMIT 1
+            """, (cat_id,))
+            result = cursor.fetchone()
+            
+            best_tier_id = None
+            if result:
+                best_tier_id = result[0]
+            else:
+                # 거래 내역이 없으면 해당 클래스의 기본 티어(보통 99: 구분없음) 또는 첫 번째 티어 할당
+                # 99번 티어(구분없음) 찾기
+                cursor.execute("SELECT id FROM asset_tiers WHERE class_id = ? AND tier_level = 99", (class_id,))
+                tier_row = cursor.fetchone()
+                if tier_row:
+                    best_tier_id = tier_row[0]
+                else:
+                    # 없으면 첫 번째 티어
+                    cursor.execute("SELECT id FROM asset_tiers WHERE class_id = ? ORDER BY tier_level ASC LIMIT 1", (class_id,))
+                    tier_row = cursor.fetchone()
+                    best_tier_id = tier_row[0] if tier_row else None
+            
+            if best_tier_id:
+                cursor.execute("UPDATE asset_categories SET tier_id = ? WHERE id = ?", (best_tier_id, cat_id))
+        print("Migration 1 completed.")
+
+def _migrate_sub_categories(cursor):
+    """v4: 카테고리별 기본 하위 카테고리 생성 및 assets 연결"""
+    # 데이터 마이그레이션 2: Sub Category 생성 및 assets 업데이트
+    cursor.execute("SELECT COUNT(*) FROM asset_sub_categories")
+    if cursor.fetchone()[0] == 0:
+        print("Migrating to Sub Categories...")
+        cursor.execute("SELECT id, name, tier_id, class_id FROM asset_categories")
+        categories = cursor.fetchall()
         
-        # 6. asset_tag_relations 테이블 (거래-태그 다대다 관계)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS asset_tag_relations (
-                asset_id INTEGER NOT NULL,
-                tag_id INTEGER NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (asset_id, tag_id),
-                FOREIGN KEY (asset_id) REFERENCES assets(id) ON DELETE CASCADE,
-                FOREIGN KEY (tag_id) REFERENCES asset_tags(id) ON DELETE CASCADE
-            )
-        """)
+        for cat in categories:
+            cat_id, cat_name, tier_id, class_id = cat
+            
+            final_tier_id = tier_id
+            if final_tier_id is None:
+                 # tier_id가 없으면 기본값(99: 구분없음) 찾기
+                cursor.execute("SELECT id FROM asset_tiers WHERE class_id = ? AND tier_level = 99", (class_id,))
+                tier_row = cursor.fetchone()
+                if tier_row:
+                    final_tier_id = tier_row[0]
+                else:
+                    cursor.execute("SELECT id FROM asset_tiers WHERE class_id = ? ORDER BY tier_level ASC LIMIT 1", (class_id,))
+                    tier_row = cursor.fetchone()
+                    final_tier_id = tier_row[0] if tier_row else None
+            
+            if final_tier_id:
+                # 기본 서브 카테고리 생성 (이름: '일반')
+                cursor.execute("""
+                    INSERT INTO asset_sub_categories (category_id, name, tier_id)
+                    VALUES (?, ?, ?)
+                """, (cat_id, '일반', final_tier_id))
+                sub_cat_id = cursor.lastrowid
+                
+                # 해당 카테고리의 assets 업데이트
+                cursor.execute("""
+                    UPDATE assets 
+                    SET sub_category_id = ? 
+                    WHERE category_id = ? AND sub_category_id IS NULL
+                """, (sub_cat_id, cat_id))
+        print("Sub Category Migration completed.")
 
-        # 7. asset_sub_categories 테이블 (새로 추가)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS asset_sub_categories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                category_id INTEGER NOT NULL,
-                name TEXT NOT NULL,
-                tier_id INTEGER NOT NULL,
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (category_id) REFERENCES asset_categories(id),
-                FOREIGN KEY (tier_id) REFERENCES asset_tiers(id),
-                UNIQUE(category_id, name)
-            )
-        """)
+# 거래 집계(rollup) 테이블: (버킷, class, category, tier) -> 건수, 합계
+ROLLUP_TABLES = {
+    "asset_daily_stats": ("date", "{ref}.date"),
+    "asset_monthly_stats": ("ym", "CAST(strftime('%Y%m', {ref}.date) AS INTEGER)"),
+}
 
-        # 8. asset_budgets 테이블 (월별 예산)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS asset_budgets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                category_id INTEGER NOT NULL,
-                year INTEGER NOT NULL,
-                month INTEGER NOT NULL,
-                budget_amount REAL NOT NULL DEFAULT 0,
-                rollover_amount REAL NOT NULL DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (category_id) REFERENCES asset_categories(id),
-                UNIQUE(category_id, year, month)
-            )
-        """)
+def _rollup_add_sql(table: str, ref: str) -> str:
+    bucket_col, bucket_expr = ROLLUP_TABLES[table]
+    return f"""
+        INSERT INTO {table} ({bucket_col}, class_id, category_id, tier_id, tx_count, total_cost)
+        VALUES ({bucket_expr.format(ref=ref)}, {ref}.class_id, {ref}.category_id, {ref}.tier_id, 1, {ref}.cost)
+        ON CONFLICT ({bucket_col}, class_id, category_id, tier_id) DO UPDATE SET
+            tx_count = tx_count + 1,
+            total_cost = total_cost + excluded.total_cost;
+    """
 
-        # 9. recurring_schedules 테이블 (n주 단위 스케줄)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS recurring_schedules (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT,
-                cycle_weeks INTEGER NOT NULL DEFAULT 1,
-                day_of_week INTEGER, -- 0: Mon, 6: Sun
-                start_date DATE NOT NULL,
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+def _rollup_remove_sql(table: str, ref: str) -> str:
+    bucket_col, bucket_expr = ROLLUP_TABLES[table]
+    key = (f"{bucket_col} = {bucket_expr.format(ref=ref)} AND class_id = {ref}.class_id "
+           f"AND category_id = {ref}.category_id AND tier_id = {ref}.tier_id")
+    return f"""
+        UPDATE {table} SET tx_count = tx_count - 1, total_cost = total_cost - {ref}.cost
+        WHERE {key};
+        DELETE FROM {table} WHERE {key} AND tx_count <= 0;
+    """
 
-        # 10. schedule_logs 테이블 (스케줄 수행 기록)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS schedule_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                schedule_id INTEGER NOT NULL,
-                cycle_start_date DATE NOT NULL,
-                is_completed BOOLEAN DEFAULT FALSE,
-                completed_at TIMESTAMP,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (schedule_id) REFERENCES recurring_schedules(id)
-            )
+def rebuild_asset_rollups(cursor):
+    """일/월 집계 테이블을 assets 전체로부터 다시 계산"""
+    cursor.execute("DELETE FROM asset_daily_stats")
+    cursor.execute("DELETE FROM asset_monthly_stats")
+    cursor.execute("""
+        INSERT INTO asset_daily_stats (date, class_id, category_id, tier_id, tx_count, total_cost)
+        SELECT date, class_id, category_id, tier_id, COUNT(*), SUM(cost)
+        FROM assets
+        GROUP BY date, class_id, category_id, tier_id
+    """)
+    cursor.execute("""
+        INSERT INTO asset_monthly_stats (ym, class_id, category_id, tier_id, tx_count, total_cost)
+        SELECT CAST(strftime('%Y%m', date) AS INTEGER), class_id, category_id, tier_id,
+               SUM(tx_count), SUM(total_cost)
+        FROM asset_daily_stats
+        GROUP BY 1, class_id, category_id, tier_id
+    """)
+
+def _migrate_asset_rollups(cursor):
+    """v5: 일/월 단위 거래 집계 테이블 + 동기화 트리거"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS asset_daily_stats (
+            date DATE NOT NULL,
+            class_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            tier_id INTEGER NOT NULL,
+            tx_count INTEGER NOT NULL DEFAULT 0,
+            total_cost REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, class_id, category_id, tier_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS asset_monthly_stats (
+            ym INTEGER NOT NULL, -- YYYYMM
+            class_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            tier_id INTEGER NOT NULL,
+            tx_count INTEGER NOT NULL DEFAULT 0,
+            total_cost REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (ym, class_id, category_id, tier_id)
+        ) WITHOUT ROWID
+    """)
+
+    # 기존 거래로 집계 채우기
+    rebuild_asset_rollups(cursor)
+
+    # assets 변경 시 집계 자동 반영 (모든 쓰기 경로 공통)
+    tables = list(ROLLUP_TABLES)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_assets_rollup_insert AFTER INSERT ON assets
+        BEGIN
+            {"".join(_rollup_add_sql(t, "NEW") for t in tables)}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_assets_rollup_delete AFTER DELETE ON assets
+        BEGIN
+            {"".join(_rollup_remove_sql(t, "OLD") for t in tables)}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_assets_rollup_update
+        AFTER UPDATE OF cost, date, class_id, category_id, tier_id ON assets
+        BEGIN
+            {"".join(_rollup_remove_sql(t, "OLD") for t in tables)}
+            {"".join(_rollup_add_sql(t, "NEW") for t in tables)}
+        END
+    """)
+
+# 거래 검색용 FTS5 테이블: 3글자 이상 용어의 부분 문자열 검색 (trigram)
+# 1~2글자 용어는 trigram으로 찾을 수 없어 검색 API가 assets에 LIKE로 거른다
+SEARCH_TABLES = {
+    "asset_search_trigram": "tokenize = 'trigram'",
+}
+# v6~v14에 있던 단어 접두어 검색 테이블 (v15에서 제거)
+LEGACY_SEARCH_TABLES = ("asset_search_prefix",)
+SEARCH_TRIGGERS = (
+    "trg_assets_search_insert", "trg_assets_search_update", "trg_assets_search_delete",
+    "trg_tag_relations_search_insert", "trg_tag_relations_search_delete", "trg_tags_search_rename",
+)
+
+def _asset_tag_names_sql(asset_ref: str) -> str:
+    return f"""(SELECT COALESCE(group_concat(t.name, ' '), '')
+                FROM asset_tag_relations r JOIN asset_tags t ON t.id = r.tag_id
+                WHERE r.asset_id = {asset_ref})"""
+
+def rebuild_asset_search(cursor):
+    """검색 인덱스를 assets와 태그 관계 전체로부터 다시 채움 (태그 이름 목록은 한 번만 계산)"""
+    cursor.execute(f"""
+        CREATE TEMP TABLE asset_search_source AS
+        SELECT a.id, a.name, a.description, {_asset_tag_names_sql("a.id")} AS tags
+        FROM assets a
+    """)
+    for table in SEARCH_TABLES:
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(f"""
+            INSERT INTO {table} (rowid, name, description, tags)
+            SELECT id, name, description, tags FROM temp.asset_search_source
         """)
+    cursor.execute("DROP TABLE temp.asset_search_source")
 
-        # 11. long_term_plans 테이블 (기간 일정)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS long_term_plans (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT,
-                start_date DATE NOT NULL,
-                end_date DATE NOT NULL,
-                color TEXT,
-                progress INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
+def _migrate_asset_search(cursor):
+    """v6: 거래명/설명/태그 전문 검색 인덱스 + 동기화 트리거"""
+    for table, options in SEARCH_TABLES.items():
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {table}
+            USING fts5(name, description, tags, {options})
         """)
+    rebuild_asset_search(cursor)
+    _create_asset_search_triggers(cursor)
 
-        # Add progress column if not exists (migration)
-        try:
-            cursor.execute("ALTER TABLE long_term_plans ADD COLUMN progress INTEGER DEFAULT 0")
-        except sqlite3.OperationalError as e:
-            if "duplicate column name" not in str(e).lower():
-                raise e
+def _create_asset_search_triggers(cursor):
+    """SEARCH_TABLES를 assets/태그 관계/태그 이름 변경에 맞춰 갱신하는 트리거"""
+    def each_table(statement: str) -> str:
+        return "".join(statement.format(table=table) for table in SEARCH_TABLES)
 
-        # 12. todos 테이블 (할일 관리)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS todos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT,
-                start_date DATE NOT NULL,
-                end_date DATE NOT NULL,
-                color TEXT DEFAULT '#10B981',
-                is_completed BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_assets_search_insert AFTER INSERT ON assets
+        BEGIN
+            {each_table("INSERT INTO {table} (rowid, name, description, tags) VALUES (NEW.id, NEW.name, NEW.description, '');")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_assets_search_update AFTER UPDATE OF name, description ON assets
+        BEGIN
+            {each_table("UPDATE {table} SET name = NEW.name, description = NEW.description WHERE rowid = NEW.id;")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_assets_search_delete AFTER DELETE ON assets
+        BEGIN
+            {each_table("DELETE FROM {table} WHERE rowid = OLD.id;")}
+        END
+    """)
+    for event, ref in (("INSERT", "NEW"), ("DELETE", "OLD")):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_tag_relations_search_{event.lower()}
+            AFTER {event} ON asset_tag_relations
+            BEGIN
+                {each_table("UPDATE {table} SET tags = " + _asset_tag_names_sql(f"{ref}.asset_id") + f" WHERE rowid = {ref}.asset_id;")}
+            END
         """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_tags_search_rename AFTER UPDATE OF name ON asset_tags
+        BEGIN
+            {each_table("UPDATE {table} SET tags = " + _asset_tag_names_sql("{table}.rowid") +
+                        " WHERE rowid IN (SELECT asset_id FROM asset_tag_relations WHERE tag_id = NEW.id);")}
+        END
+    """)
 
-        # 13. weekly_schedules 테이블 (주간 타임테이블)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS weekly_schedules (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT,
-                day_of_week INTEGER NOT NULL,
-                start_time TEXT NOT NULL,
-                end_time TEXT NOT NULL,
-                color TEXT DEFAULT '#4ECDC4',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
+def _migrate_transaction_keyset_indexes(cursor):
+    """v7: 거래 목록 keyset 페이지네이션용 인덱스
+
+    (date, id) 순서는 idx_assets_date가 이미 제공한다 (인덱스 끝에 rowid가 붙음).
+    분류 필터가 걸린 목록도 정렬 없이 페이지 크기만큼만 읽도록 (class_id, date, id) 추가.
+    """
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_class_date ON assets(class_id, date, id)")
+
+TAG_ROLLUP_YM = "CAST(strftime('%Y%m', {ref}.date) AS INTEGER)"
+
+def _tag_rollup_add_sql(asset_ref: str, tag_source: str) -> str:
+    """asset_ref 거래를 tag_source(SELECT ... AS tag_id 절)의 각 태그 버킷에 더함"""
+    return f"""
+        INSERT INTO asset_tag_monthly_stats (ym, tag_id, class_id, tx_count, total_cost)
+        SELECT {TAG_ROLLUP_YM.format(ref=asset_ref)}, {tag_source}
+        ON CONFLICT (ym, tag_id, class_id) DO UPDATE SET
+            tx_count = tx_count + 1,
+            total_cost = total_cost + excluded.total_cost;
+    """
+
+def _tag_rollup_remove_sql(ym_expr: str, class_expr: str, cost_expr: str, tag_filter: str) -> str:
+    key = f"ym = {ym_expr} AND class_id = {class_expr} AND tag_id {tag_filter}"
+    return f"""
+        UPDATE asset_tag_monthly_stats SET tx_count = tx_count - 1, total_cost = total_cost - {cost_expr}
+        WHERE {key};
+        DELETE FROM asset_tag_monthly_stats WHERE {key} AND tx_count <= 0;
+    """
+
+def rebuild_tag_rollup(cursor):
+    """태그 사용 횟수와 태그 x 월 집계를 태그 관계 전체로부터 다시 계산"""
+    cursor.execute("""
+        UPDATE asset_tags SET usage_count = (
+            SELECT COUNT(*) FROM asset_tag_relations r WHERE r.tag_id = asset_tags.id
+        )
+    """)
+    cursor.execute("DELETE FROM asset_tag_monthly_stats")
+    cursor.execute(f"""
+        INSERT INTO asset_tag_monthly_stats (ym, tag_id, class_id, tx_count, total_cost)
+        SELECT {TAG_ROLLUP_YM.format(ref="a")}, r.tag_id, a.class_id, COUNT(*), SUM(a.cost)
+        FROM asset_tag_relations r JOIN assets a ON a.id = r.asset_id
+        GROUP BY 1, r.tag_id, a.class_id
+    """)
+
+def _migrate_tag_rollup(cursor):
+    """v8: 태그 x 월 거래 집계 테이블 + 동기화 트리거
+
+    태그 관계 트리거는 assets와 조인하므로 거래와 관계 중 어느 쪽을 먼저 지워도
+    한 번만 빠진다. 이전 버전에서 거래 삭제 시 남은 고아 관계도 여기서 정리한다.
+    """
+    cursor.execute("DELETE FROM asset_tag_relations WHERE asset_id NOT IN (SELECT id FROM assets)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS asset_tag_monthly_stats (
+            ym INTEGER NOT NULL, -- YYYYMM
+            tag_id INTEGER NOT NULL,
+            class_id INTEGER NOT NULL,
+            tx_count INTEGER NOT NULL DEFAULT 0,
+            total_cost REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (ym, tag_id, class_id)
+        ) WITHOUT ROWID
+    """)
+    rebuild_tag_rollup(cursor)
+
+    old_ym = TAG_ROLLUP_YM.format(ref="OLD")
+    asset_ym = f"(SELECT {TAG_ROLLUP_YM.format(ref='a')} FROM assets a WHERE a.id = OLD.asset_id)"
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_tag_relations_rollup_insert AFTER INSERT ON asset_tag_relations
+        BEGIN
+            {_tag_rollup_add_sql("a", "NEW.tag_id, a.class_id, 1, a.cost FROM assets a WHERE a.id = NEW.asset_id")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_tag_relations_rollup_delete AFTER DELETE ON asset_tag_relations
+        BEGIN
+            {_tag_rollup_remove_sql(asset_ym,
+                                    "(SELECT class_id FROM assets WHERE id = OLD.asset_id)",
+                                    "(SELECT cost FROM assets WHERE id = OLD.asset_id)",
+                                    "= OLD.tag_id")}
+        END
+    """)
+    old_tags = "IN (SELECT tag_id FROM asset_tag_relations WHERE asset_id = OLD.id)"
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_assets_tag_rollup_delete AFTER DELETE ON assets
+        BEGIN
+            {_tag_rollup_remove_sql(old_ym, "OLD.class_id", "OLD.cost", old_tags)}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_assets_tag_rollup_update
+        AFTER UPDATE OF cost, date, class_id ON assets
+        BEGIN
+            {_tag_rollup_remove_sql(old_ym, "OLD.class_id", "OLD.cost", old_tags)}
+            {_tag_rollup_add_sql("NEW", "r.tag_id, NEW.class_id, 1, NEW.cost FROM asset_tag_relations r WHERE r.asset_id = NEW.id")}
+        END
+    """)
+
+def _migrate_ledger_version(cursor):
+    """v9: 거래 원장 변경 카운터 (assets 쓰기마다 증가, 결과 캐시 무효화 기준, v12에서 범위 확장)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ledger_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO ledger_state (id, version) VALUES (1, 0)")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_assets_ledger_{event.lower()} AFTER {event} ON assets
+            BEGIN
+                UPDATE ledger_state SET version = version + 1 WHERE id = 1;
+            END
         """)
 
-        # 마이그레이션: asset_categories 테이블에 default_budget 컬럼 추가
-        try:
-            cursor.execute("ALTER TABLE asset_categories ADD COLUMN default_budget REAL DEFAULT 0")
-            print("Added default_budget column to asset_categories table")
-        except sqlite3.OperationalError:
-            pass
+def _migrate_asset_time_keys(cursor):
+    """v10: 거래 날짜 파생 키 (generated 컬럼) 와 월 단위 복합 인덱스
 
-        # 마이그레이션: asset_categories 테이블에 rollover_enabled 컬럼 추가
-        try:
-            cursor.execute("ALTER TABLE asset_categories ADD COLUMN rollover_enabled BOOLEAN DEFAULT TRUE")
-            print("Added rollover_enabled column to asset_categories table")
-        except sqlite3.OperationalError:
-            pass
+    ym(YYYYMM)과 day_num(1970-01-01 기준 일수)은 date에서 계산되는 VIRTUAL 컬럼이라
+    저장 공간을 쓰지 않고 쓰기 경로도 바뀌지 않는다 (ALTER TABLE로는 STORED 추가 불가).
+    인덱스에는 값이 실제로 저장되므로 class_id + ym 검색 후 cost 순서로 바로 읽을 수 있다.
+    """
+    add_column_if_missing(
+        cursor, "assets", "ym",
+        "INTEGER GENERATED ALWAYS AS (CAST(strftime('%Y%m', date) AS INTEGER)) VIRTUAL",
+    )
+    add_column_if_missing(
+        cursor, "assets", "day_num",
+        "INTEGER GENERATED ALWAYS AS (CAST(julianday(date) - 2440587.5 AS INTEGER)) VIRTUAL",
+    )
+    # 월별 상위 지출: (class_id, ym) 검색 후 cost 역순으로 LIMIT만큼만 읽음
+    # (끝에 rowid가 붙어 id 동순위 정렬까지 해결, 월별 합계는 이미 집계 테이블이 담당)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_class_ym_cost ON assets(class_id, ym, cost)")
 
+def _migrate_asset_covering_indexes(cursor):
+    """v11: 통계/목록 쿼리 형태에 맞춘 커버링 인덱스
 
-        # assets 테이블에 sub_category_id 컬럼 추가
-        try:
-            cursor.execute("ALTER TABLE assets ADD COLUMN sub_category_id INTEGER REFERENCES asset_sub_categories(id)")
-        except sqlite3.OperationalError:
-            pass
+    - 기간 흐름 집계와 일/주 단위 상위 지출은 날짜 범위에서 분류 ID와 금액만 읽으므로
+      (date, class_id, category_id, sub_category_id, tier_id, cost)로 테이블 접근 없이 처리한다.
+      (date, class_id) 인덱스는 이 인덱스의 앞부분이라 제거.
+    - 카테고리/하위 카테고리 필터 목록은 (xxx_id, date, id)로 정렬 없이 페이지 크기만큼만 읽는다.
+      단일 컬럼 인덱스는 앞부분이 같으므로 교체 (COUNT(*) WHERE category_id = ?도 그대로 사용).
+    - idx_assets_class는 idx_assets_class_date의 앞부분이라 제거.
+    """
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_assets_date_cover
+        ON assets(date, class_id, category_id, sub_category_id, tier_id, cost)
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_category_date ON assets(category_id, date, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_sub_category_date ON assets(sub_category_id, date, id)")
+    for redundant in ("idx_assets_date_class", "idx_assets_category", "idx_assets_sub_category", "idx_assets_class"):
+        cursor.execute(f"DROP INDEX IF EXISTS {redundant}")
 
-        # 14. recurring_payments 테이블 (정기 결제)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS recurring_payments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                cost REAL NOT NULL,
-                class_id INTEGER NOT NULL,
-                category_id INTEGER NOT NULL,
-                sub_category_id INTEGER,
-                tier_id INTEGER,
-                day_of_month INTEGER NOT NULL CHECK(day_of_month >= 1 AND day_of_month <= 31),
-                description TEXT,
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (class_id) REFERENCES asset_classes(id),
-                FOREIGN KEY (category_id) REFERENCES asset_categories(id),
-                FOREIGN KEY (sub_category_id) REFERENCES asset_sub_categories(id),
-                FOREIGN KEY (tier_id) REFERENCES asset_tiers(id)
-            )
+# 원장 버전을 올리는 테이블 (v9의 assets 외에 조회 API 결과에 영향을 주는 테이블)
+LEDGER_VERSIONED_TABLES = (
+    "asset_classes", "asset_categories", "asset_sub_categories", "asset_tiers",
+    "asset_tags", "asset_tag_relations", "asset_budgets", "recurring_payments",
+)
+
+def _migrate_drop_prefix_search(cursor):
+    """v15: 쓰이지 않는 단어 접두어 검색 테이블 제거
+
+    짧은 검색어도 부분 문자열로 찾도록 바뀌면서 읽는 곳이 없어졌는데, 거래/태그 쓰기마다
+    트리거가 함께 갱신하고 있었다. 트리거를 trigram 테이블만 갱신하도록 다시 만든다.
+    """
+    for trigger in SEARCH_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    for table in LEGACY_SEARCH_TABLES:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    _create_asset_search_triggers(cursor)
+
+def _migrate_ledger_version_scope(cursor):
+    """v12: 예산/태그/분류/정기결제 쓰기도 원장 버전을 올림
+
+    응답 캐시가 버전 하나로 /budgets, /tags, /recurring-payments까지 무효화하도록
+    assets 외의 조회 대상 테이블에도 같은 트리거를 건다.
+    """
+    for table in LEDGER_VERSIONED_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_ledger_{event.lower()} AFTER {event} ON {table}
+                BEGIN
+                    UPDATE ledger_state SET version = version + 1 WHERE id = 1;
+                END
+            """)
+
+def _migrate_ledger_rewrites(cursor):
+    """v13: assets 수정/삭제 카운터 (ledger_state.asset_rewrites)
+
+    버전만으로는 추가와 수정을 구분할 수 없어, 열 지향 스냅샷이 새 행만 이어 붙여도
+    되는지(카운터 그대로) 전부 다시 읽어야 하는지(카운터 증가) 판단하는 데 쓴다.
+    """
+    add_column_if_missing(cursor, "ledger_state", "asset_rewrites", "INTEGER NOT NULL DEFAULT 0")
+    for event in ("UPDATE", "DELETE"):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_assets_rewrite_{event.lower()} AFTER {event} ON assets
+            BEGIN
+                UPDATE ledger_state SET asset_rewrites = asset_rewrites + 1 WHERE id = 1;
+            END
         """)
 
-        # 15. recurring_payment_logs 테이블 (정기 결제 실행 기록)
+def _migrate_recurring_payment_state(cursor):
+    """v14: 정기 결제 엔진의 마지막 성공 실행일 (서버가 꺼져 있던 날을 다음 실행에서 따라잡는 기준)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS recurring_payment_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_run_date DATE
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO recurring_payment_state (id, last_run_date) VALUES (1, NULL)")
+
+MIGRATIONS = [
+    _migrate_base_schema,
+    _migrate_initial_data,
+    _migrate_category_tiers,
+    _migrate_sub_categories,
+    _migrate_asset_rollups,
+    _migrate_asset_search,
+    _migrate_transaction_keyset_indexes,
+    _migrate_tag_rollup,
+    _migrate_ledger_version,
+    _migrate_asset_time_keys,
+    _migrate_asset_covering_indexes,
+    _migrate_ledger_version_scope,
+    _migrate_ledger_rewrites,
+    _migrate_recurring_payment_state,
+    _migrate_drop_prefix_search,
+]
+
+def init_database():
+    """데이터베이스 스키마를 최신 버전으로 마이그레이션"""
+    with get_db_connection() as conn:
+        version = run_migrations(conn, MIGRATIONS)
+    reference_cache.invalidate()
+    tag_index.invalidate()
+    print(f"Database initialized successfully! (schema v{version})")
+
+# 대량 적재 중 잠시 끄는 동기화 트리거가 걸린 테이블
+BULK_LOAD_TABLES = ("assets", "asset_tag_relations")
+BULK_LOAD_CACHE_SIZE = -262144  # 약 256MB
+
+@contextmanager
+def bulk_load(conn: sqlite3.Connection, rebuild_search: bool = True):
+    """assets/태그 관계 대량 적재용 컨텍스트
+
+    행마다 실행되는 집계/검색/버전 트리거와 보조 인덱스를 내려 두고, 적재가 끝나면
+    인덱스를 다시 만들고 파생 테이블을 한 번에 계산한 뒤 트리거를 원래 정의 그대로 복원한다.
+    전체가 하나의 트랜잭션이라 도중에 실패하면 트리거 삭제까지 함께 롤백된다.
+
+    rebuild_search=False면 적재 시간의 대부분을 차지하는 검색 인덱스와 태그 집계(사용 횟수,
+    태그 x 월) 재계산을 건너뛴다. 검색/태그 통계를 쓰지 않는 fixture용이며, 그 전까지 두 테이블은
+    적재한 거래를 반영하지 않으므로 필요해지면 rebuild_search_tables로 채운다.
+    """
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    cursor = conn.cursor()
+    # 인덱스 재생성과 검색 인덱스 채우기는 페이지 캐시가 클수록 빠름 (끝나면 원래 값으로)
+    cache_size = cursor.execute("PRAGMA cache_size").fetchone()[0]
+    cursor.execute(f"PRAGMA cache_size = {BULK_LOAD_CACHE_SIZE}")
+    placeholders = ", ".join("?" * len(BULK_LOAD_TABLES))
+    # 보조 인덱스도 적재 후 한 번에 정렬해 만드는 편이 행마다 갱신하는 것보다 훨씬 빠름
+    # (sql이 NULL인 UNIQUE/PK 자동 인덱스는 제외)
+    cursor.execute(f"""
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('trigger', 'index') AND sql IS NOT NULL AND tbl_name IN ({placeholders})
+    """, BULK_LOAD_TABLES)
+    dropped = cursor.fetchall()
+    for kind, name, _ in dropped:
+        cursor.execute(f"DROP {kind.upper()} {name}")
+
+    try:
+        yield cursor
+
+        for kind, _, sql in dropped:
+            if kind == 'index':
+                cursor.execute(sql)
+        rebuild_asset_rollups(cursor)
+        if rebuild_search:
+            rebuild_asset_search(cursor)
+            rebuild_tag_rollup(cursor)
+        # 적재 중에는 트리거가 없어 어떤 행이 바뀌었는지 모르므로 수정 카운터도 올려 전체를 다시 읽게 함
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS recurring_payment_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                recurring_payment_id INTEGER NOT NULL,
-                executed_date DATE NOT NULL,
-                asset_id INTEGER NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (recurring_payment_id) REFERENCES recurring_payments(id),
-                FOREIGN KEY (asset_id) REFERENCES assets(id),
-                UNIQUE(recurring_payment_id, executed_date)
-            )
+            UPDATE ledger_state SET version = version + 1, asset_rewrites = asset_rewrites + 1 WHERE id = 1
         """)
+        for kind, _, sql in dropped:
+            if kind == 'trigger':
+                cursor.execute(sql)
+    finally:
+        # 풀로 돌아갈 연결이라 캐시 크기는 실패해도 되돌림
+        cursor.execute(f"PRAGMA cache_size = {cache_size}")
+        tag_index.invalidate()
 
-        # 인덱스 생성
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_date ON assets(date)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_class ON assets(class_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_category ON assets(category_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_sub_category ON assets(sub_category_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_date_class ON assets(date, class_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_categories_class ON asset_categories(class_id, is_active)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_sub_categories_category ON asset_sub_categories(category_id, is_active)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tiers_class ON asset_tiers(class_id, is_active)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tags_name ON asset_tags(name)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tag_relations_asset ON asset_tag_relations(asset_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tag_relations_tag ON asset_tag_relations(tag_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_todos_date ON todos(start_date, end_date)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_weekly_schedules_day ON weekly_schedules(day_of_week)")
-     
-
-        # 초기 데이터 삽입 (데이터가 없을 때만)
-        cursor.execute("SELECT COUNT(*) FROM asset_classes")
-        if cursor.fetchone()[0] == 0:
-            insert_initial_data(cursor)
-            
-        # 데이터 마이그레이션 1: 기존 카테고리에 tier_id 할당 (tier_id가 NULL인 경우)
-        cursor.execute("SELECT id, class_id FROM asset_categories WHERE tier_id IS NULL")
-        categories_to_update = cursor.fetchall()
-        
-        if categories_to_update:
-            print(f"Migrating {len(categories_to_update)} categories to have tier_id...")
-            for cat_id, class_id in categories_to_update:
-                # 해당 카테고리의 거래 내역에서 가장 많이 사용된 tier_id 조회
-                cursor.execute("""
-                    SELECT tier_id, COUNT(*) as count 
-                    FROM assets 
-                    WHERE category_id = ? 
-                    GROUP BY tier_id 
-                    ORDER BY count DESC 
-                    LIMIT 1
-                """, (cat_id,))
-                result = cursor.fetchone()
-                
-                best_tier_id = None
-                if result:
-                    best_tier_id = result[0]
-                else:
-                    # 거래 내역이 없으면 해당 클래스의 기본 티어(보통 99: 구분없음) 또는 첫 번째 티어 할당
-                    # 99번 티어(구분없음) 찾기
-                    cursor.execute("SELECT id FROM asset_tiers WHERE class_id = ? AND tier_level = 99", (class_id,))
-                    tier_row = cursor.fetchone()
-                    if tier_row:
-                        best_tier_id = tier_row[0]
-                    else:
-                        # 없으면 첫 번째 티어
-                        cursor.execute("SELECT id FROM asset_tiers WHERE class_id = ? ORDER BY tier_level ASC LIMIT 1", (class_id,))
-                        tier_row = cursor.fetchone()
-                        best_tier_id = tier_row[0] if tier_row else None
-                
-                if best_tier_id:
-                    cursor.execute("UPDATE asset_categories SET tier_id = ? WHERE id = ?", (best_tier_id, cat_id))
-            print("Migration 1 completed.")
-
-        # 데이터 마이그레이션 2: Sub Category 생성 및 assets 업데이트
-        cursor.execute("SELECT COUNT(*) FROM asset_sub_categories")
-        if cursor.fetchone()[0] == 0:
-            print("Migrating to Sub Categories...")
-            cursor.execute("SELECT id, name, tier_id, class_id FROM asset_categories")
-            categories = cursor.fetchall()
-            
-            for cat in categories:
-                cat_id, cat_name, tier_id, class_id = cat
-                
-                final_tier_id = tier_id
-                if final_tier_id is None:
-                     # tier_id가 없으면 기본값(99: 구분없음) 찾기
-                    cursor.execute("SELECT id FROM asset_tiers WHERE class_id = ? AND tier_level = 99", (class_id,))
-                    tier_row = cursor.fetchone()
-                    if tier_row:
-                        final_tier_id = tier_row[0]
-                    else:
-                        cursor.execute("SELECT id FROM asset_tiers WHERE class_id = ? ORDER BY tier_level ASC LIMIT 1", (class_id,))
-                        tier_row = cursor.fetchone()
-                        final_tier_id = tier_row[0] if tier_row else None
-                
-                if final_tier_id:
-                    # 기본 서브 카테고리 생성 (이름: '일반')
-                    cursor.execute("""
-                        INSERT INTO asset_sub_categories (category_id, name, tier_id)
-                        VALUES (?, ?, ?)
-                    """, (cat_id, '일반', final_tier_id))
-                    sub_cat_id = cursor.lastrowid
-                    
-                    # 해당 카테고리의 assets 업데이트
-                    cursor.execute("""
-                        UPDATE assets 
-                        SET sub_category_id = ? 
-                        WHERE category_id = ? AND sub_category_id IS NULL
-                    """, (sub_cat_id, cat_id))
-            print("Sub Category Migration completed.")
-
-        conn.commit()
-        print("Database initialized successfully!")
+def rebuild_search_tables(cursor):
+    """bulk_load(rebuild_search=False)로 미뤄 둔 검색 인덱스와 태그 집계를 다시 계산"""
+    rebuild_asset_search(cursor)
+    rebuild_tag_rollup(cursor)
+    # 태그 사용 횟수/통계 응답 캐시가 새 값을 읽도록 원장 버전을 올림
+    cursor.execute("UPDATE ledger_state SET version = version + 1 WHERE id = 1")
+    tag_index.invalidate()
 
 def insert_initial_data(cursor):
     """초기 데이터 삽입"""
@@ -497,6 +1445,91 @@ def _self_check():
     assert clause == "name = ?, cost = ?" and params == ["a", 5]
     clause, params = build_update_clause({"name": "a"}, touch_updated_at=True)
     assert clause == "name = ?, updated_at = CURRENT_TIMESTAMP" and params == ["a"]
+
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = ConnectionPool(Path(tmp) / "pool.db", max_size=1)
+        first = pool.acquire()
+        assert first.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        extra = pool.acquire()                      # 풀이 가득 차면 overflow 연결
+        pool.release(extra)
+        pool.release(first)
+        assert pool.acquire() is first              # 풀 연결은 재사용
+        stats = pool.stats()
+        assert stats["overflow"] == 1 and stats["reused"] == 1 and stats["in_use"] == 1
+        pool.release(first)
+        pool.close_all()
+
+    applied = []
+    steps = [lambda cur: applied.append(1), lambda cur: applied.append(2)]
+    conn = sqlite3.connect(":memory:")
+    assert run_migrations(conn, steps[:1]) == 1
+    assert run_migrations(conn, steps) == 2         # 새 단계만 적용
+    assert run_migrations(conn, steps) == 2 and applied == [1, 2]
+    conn.close()
+
+    table, conditions, params = rollup_date_filter("2025-10-01", "2025-11-30")
+    assert table == "asset_monthly_stats" and params == [202510, 202511]
+    table, conditions, params = rollup_date_filter("2025-10-01", "2025-10-15")
+    assert table == "asset_daily_stats" and params == ["2025-10-01", "2025-10-15"]
+    assert rollup_date_filter()[0] == "asset_monthly_stats"
+
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    run_migrations(conn, MIGRATIONS)
+    cache = ReferenceCache()
+    refs = cache.get(conn.cursor())
+    assert cache.get(conn.cursor()) is refs         # 두 번째는 캐시 적중
+    spend_id = refs["class_ids_by_name"]["지출"]
+    assert refs["class_ids_by_name"]["spend"] == spend_id
+    cache.invalidate()
+    assert cache.get(conn.cursor()) is not refs
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+    results = LedgerCache(max_entries=1)
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)
+    assert results.get_or_compute(conn.cursor(), ("k",), compute) == 1
+    assert results.get_or_compute(conn.cursor(), ("k",), compute) == 1   # 같은 버전은 재사용
+    conn.execute("UPDATE ledger_state SET version = version + 1")
+    assert results.get_or_compute(conn.cursor(), ("k",), compute) == 2   # 버전이 바뀌면 재계산
+    results.get_or_compute(conn.cursor(), ("other",), compute)
+    assert results.stats()["entries"] == 1                              # LRU 상한
+
+    conn.execute("""
+        INSERT INTO assets (name, cost, class_id, category_id, tier_id, date)
+        VALUES ('키', 1000, 1, 1, 1, '2025-03-31')
+    """)
+    assert tuple(conn.execute("SELECT ym, day_num FROM assets").fetchone()) == (202503, 20178)
+    conn.execute("UPDATE assets SET cost = 1100 WHERE name = '키'")
+    assert conn.execute("SELECT asset_rewrites FROM ledger_state").fetchone()[0] == 1    # 추가는 제외, 수정만
+
+    schema_sql = "SELECT type, name, sql FROM sqlite_master ORDER BY name"
+    schema = conn.execute(schema_sql).fetchall()
+    with bulk_load(conn) as cursor:
+        assert cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'assets'").fetchone()[0] == 0
+        cursor.executemany("""
+            INSERT INTO assets (name, cost, class_id, category_id, tier_id, date)
+            VALUES (?, ?, 1, 1, 1, ?)
+        """, [("대량", 500, "2025-04-01"), ("대량", 700, "2025-04-02")])
+        cursor.execute("INSERT INTO asset_tag_relations (asset_id, tag_id) VALUES (last_insert_rowid(), 1)")
+    conn.commit()
+    assert conn.execute(schema_sql).fetchall() == schema                 # 트리거/인덱스 복원
+    assert tuple(conn.execute("SELECT tx_count, total_cost FROM asset_monthly_stats WHERE ym = 202504").fetchone()) == (2, 1200)
+    assert tuple(conn.execute("SELECT tx_count, total_cost FROM asset_tag_monthly_stats WHERE ym = 202504").fetchone()) == (1, 700)
+    assert conn.execute("SELECT COUNT(*) FROM asset_search_trigram WHERE name = '대량'").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'asset_search_prefix'").fetchone()[0] == 0
+
+    # 끝쪽 거래를 지워도 삭제된 id를 다시 쓰지 않는다 (MAX(id) + 1과의 차이)
+    conn.execute("DELETE FROM assets WHERE id = 3")
+    ids = reserve_asset_ids(conn.cursor(), 2)
+    assert ids == range(4, 6)
+    conn.executemany("""
+        INSERT INTO assets (id, name, cost, class_id, category_id, tier_id, date)
+        VALUES (?, '예약', 100, 1, 1, 1, '2025-04-03')
+    """, [(asset_id,) for asset_id in ids])
+    assert reserve_asset_ids(conn.cursor(), 1) == range(6, 7)
+    conn.close()
     print("database self-check passed")
 
 
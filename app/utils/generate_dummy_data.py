@@ -1,14 +1,28 @@
 """
 더미 데이터 생성 스크립트
-2025년 9월 ~ 11월까지 3개월치 거래 데이터 생성
+기간/하루 거래 수/태그 밀도/카테고리 수/시드를 지정해 현실적인 가계부 원장을 생성한다.
+같은 인자와 시드면 항상 같은 데이터가 나오므로 벤치마크 fixture로 사용한다.
+
+행마다 INSERT하지 않고 executemany로 한 트랜잭션에 적재하며, 적재하는 동안에는
+동기화 트리거를 내려 두고 끝난 뒤 집계/검색 테이블을 한 번에 다시 계산한다 (database.bulk_load).
+검색/태그 통계를 쓰지 않는 fixture는 --skip-search로 검색 인덱스와 태그 집계 재계산을 미룰 수 있다.
+
+사용법 (app 디렉토리에서):
+    python utils/generate_dummy_data.py                          # 최근 3개월, 하루 약 5건
+    python utils/generate_dummy_data.py --years 10 --tx-per-day 300 --db /tmp/big.db
+    python utils/generate_dummy_data.py --years 10 --tx-per-day 300 --db /tmp/big.db --skip-search
+    python utils/generate_dummy_data.py --db /tmp/big.db --rebuild-search   # 미뤄 둔 재계산만 실행
 """
+import argparse
 import random
-from datetime import datetime, timedelta
-from database import get_db_connection, init_database
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
 
-# 더미 데이터 설정
-START_DATE = datetime(2025, 9, 1)
-END_DATE = datetime(2025, 11, 30)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import utils.database as database
 
 # 태그 데이터
 TAGS = [
@@ -26,450 +40,279 @@ TAGS = [
     ('건강', '병원/약국', '#dc143c'),
     ('교육', '교육/학습', '#4682b4'),
     ('구독', '구독 서비스', '#daa520'),
+    ('관리비', '공과금/관리비', '#708090'),
 ]
 
-# 지출 거래 템플릿
-SPEND_TEMPLATES = [
-    # 고정비 (tier_level=0)
-    {
-        'category': 'utilities',
-        'tier_level': 0,
-        'items': [
-            ('전기요금', 50000, 80000, ['관리비'], None),
-            ('가스요금', 30000, 60000, ['관리비'], None),
-            ('수도요금', 20000, 35000, ['관리비'], None),
-            ('인터넷/통신비', 40000, 60000, ['구독'], None),
-        ],
-        'frequency': 'monthly'  # 매월 1회
-    },
-    {
-        'category': 'rent',
-        'tier_level': 0,
-        'items': [
-            ('월세', 500000, 700000, [], None),
-        ],
-        'frequency': 'monthly'
-    },
-    # 필수비 (tier_level=1)
-    {
-        'category': 'food',
-        'tier_level': 1,
-        'items': [
-            ('아침식사', 5000, 8000, ['외식'], None),
-            ('점심식사', 8000, 12000, ['외식'], None),
-            ('저녁식사', 10000, 15000, ['외식'], None),
-            ('편의점', 3000, 8000, [], None),
-            ('마트 장보기', 30000, 80000, ['장보기'], None),
-        ],
-        'frequency': 'daily'  # 매일 1-3회
-    },
-    {
-        'category': 'transportation',
-        'tier_level': 1,
-        'items': [
-            ('주유', 60000, 90000, ['차량'], None),
-            ('지하철', 1500, 1500, [], None),
-            ('버스', 1500, 1500, [], None),
-            ('택시', 8000, 25000, [], None),
-            ('주차비', 3000, 10000, ['차량'], None),
-        ],
-        'frequency': 'frequent'  # 주 3-5회
-    },
-    # 여가비 (tier_level=2)
-    {
-        'category': 'cafe',
-        'tier_level': 2,
-        'items': [
-            ('스타벅스', 5500, 8000, ['카페'], None),
-            ('이디야 커피', 3000, 5000, ['카페'], None),
-            ('베이커리 카페', 8000, 15000, ['카페', '외식'], None),
-            ('디저트 카페', 10000, 20000, ['카페', '데이트'], None),
-        ],
-        'frequency': 'frequent'
-    },
-    {
-        'category': 'food',
-        'tier_level': 2,
-        'items': [
-            ('맛집 외식', 30000, 60000, ['외식', '데이트'], None),
-            ('술집/바', 40000, 80000, ['외식', '친구'], None),
-            ('회식', 50000, 100000, ['외식', '회식'], None),
-            ('치킨/야식', 20000, 30000, ['외식'], None),
-        ],
-        'frequency': 'weekly'  # 주 1-2회
-    },
-    {
-        'category': 'etc',
-        'tier_level': 2,
-        'items': [
-            ('영화', 15000, 20000, ['데이트', '취미'], None),
-            ('쇼핑', 30000, 150000, ['쇼핑'], None),
-            ('노래방', 20000, 30000, ['친구'], None),
-        ],
-        'frequency': 'occasional'  # 월 2-4회
-    },
-    # 취미비 (tier_level=3)
-    {
-        'category': 'game',
-        'tier_level': 3,
-        'items': [
-            ('게임 결제', 10000, 50000, ['게임'], None),
-            ('스팀 게임', 20000, 60000, ['게임'], None),
-        ],
-        'frequency': 'occasional'
-    },
-    {
-        'category': 'etc',
-        'tier_level': 3,
-        'items': [
-            ('배드민턴 용품', 30000, 100000, ['운동', '취미'], None),
-            ('헬스장', 70000, 100000, ['운동', '구독'], None),
-            ('책/전자책', 10000, 30000, ['교육', '취미'], None),
-        ],
-        'frequency': 'occasional'
-    },
+# 매월 정해진 날 한 번씩 생기는 거래: (분류, 카테고리, 티어 레벨, 일, 이름, 최소, 최대, 태그, 설명)
+MONTHLY_ITEMS = [
+    ('spend', 'rent', 0, 1, '월세', 500000, 700000, [], None),
+    ('spend', 'utilities', 0, 5, '전기요금', 50000, 80000, ['관리비'], None),
+    ('spend', 'utilities', 0, 5, '가스요금', 30000, 60000, ['관리비'], None),
+    ('spend', 'utilities', 0, 5, '수도요금', 20000, 35000, ['관리비'], None),
+    ('spend', 'utilities', 0, 10, '인터넷/통신비', 40000, 60000, ['구독'], None),
+    ('earn', 'salary', 0, 25, '월급', 3000000, 3500000, [], '정기 급여'),
+    ('save', 'saving', 0, 26, '적금 이체', 300000, 500000, [], '정기 적금'),
 ]
 
-# 수익 거래 템플릿
-EARN_TEMPLATES = [
-    {
-        'category': 'salary',
-        'tier_level': 0,
-        'items': [
-            ('월급', 3000000, 3500000, [], '정기 급여'),
-        ],
-        'frequency': 'monthly'
-    },
-    {
-        'category': 'bonus',
-        'tier_level': 1,
-        'items': [
-            ('성과급', 500000, 1000000, [], '분기별 성과급'),
-        ],
-        'frequency': 'rare'  # 3개월에 1회 정도
-    },
-    {
-        'category': 'side_income',
-        'tier_level': 2,
-        'items': [
-            ('부업 수입', 100000, 300000, [], '프리랜서 작업'),
-            ('중고거래', 50000, 200000, [], '물건 판매'),
-        ],
-        'frequency': 'occasional'
-    },
+# 매일 임의로 생기는 거래 템플릿: 상대 빈도(weight)에 비례해 뽑힌다
+# (분류, 카테고리, 티어 레벨, weight, [(이름, 최소, 최대, 태그, 설명)])
+VARIABLE_TEMPLATES = [
+    ('spend', 'food', 1, 40, [
+        ('아침식사', 5000, 8000, ['외식'], None),
+        ('점심식사', 8000, 12000, ['외식'], None),
+        ('저녁식사', 10000, 15000, ['외식'], None),
+        ('편의점', 3000, 8000, [], None),
+        ('마트 장보기', 30000, 80000, ['장보기'], None),
+    ]),
+    ('spend', 'transportation', 1, 15, [
+        ('주유', 60000, 90000, ['차량'], None),
+        ('지하철', 1500, 1500, [], None),
+        ('버스', 1500, 1500, [], None),
+        ('택시', 8000, 25000, [], None),
+        ('주차비', 3000, 10000, ['차량'], None),
+    ]),
+    ('spend', 'cafe', 2, 15, [
+        ('스타벅스', 5500, 8000, ['카페'], None),
+        ('이디야 커피', 3000, 5000, ['카페'], None),
+        ('베이커리 카페', 8000, 15000, ['카페', '외식'], None),
+        ('디저트 카페', 10000, 20000, ['카페', '데이트'], None),
+    ]),
+    ('spend', 'food', 2, 6, [
+        ('맛집 외식', 30000, 60000, ['외식', '데이트'], None),
+        ('술집/바', 40000, 80000, ['외식', '친구'], None),
+        ('회식', 50000, 100000, ['외식', '회식'], None),
+        ('치킨/야식', 20000, 30000, ['외식'], None),
+    ]),
+    ('spend', 'etc', 2, 3, [
+        ('영화', 15000, 20000, ['데이트', '취미'], None),
+        ('쇼핑', 30000, 150000, ['쇼핑'], None),
+        ('노래방', 20000, 30000, ['친구'], None),
+        ('병원/약국', 5000, 40000, ['건강'], None),
+    ]),
+    ('spend', 'game', 3, 2, [
+        ('게임 결제', 10000, 50000, ['게임'], None),
+        ('스팀 게임', 20000, 60000, ['게임'], None),
+    ]),
+    ('spend', 'etc', 3, 2, [
+        ('배드민턴 용품', 30000, 100000, ['운동', '취미'], None),
+        ('헬스장', 70000, 100000, ['운동', '구독'], None),
+        ('책/전자책', 10000, 30000, ['교육', '취미'], None),
+    ]),
+    ('earn', 'bonus', 1, 0.2, [
+        ('성과급', 500000, 1000000, [], '분기별 성과급'),
+    ]),
+    ('earn', 'side_income', 2, 1, [
+        ('부업 수입', 100000, 300000, [], '프리랜서 작업'),
+        ('중고거래', 50000, 200000, [], '물건 판매'),
+    ]),
+    ('save', 'investment', 3, 0.5, [
+        ('주식 매수', 100000, 1000000, [], None),
+        ('ETF 적립', 50000, 300000, [], None),
+    ]),
 ]
 
-def get_random_date(start_date, end_date):
-    """시작일과 종료일 사이의 랜덤한 날짜 반환"""
-    time_between = end_date - start_date
-    days_between = time_between.days
-    random_days = random.randint(0, days_between)
-    return start_date + timedelta(days=random_days)
-
-def generate_transactions():
-    """더미 거래 데이터 생성"""
-    print("더미 데이터 생성을 시작합니다...")
-    
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        # 1. 태그 생성
-        print("\n1. 태그 생성 중...")
-        for name, description, color in TAGS:
-            cursor.execute(
-                """INSERT OR IGNORE INTO asset_tags (name, description, color) 
-                   VALUES (?, ?, ?)""",
-                (name, description, color)
-            )
-        print(f"   ✓ {len(TAGS)}개 태그 생성 완료")
-        
-        # 태그 ID 매핑
-        cursor.execute("SELECT id, name FROM asset_tags")
-        tag_id_map = {row[1]: row[0] for row in cursor.fetchall()}
-        
-        # 2. 클래스, 카테고리, 티어 ID 가져오기
-        cursor.execute("SELECT id, name FROM asset_classes")
-        class_id_map = {row[1]: row[0] for row in cursor.fetchall()}
-        
-        cursor.execute("SELECT id, class_id, name FROM asset_categories")
-        category_map = {}
-        for row in cursor.fetchall():
-            cat_id, cls_id, name = row
-            if cls_id not in category_map:
-                category_map[cls_id] = {}
-            category_map[cls_id][name] = cat_id
-        
-        cursor.execute("SELECT id, class_id, tier_level FROM asset_tiers")
-        tier_map = {}
-        for row in cursor.fetchall():
-            tier_id, cls_id, tier_level = row
-            if cls_id not in tier_map:
-                tier_map[cls_id] = {}
-            tier_map[cls_id][tier_level] = tier_id
-        
-        # 3. 지출 거래 생성
-        print("\n2. 지출 거래 생성 중...")
-        spend_count = 0
-        spend_class_id = class_id_map['spend']
-        
-        current_date = START_DATE
-        while current_date <= END_DATE:
-            for template in SPEND_TEMPLATES:
-                category_name = template['category']
-                tier_level = template['tier_level']
-                frequency = template['frequency']
-                
-                category_id = category_map[spend_class_id][category_name]
-                tier_id = tier_map[spend_class_id][tier_level]
-                
-                # 빈도에 따라 생성 개수 결정
-                if frequency == 'monthly':
-                    # 매월 1회 (월 초)
-                    if current_date.day <= 5:
-                        for item in template['items']:
-                            name, min_cost, max_cost, tags, desc = item
-                            cost = random.randint(min_cost, max_cost)
-                            date = current_date + timedelta(days=random.randint(0, 5))
-                            
-                            cursor.execute(
-                                """INSERT INTO assets 
-                                   (name, cost, class_id, category_id, tier_id, date, description)
-                                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                                (name, cost, spend_class_id, category_id, tier_id, 
-                                 date.strftime('%Y-%m-%d'), desc)
-                            )
-                            asset_id = cursor.lastrowid
-                            
-                            # 태그 연결
-                            for tag_name in tags:
-                                if tag_name in tag_id_map:
-                                    cursor.execute(
-                                        """INSERT INTO asset_tag_relations (asset_id, tag_id)
-                                           VALUES (?, ?)""",
-                                        (asset_id, tag_id_map[tag_name])
-                                    )
-                            spend_count += 1
-                
-                elif frequency == 'daily':
-                    # 매일 1-3회
-                    daily_count = random.randint(1, 3)
-                    for _ in range(daily_count):
-                        item = random.choice(template['items'])
-                        name, min_cost, max_cost, tags, desc = item
-                        cost = random.randint(min_cost, max_cost)
-                        
-                        cursor.execute(
-                            """INSERT INTO assets 
-                               (name, cost, class_id, category_id, tier_id, date, description)
-                               VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                            (name, cost, spend_class_id, category_id, tier_id,
-                             current_date.strftime('%Y-%m-%d'), desc)
-                        )
-                        asset_id = cursor.lastrowid
-                        
-                        for tag_name in tags:
-                            if tag_name in tag_id_map:
-                                cursor.execute(
-                                    """INSERT INTO asset_tag_relations (asset_id, tag_id)
-                                       VALUES (?, ?)""",
-                                    (asset_id, tag_id_map[tag_name])
-                                )
-                        spend_count += 1
-                
-                elif frequency == 'frequent':
-                    # 주 3-5회 (확률 60%)
-                    if random.random() < 0.6:
-                        item = random.choice(template['items'])
-                        name, min_cost, max_cost, tags, desc = item
-                        cost = random.randint(min_cost, max_cost)
-                        
-                        cursor.execute(
-                            """INSERT INTO assets 
-                               (name, cost, class_id, category_id, tier_id, date, description)
-                               VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                            (name, cost, spend_class_id, category_id, tier_id,
-                             current_date.strftime('%Y-%m-%d'), desc)
-                        )
-                        asset_id = cursor.lastrowid
-                        
-                        for tag_name in tags:
-                            if tag_name in tag_id_map:
-                                cursor.execute(
-                                    """INSERT INTO asset_tag_relations (asset_id, tag_id)
-                                       VALUES (?, ?)""",
-                                    (asset_id, tag_id_map[tag_name])
-                                )
-                        spend_count += 1
-                
-                elif frequency == 'weekly':
-                    # 주 1-2회 (확률 25%)
-                    if random.random() < 0.25:
-                        item = random.choice(template['items'])
-                        name, min_cost, max_cost, tags, desc = item
-                        cost = random.randint(min_cost, max_cost)
-                        
-                        cursor.execute(
-                            """INSERT INTO assets 
-                               (name, cost, class_id, category_id, tier_id, date, description)
-                               VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                            (name, cost, spend_class_id, category_id, tier_id,
-                             current_date.strftime('%Y-%m-%d'), desc)
-                        )
-                        asset_id = cursor.lastrowid
-                        
-                        for tag_name in tags:
-                            if tag_name in tag_id_map:
-                                cursor.execute(
-                                    """INSERT INTO asset_tag_relations (asset_id, tag_id)
-                                       VALUES (?, ?)""",
-                                    (asset_id, tag_id_map[tag_name])
-                                )
-                        spend_count += 1
-                
-                elif frequency == 'occasional':
-                    # 월 2-4회 (확률 10%)
-                    if random.random() < 0.1:
-                        item = random.choice(template['items'])
-                        name, min_cost, max_cost, tags, desc = item
-                        cost = random.randint(min_cost, max_cost)
-                        
-                        cursor.execute(
-                            """INSERT INTO assets 
-                               (name, cost, class_id, category_id, tier_id, date, description)
-                               VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                            (name, cost, spend_class_id, category_id, tier_id,
-                             current_date.strftime('%Y-%m-%d'), desc)
-                        )
-                        asset_id = cursor.lastrowid
-                        
-                        for tag_name in tags:
-                            if tag_name in tag_id_map:
-                                cursor.execute(
-                                    """INSERT INTO asset_tag_relations (asset_id, tag_id)
-                                       VALUES (?, ?)""",
-                                    (asset_id, tag_id_map[tag_name])
-                                )
-                        spend_count += 1
-            
-            current_date += timedelta(days=1)
-        
-        print(f"   ✓ {spend_count}개 지출 거래 생성 완료")
-        
-        # 4. 수익 거래 생성
-        print("\n3. 수익 거래 생성 중...")
-        earn_count = 0
-        earn_class_id = class_id_map['earn']
-        
-        current_date = START_DATE
-        while current_date <= END_DATE:
-            for template in EARN_TEMPLATES:
-                category_name = template['category']
-                tier_level = template['tier_level']
-                frequency = template['frequency']
-                
-                category_id = category_map[earn_class_id][category_name]
-                tier_id = tier_map[earn_class_id][tier_level]
-                
-                if frequency == 'monthly':
-                    # 매월 1회 (25일 전후)
-                    if 23 <= current_date.day <= 27:
-                        for item in template['items']:
-                            name, min_amount, max_amount, tags, desc = item
-                            amount = random.randint(min_amount, max_amount)
-                            
-                            cursor.execute(
-                                """INSERT INTO assets 
-                                   (name, cost, class_id, category_id, tier_id, date, description)
-                                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                                (name, amount, earn_class_id, category_id, tier_id,
-                                 current_date.strftime('%Y-%m-%d'), desc)
-                            )
-                            earn_count += 1
-                
-                elif frequency == 'rare':
-                    # 3개월에 1회 (확률 3%)
-                    if random.random() < 0.03:
-                        item = random.choice(template['items'])
-                        name, min_amount, max_amount, tags, desc = item
-                        amount = random.randint(min_amount, max_amount)
-                        
-                        cursor.execute(
-                            """INSERT INTO assets 
-                               (name, cost, class_id, category_id, tier_id, date, description)
-                               VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                            (name, amount, earn_class_id, category_id, tier_id,
-                             current_date.strftime('%Y-%m-%d'), desc)
-                        )
-                        earn_count += 1
-                
-                elif frequency == 'occasional':
-                    # 월 1-2회 (확률 5%)
-                    if random.random() < 0.05:
-                        item = random.choice(template['items'])
-                        name, min_amount, max_amount, tags, desc = item
-                        amount = random.randint(min_amount, max_amount)
-                        
-                        cursor.execute(
-                            """INSERT INTO assets 
-                               (name, cost, class_id, category_id, tier_id, date, description)
-                               VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                            (name, amount, earn_class_id, category_id, tier_id,
-                             current_date.strftime('%Y-%m-%d'), desc)
-                        )
-                        earn_count += 1
-            
-            current_date += timedelta(days=1)
-        
-        print(f"   ✓ {earn_count}개 수익 거래 생성 완료")
-        
-        # 5. 태그 사용 횟수 업데이트
-        print("\n4. 태그 사용 횟수 업데이트 중...")
-        cursor.execute("""
-            UPDATE asset_tags 
-            SET usage_count = (
-                SELECT COUNT(*) 
-                FROM asset_tag_relations 
-                WHERE asset_tag_relations.tag_id = asset_tags.id
-            )
-        """)
-        print("   ✓ 태그 사용 횟수 업데이트 완료")
-        
-        conn.commit()
-        
-        # 6. 통계 출력
-        print("\n" + "="*50)
-        print("더미 데이터 생성 완료!")
-        print("="*50)
-        print(f"기간: {START_DATE.strftime('%Y-%m-%d')} ~ {END_DATE.strftime('%Y-%m-%d')}")
-        print(f"총 거래 수: {spend_count + earn_count}건")
-        print(f"  - 지출: {spend_count}건")
-        print(f"  - 수익: {earn_count}건")
-        print(f"태그 수: {len(TAGS)}개")
-        print("="*50)
-        
-        # 월별 통계
+# 분류되지 않은(하위 카테고리 없는) 거래 비율
+UNCLASSIFIED_RATIO = 0.1
+# executemany 한 번에 넘길 행 수
+INSERT_BATCH_SIZE = 50_000
+
+
+def _load_references(cursor, extra_categories: int, rng: random.Random) -> dict:
+    """분류/카테고리/티어/하위 카테고리/태그 ID 매핑 (필요하면 태그와 추가 카테고리 생성)"""
+    cursor.executemany(
+        "INSERT OR IGNORE INTO asset_tags (name, description, color) VALUES (?, ?, ?)", TAGS
+    )
+    cursor.execute("SELECT id, name FROM asset_tags")
+    tag_ids = {name: tag_id for tag_id, name in cursor.fetchall()}
+
+    cursor.execute("SELECT id, name FROM asset_classes")
+    class_ids = {name: class_id for class_id, name in cursor.fetchall()}
+    cursor.execute("SELECT id, class_id, tier_level FROM asset_tiers")
+    tier_ids = {(class_id, level): tier_id for tier_id, class_id, level in cursor.fetchall()}
+
+    # 카테고리 수를 늘려 GROUP BY 카디널리티를 키우고 싶을 때 쓰는 합성 지출 카테고리
+    spend_id = class_ids['spend']
+    for i in range(1, extra_categories + 1):
+        level = rng.choice([1, 2, 3])
         cursor.execute("""
-            SELECT 
-                strftime('%Y-%m', date) as month,
-                asset_classes.name as class,
-                COUNT(*) as count,
-                SUM(cost) as total
-            FROM assets
-            JOIN asset_classes ON assets.class_id = asset_classes.id
-            WHERE date BETWEEN ? AND ?
-            GROUP BY month, class
-            ORDER BY month, class
-        """, (START_DATE.strftime('%Y-%m-%d'), END_DATE.strftime('%Y-%m-%d')))
-        
-        print("\n월별 통계:")
-        for row in cursor.fetchall():
-            month, cls, count, total = row
-            cls_name = '지출' if cls == 'spend' else '수익' if cls == 'earn' else cls
-            print(f"  {month} - {cls_name}: {count:3d}건, {total:>12,}원")
+            INSERT OR IGNORE INTO asset_categories (class_id, name, display_name, tier_id)
+            VALUES (?, ?, ?, ?)
+        """, (spend_id, f"synthetic_{i}", f"합성 카테고리 {i}", tier_ids[(spend_id, level)]))
+
+    cursor.execute("SELECT id, class_id, name, tier_id FROM asset_categories")
+    category_ids, category_tier_ids = {}, {}
+    for category_id, class_id, name, tier_id in cursor.fetchall():
+        category_ids[(class_id, name)] = category_id
+        category_tier_ids[category_id] = tier_id
+    cursor.execute("SELECT category_id, MIN(id) FROM asset_sub_categories GROUP BY category_id")
+    sub_category_ids = dict(cursor.fetchall())
+
+    return {
+        "tag_ids": tag_ids,
+        "class_ids": class_ids,
+        "tier_ids": tier_ids,
+        "category_ids": category_ids,
+        "category_tier_ids": category_tier_ids,
+        "sub_category_ids": sub_category_ids,
+    }
+
+
+def _variable_templates(refs: dict, extra_categories: int) -> tuple[list, list]:
+    """(클래스 ID, 카테고리 ID, 티어 ID, 항목 목록) 템플릿과 누적 가중치"""
+    templates, weights = [], []
+    for cls, category, level, weight, items in VARIABLE_TEMPLATES:
+        class_id = refs["class_ids"][cls]
+        templates.append((
+            class_id, refs["category_ids"][(class_id, category)],
+            refs["tier_ids"][(class_id, level)], items,
+        ))
+        weights.append(weight)
+
+    # 합성 카테고리 거래는 카테고리에 저장된 티어를 그대로 쓴다 (이미 있던 카테고리도 마찬가지)
+    spend_id = refs["class_ids"]['spend']
+    for i in range(1, extra_categories + 1):
+        category_id = refs["category_ids"][(spend_id, f"synthetic_{i}")]
+        templates.append((
+            spend_id, category_id, refs["category_tier_ids"][category_id],
+            [(f"합성 거래 {i}-{n}", 1000, 100000, [], None) for n in range(3)],
+        ))
+        weights.append(1)
+
+    cumulative, total = [], 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return templates, cumulative
+
+
+def generate_ledger(years: float = 0.25, tx_per_day: float = 5.0, tag_density: float = 0.6,
+                    extra_categories: int = 0, seed: int = 42, end: date = None,
+                    rebuild_search: bool = True) -> dict:
+    """end(기본 오늘)까지 years년치 거래를 현재 DB에 적재하고 요약 반환
+
+    - tx_per_day: 하루 평균 임의 거래 수 (월세/급여 같은 월 고정 거래는 별도로 추가)
+    - tag_density: 거래에 태그가 붙을 확률 (템플릿 태그가 없으면 임의 태그 하나)
+    - extra_categories: 기본 카테고리 외에 추가할 합성 지출 카테고리 수
+    - rebuild_search: False면 검색 인덱스/태그 집계 재계산 생략 (database.bulk_load 참고)
+    """
+    rng = random.Random(seed)
+    end = end or date.today()
+    start = end - timedelta(days=max(1, round(years * 365)) - 1)
+
+    with database.get_db_connection() as conn:
+        with database.bulk_load(conn, rebuild_search=rebuild_search) as cursor:
+            refs = _load_references(cursor, extra_categories, rng)
+            templates, cumulative = _variable_templates(refs, extra_categories)
+            tag_names = [name for name, _, _ in TAGS]
+            sub_category_ids = refs["sub_category_ids"]
+
+            monthly = []
+            for cls, category, level, day, *item in MONTHLY_ITEMS:
+                class_id = refs["class_ids"][cls]
+                monthly.append((
+                    day, class_id, refs["category_ids"][(class_id, category)],
+                    refs["tier_ids"][(class_id, level)], item,
+                ))
+
+            # id는 flush 때 reserve_asset_ids로 잡고, 그 전까지 관계는 배치 안 순번으로 가리킨다
+            assets, relations = [], []
+            counts = {"assets": 0, "tag_relations": 0}
+
+            # 행마다 호출되므로 randint/choice 대신 random() 한 번으로 값을 뽑는다
+            random_ = rng.random
+            tag_ids = refs["tag_ids"]
+
+            def add(class_id, category_id, tier_id, item, day_iso):
+                name, min_cost, max_cost, tags, description = item
+                sub_category_id = None
+                if random_() >= UNCLASSIFIED_RATIO:
+                    sub_category_id = sub_category_ids.get(category_id)
+                cost = (min_cost // 100 + int(random_() * (max_cost // 100 - min_cost // 100 + 1))) * 100
+                offset = len(assets)
+                assets.append((
+                    name, cost,
+                    class_id, category_id, tier_id, sub_category_id, day_iso, description,
+                ))
+                if random_() < tag_density:
+                    for tag in (tags or [tag_names[int(random_() * len(tag_names))]]):
+                        relations.append((offset, tag_ids[tag]))
+
+            def flush():
+                asset_ids = database.reserve_asset_ids(cursor, len(assets))
+                cursor.executemany("""
+                    INSERT INTO assets
+                        (id, name, cost, class_id, category_id, tier_id, sub_category_id, date, description)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [(asset_id, *row) for asset_id, row in zip(asset_ids, assets)])
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO asset_tag_relations (asset_id, tag_id) VALUES (?, ?)",
+                    [(asset_ids[offset], tag_id) for offset, tag_id in relations]
+                )
+                counts["assets"] += len(assets)
+                counts["tag_relations"] += len(relations)
+                assets.clear()
+                relations.clear()
+
+            # 하루 거래 수는 평균 tx_per_day 주변에서 고르게 흔든다 (0.5배 ~ 1.5배)
+            low, high = int(tx_per_day * 0.5), int(tx_per_day * 1.5 + 0.5)
+            day = start
+            while day <= end:
+                day_iso = day.isoformat()
+                for month_day, class_id, category_id, tier_id, item in monthly:
+                    if day.day == month_day:
+                        add(class_id, category_id, tier_id, item, day_iso)
+                picks = rng.choices(templates, cum_weights=cumulative, k=rng.randint(low, high))
+                for class_id, category_id, tier_id, items in picks:
+                    add(class_id, category_id, tier_id, items[int(random_() * len(items))], day_iso)
+                if len(assets) >= INSERT_BATCH_SIZE:
+                    flush()
+                day += timedelta(days=1)
+            flush()
+
+    database.reference_cache.invalidate()
+    return {"start": start.isoformat(), "end": end.isoformat(), **counts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가계부 더미 데이터 생성")
+    parser.add_argument("--years", type=float, default=0.25, help="생성 기간 (년, 기본 3개월)")
+    parser.add_argument("--tx-per-day", type=float, default=5.0, help="하루 평균 거래 수")
+    parser.add_argument("--tag-density", type=float, default=0.6, help="거래에 태그가 붙을 확률 (0~1)")
+    parser.add_argument("--categories", type=int, default=0, help="추가할 합성 지출 카테고리 수")
+    parser.add_argument("--seed", type=int, default=42, help="난수 시드")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="마지막 날짜 (YYYY-MM-DD, 기본 오늘)")
+    parser.add_argument("--db", type=Path, default=None, help="대상 DB 파일 (기본 data/assets.db)")
+    parser.add_argument("--skip-search", action="store_true",
+                        help="검색 인덱스/태그 집계 재계산 생략 (검색/태그 통계를 쓰지 않는 벤치마크용)")
+    parser.add_argument("--rebuild-search", action="store_true",
+                        help="거래를 만들지 않고 미뤄 둔 검색 인덱스/태그 집계 재계산만 실행")
+    args = parser.parse_args()
+
+    if args.db:
+        database.DB_PATH = args.db
+    database.init_database()
+
+    if args.rebuild_search:
+        started = time.perf_counter()
+        with database.get_db_connection() as conn:
+            database.rebuild_search_tables(conn.cursor())
+        print(f"검색 인덱스/태그 집계 재계산: {time.perf_counter() - started:.1f}s")
+        return
+
+    started = time.perf_counter()
+    summary = generate_ledger(args.years, args.tx_per_day, args.tag_density,
+                              args.categories, args.seed, args.end, rebuild_search=not args.skip_search)
+    elapsed = time.perf_counter() - started
+
+    print("=" * 50)
+    print(f"기간: {summary['start']} ~ {summary['end']}")
+    print(f"거래: {summary['assets']:,}건, 태그 연결: {summary['tag_relations']:,}건")
+    print(f"소요 시간: {elapsed:.1f}s ({summary['assets'] / max(elapsed, 1e-9):,.0f}건/s)")
+    print(f"DB: {database.DB_PATH}")
+    if args.skip_search:
+        print("검색 인덱스/태그 집계 미갱신 (필요하면 --rebuild-search)")
+    print("=" * 50)
+
 
 if __name__ == "__main__":
-    # 데이터베이스 초기화 먼저 실행
-    init_database()
-    
-    # 더미 데이터 생성
-    generate_transactions()
+    main()
@@ -0,0 +1,239 @@
+"""
+거래 원장(assets) 열 지향 인메모리 스냅샷
+날짜(1970-01-01 기준 일수), 금액, 분류/카테고리/하위 카테고리/티어 ID와 사전 인코딩한 거래 이름을
+NumPy 배열로 들고 있어 기간 필터, 그룹 합계, 상위 N건을 SQL 없이 배열 연산으로 계산한다.
+
+ledger_state의 version이 바뀌었을 때 asset_rewrites(수정/삭제 카운터)가 그대로면 마지막으로 읽은
+id 이후 행만 이어 붙이고, 카운터가 바뀌었으면 전체를 다시 읽는다 (AUTOINCREMENT라 id는 증가만 함).
+
+선택 기능이다. 환경 변수 LEDGER_SNAPSHOT=1일 때만 통계/리포트 경로가 이 스냅샷을 쓴다.
+"""
+import os
+import threading
+from datetime import date
+
+import numpy as np
+
+import utils.database as database
+
+# (열 이름, dtype, assets에서 읽는 식)
+COLUMNS = (
+    ("id", np.int64, "id"),
+    ("day", np.int32, "day_num"),
+    ("cost", np.float64, "cost"),
+    ("class_id", np.int32, "class_id"),
+    ("category_id", np.int32, "category_id"),
+    ("sub_category_id", np.int32, "COALESCE(sub_category_id, 0)"),  # 하위 카테고리 없음 = 0
+    ("tier_id", np.int32, "tier_id"),
+)
+MIN_CAPACITY = 1024
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def snapshot_enabled() -> bool:
+    """LEDGER_SNAPSHOT 환경 변수로 스냅샷 경로 사용 여부 (.env가 import 뒤에 로드되므로 호출 시점에 읽음)"""
+    return os.getenv("LEDGER_SNAPSHOT", "").strip().lower() in ("1", "true", "on")
+
+
+def day_number(value) -> int:
+    """date 또는 'YYYY-MM-DD'를 assets.day_num과 같은 일수로 변환"""
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+class LedgerColumns:
+    """한 시점의 스냅샷 (배열은 공유되므로 호출 측에서 수정하지 않는다)"""
+
+    def __init__(self, arrays: dict, names: list):
+        for name, _, _ in COLUMNS:
+            setattr(self, name, arrays[name])
+        self.name_code = arrays["name_code"]
+        self.names = names
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def mask(self, start=None, end=None, class_id=None, category_id=None,
+             sub_category_id=None, tier_id=None) -> np.ndarray:
+        """조건을 모두 만족하는 행의 bool 마스크 (start/end는 date 또는 'YYYY-MM-DD', 양끝 포함)"""
+        selected = np.ones(len(self), dtype=bool)
+        if start is not None:
+            selected &= self.day >= day_number(start)
+        if end is not None:
+            selected &= self.day <= day_number(end)
+        for column, value in (("class_id", class_id), ("category_id", category_id),
+                              ("sub_category_id", sub_category_id), ("tier_id", tier_id)):
+            if value is not None:
+                selected &= getattr(self, column) == value
+        return selected
+
+    def group_sum(self, by: str, mask=None) -> tuple:
+        """by 열 값별 (키, 건수, 합계) 배열 (키 오름차순, 거래가 있는 키만)
+
+        ID 열은 작은 양의 정수라 정렬 없이 bincount 한 번으로 집계한다.
+        """
+        keys = getattr(self, by) if mask is None else getattr(self, by)[mask]
+        costs = self.cost if mask is None else self.cost[mask]
+        counts = np.bincount(keys)
+        totals = np.bincount(keys, weights=costs)
+        present = np.flatnonzero(counts)
+        return present, counts[present], totals[present]
+
+    def top_n(self, n: int, mask=None) -> np.ndarray:
+        """금액 내림차순(같으면 id 내림차순) 상위 n건의 행 위치"""
+        rows = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        if len(rows) > n:
+            # n번째 금액 이상만 남긴 뒤 정렬 (경계의 같은 금액은 모두 후보에 포함)
+            threshold = np.partition(self.cost[rows], len(rows) - n)[len(rows) - n]
+            rows = rows[self.cost[rows] >= threshold]
+        order = np.lexsort((-self.id[rows], -self.cost[rows]))
+        return rows[order[:n]]
+
+    def name_of(self, row: int) -> str:
+        return self.names[self.name_code[row]]
+
+
+class LedgerSnapshot:
+    """assets 열 지향 스냅샷 (프로세스 전역, 원장 버전 기준 증분 갱신)
+
+    열 배열은 여유 용량을 두고 두 배씩 키우므로 새 거래를 이어 붙일 때 기존 값을 복사하지 않는다.
+    이미 내준 LedgerColumns는 자기 길이까지만 보므로 뒤에 붙는 행의 영향을 받지 않는다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buffers = None
+        self._size = 0
+        self._names = []
+        self._name_codes = {}
+        self._db_path = None
+        self._version = None
+        self._rewrites = None
+        self._last_id = 0
+        self._view = None
+        self.hits = 0
+        self.appends = 0
+        self.reloads = 0
+
+    def get(self, cursor) -> LedgerColumns:
+        """cursor로 ledger_state를 확인해 필요한 만큼 갱신한 스냅샷"""
+        cursor.execute("SELECT version, asset_rewrites FROM ledger_state WHERE id = 1")
+        version, rewrites = cursor.fetchone()
+        db_path = str(database.DB_PATH)
+        with self._lock:
+            if self._view is not None and self._db_path == db_path and self._version == version:
+                self.hits += 1
+                return self._view
+            if self._view is None or self._db_path != db_path or self._rewrites != rewrites:
+                self._reset()
+                self.reloads += 1
+            else:
+                self.appends += 1
+            self._append(cursor)
+            self._db_path, self._version, self._rewrites = db_path, version, rewrites
+            self._view = LedgerColumns(
+                {name: buffer[:self._size] for name, buffer in self._buffers.items()}, self._names
+            )
+            return self._view
+
+    def _reset(self):
+        self._buffers = {name: np.empty(MIN_CAPACITY, dtype=dtype) for name, dtype, _ in COLUMNS}
+        self._buffers["name_code"] = np.empty(MIN_CAPACITY, dtype=np.int32)
+        self._size = 0
+        self._names = []
+        self._name_codes = {}
+        self._last_id = 0
+
+    def _append(self, cursor):
+        """마지막으로 읽은 id 이후의 행을 열 배열 끝에 추가"""
+        expressions = ", ".join(expr for _, _, expr in COLUMNS)
+        # sqlite3.Row 생성과 행 단위 접근을 피하려고 튜플 커서로 읽어 열 단위로 전치
+        raw = cursor.connection.cursor()
+        raw.row_factory = None
+        raw.execute(f"SELECT {expressions}, name FROM assets WHERE id > ? ORDER BY id", (self._last_id,))
+        rows = raw.fetchall()
+        raw.close()
+        if not rows:
+            return
+
+        needed = self._size + len(rows)
+        capacity = len(self._buffers["id"])
+        if needed > capacity:
+            capacity = max(needed, capacity * 2)
+            for name, buffer in self._buffers.items():
+                grown = np.empty(capacity, dtype=buffer.dtype)
+                grown[:self._size] = buffer[:self._size]
+                self._buffers[name] = grown
+
+        values = list(zip(*rows))
+        window = slice(self._size, needed)
+        for position, (name, dtype, _) in enumerate(COLUMNS):
+            self._buffers[name][window] = np.array(values[position], dtype=dtype)
+
+        # 이름 사전은 새 이름만 추가 (기존 코드는 그대로라 이전 스냅샷과 공유 가능)
+        codes = self._name_codes
+        for name in dict.fromkeys(values[-1]):
+            if name not in codes:
+                codes[name] = len(self._names)
+                self._names.append(name)
+        self._buffers["name_code"][window] = [codes[name] for name in values[-1]]
+        self._size = needed
+        self._last_id = int(self._buffers["id"][needed - 1])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"enabled": snapshot_enabled(), "rows": self._size, "names": len(self._names),
+                    "hits": self.hits, "appends": self.appends, "reloads": self.reloads}
+
+
+ledger_snapshot = LedgerSnapshot()
+
+def get_ledger_snapshot_stats() -> dict:
+    return ledger_snapshot.stats()
+
+
+def _self_check():
+    import sqlite3
+
+    conn = sqlite3.connect(":memory:")
+    database.run_migrations(conn, database.MIGRATIONS)
+    cursor = conn.cursor()
+    insert = """
+        INSERT INTO assets (name, cost, class_id, category_id, sub_category_id, tier_id, date)
+        VALUES (?, ?, ?, ?, ?, 1, ?)
+    """
+    cursor.executemany(insert, [
+        ("점심", 9000, 1, 3, None, "2025-03-01"),
+        ("택시", 15000, 1, 4, None, "2025-03-02"),
+        ("점심", 9000, 1, 3, None, "2025-03-31"),
+        ("월급", 3000000, 2, 8, None, "2025-03-25"),
+    ])
+
+    snapshot = LedgerSnapshot()
+    columns = snapshot.get(cursor)
+    assert len(columns) == 4 and columns.names == ["점심", "택시", "월급"]
+    assert day_number("2025-03-31") == cursor.execute("SELECT day_num FROM assets WHERE id = 3").fetchone()[0]
+    march_spend = columns.mask(start="2025-03-01", end="2025-03-31", class_id=1)
+    keys, counts, totals = columns.group_sum("category_id", march_spend)
+    assert keys.tolist() == [3, 4] and counts.tolist() == [2, 1] and totals.tolist() == [18000, 15000]
+    assert columns.id[columns.top_n(2, march_spend)].tolist() == [2, 3]   # 같은 금액은 id 역순
+    assert snapshot.get(cursor) is columns and snapshot.hits == 1
+
+    cursor.execute(insert, ("점심", 20000, 1, 3, None, "2025-04-01"))
+    appended = snapshot.get(cursor)
+    assert snapshot.appends == 1 and len(appended) == 5 and len(columns) == 4
+    assert appended.name_of(4) == "점심" and len(appended.names) == 3
+
+    cursor.execute("UPDATE assets SET cost = 1000 WHERE id = 2")
+    reloaded = snapshot.get(cursor)
+    assert snapshot.reloads == 2 and reloaded.cost[1] == 1000
+
+    cursor.execute("DELETE FROM assets WHERE id = 1")
+    assert snapshot.get(cursor).id.tolist() == [2, 3, 4, 5]
+    conn.close()
+    print("ledger_snapshot self-check passed")
+
+
+if __name__ == "__main__":
+    _self_check()
@@ -0,0 +1,202 @@
+"""
+asset-manager 핫 쿼리 실행 계획 회귀 검사
+시드 DB에서 API를 실제로 호출해 실행된 SELECT를 모은 뒤 EXPLAIN QUERY PLAN을 돌려,
+거래 수에 비례해 커지는 테이블을 통째로 훑는(SCAN) 쿼리가 있으면 실패한다.
+
+쿼리 문자열을 따로 복사해 두지 않고 실행 중에 수집하므로 API 쿼리가 바뀌어도 검사 대상이 따라간다.
+
+사용법 (app 디렉토리에서):
+    python utils/query_plans.py            # 회귀가 있으면 exit code 1
+    python utils/query_plans.py --verbose  # 모든 쿼리의 실행 계획 출력
+"""
+import argparse
+import re
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import utils.database as database
+
+# 거래 수에 비례해 커지는 테이블 (이 테이블의 SCAN은 회귀)
+LARGE_TABLES = {"assets", "asset_tag_relations", "asset_daily_stats", "asset_tag_monthly_stats"}
+
+# 핫 쿼리를 실행시키는 API 호출 (경로, 파라미터)
+HOT_CALLS = [
+    ("/transactions", {}),
+    ("/transactions", {"class_id": 1, "limit": 50}),
+    ("/transactions", {"start_date": "2025-01-01", "end_date": "2025-03-31"}),
+    ("/transactions", {"class_id": 1, "start_date": "2025-01-01", "end_date": "2025-03-31"}),
+    ("/transactions", {"category_id": 1}),
+    ("/transactions", {"after": "MjAyNS0wMy0zMSwxMDA"}),
+    ("/transactions/unclassified", {}),
+    ("/transactions/export", {"start_date": "2025-01-01", "end_date": "2025-01-31"}),
+    ("/transactions/export", {"class_id": 1, "start_date": "2025-01-01", "end_date": "2025-01-31"}),
+    ("/statistics/period", {"class_id": 1}),
+    ("/statistics/period", {"class_id": 1, "start_date": "2025-01-01", "end_date": "2025-03-31"}),
+    ("/statistics/period", {"class_id": 1, "start_date": "2025-01-05", "end_date": "2025-03-20"}),
+    ("/statistics/monthly", {"year": 2025, "month": 3}),
+    ("/statistics/period-comparison", {"unit": "day", "periods": 8, "end_date": "2025-03-31"}),
+    ("/statistics/period-comparison", {"unit": "week", "periods": 8, "end_date": "2025-03-31"}),
+    ("/statistics/period-comparison", {"unit": "month", "periods": 8, "end_date": "2025-03-31"}),
+    ("/statistics/period-comparison", {"unit": "year", "periods": 3, "end_date": "2025-03-31"}),
+    ("/statistics/tags", {"start": "2024-01", "end": "2025-03"}),
+    ("/statistics/daily", {"year": 2025, "month": 3}),
+    ("/statistics/trend", {"from": "2024-01", "to": "2025-03", "group": "category"}),
+    ("/statistics/flows", {"start_date": "2025-01-01", "end_date": "2025-03-31"}),
+    ("/analytics/anomalies", {"start": "2025-03-01", "end": "2025-03-31"}),
+    ("/analytics/forecast", {"year": 2025, "month": 3}),
+    ("/search", {"query": "스타벅스 카페"}),
+    ("/search", {"query": "카페"}),
+    ("/tags", {}),
+    ("/budgets", {"year": 2025, "month": 3}),
+    ("/recurring-payments", {}),
+]
+
+# 의도적으로 전체를 훑는 호출 (실행 계획은 출력하지만 회귀로 보지 않음)
+EXPECTED_SCANS = {
+    # 1~2글자 용어만 있으면 trigram 인덱스를 쓸 수 없어 부분 문자열 LIKE로 거래 전체를 훑는다
+    "/search?query=카페": "짧은 검색어 부분 문자열 검색",
+}
+
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?", re.IGNORECASE)
+_SQL_KEYWORDS = {"on", "where", "join", "left", "inner", "cross", "group", "order", "limit", "using", "natural"}
+
+
+@contextmanager
+def capture_queries():
+    """이 블록 안에서 풀 연결로 실행된 SQL 문(파라미터가 채워진 형태)을 리스트로 수집"""
+    statements = []
+    original_connect = database._connect
+
+    def traced_connect(db_path):
+        conn = original_connect(db_path)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    database.close_pool()
+    database._connect = traced_connect
+    try:
+        yield statements
+    finally:
+        database._connect = original_connect
+        database.close_pool()
+
+
+def table_aliases(sql: str) -> dict:
+    """FROM/JOIN 절에서 별칭 -> 테이블 이름 매핑 (별칭이 없으면 테이블 이름 그대로)"""
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        aliases[table] = table
+        if alias and alias.lower() not in _SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def full_scans(plan_details: list, sql: str) -> list:
+    """실행 계획 중 LARGE_TABLES를 통째로 훑는 단계 (커버링 인덱스 전체 SCAN 포함)
+
+    LIMIT이 있고 정렬용 임시 B-tree가 없으면 인덱스 순서대로 읽다가 LIMIT에서 멈추므로 허용한다
+    (필터 없는 최신 거래 목록).
+    """
+    aliases = table_aliases(sql)
+    stops_at_limit = re.search(r"\bLIMIT\b", sql, re.IGNORECASE) and not any(
+        "TEMP B-TREE FOR ORDER BY" in detail for detail in plan_details
+    )
+    scans = []
+    for detail in plan_details:
+        match = re.match(r"SCAN (\w+)", detail)
+        if not match or aliases.get(match.group(1), match.group(1)) not in LARGE_TABLES:
+            continue
+        if stops_at_limit and " USING INDEX " in detail:
+            continue
+        scans.append(detail)
+    return scans
+
+
+def is_hot_query(sql: str) -> bool:
+    head = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+    return head in ("SELECT", "WITH") and "sqlite_master" not in sql
+
+
+def collect_hot_queries() -> list:
+    """HOT_CALLS를 실행하며 수집한 (호출, SQL) 목록 (같은 SQL은 한 번만)"""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from modules import asset_manager
+    import modules.discord_report as discord_report
+
+    app = FastAPI()
+    app.include_router(asset_manager.router)
+    client = TestClient(app)
+
+    collected, seen = [], set()
+    for path, params in HOT_CALLS + [("discord_report.get_period_statistics", None)]:
+        with capture_queries() as statements:
+            if params is None:
+                discord_report.get_period_statistics("2025-01-01", "2025-03-31")
+            else:
+                response = client.get("/asset-manager" + path, params=params)
+                assert response.status_code == 200, f"{path} {params}: {response.text}"
+        label = path if not params else f"{path}?{'&'.join(f'{k}={v}' for k, v in params.items())}"
+        for sql in statements:
+            if is_hot_query(sql) and sql not in seen:
+                seen.add(sql)
+                collected.append((label, sql))
+    return collected
+
+
+def check_query_plans(verbose: bool = False) -> list:
+    """수집한 쿼리마다 EXPLAIN QUERY PLAN을 확인하고 회귀 목록 [(호출, SQL, SCAN 단계)] 반환"""
+    regressions = []
+    with database.get_db_connection() as conn:
+        cursor = conn.cursor()
+        for label, sql in collect_hot_queries():
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            details = [row[3] for row in cursor.fetchall()]
+            scans = full_scans(details, sql)
+            expected = scans and label in EXPECTED_SCANS
+            if scans and not expected:
+                regressions.append((label, sql, scans))
+            if verbose or (scans and not expected):
+                print(f"[{'scan' if expected else 'FAIL' if scans else ' ok '}] {label}")
+                for detail in details:
+                    print(f"         {detail}")
+    return regressions
+
+
+def _self_check():
+    sql = "SELECT * FROM assets a JOIN asset_tags t ON t.id = a.id WHERE a.cost > 0"
+    assert table_aliases(sql) == {"assets": "assets", "a": "assets", "asset_tags": "asset_tags", "t": "asset_tags"}
+    assert full_scans(["SCAN a", "SEARCH t USING INTEGER PRIMARY KEY (rowid=?)"], sql) == ["SCAN a"]
+    assert full_scans(["SCAN a USING COVERING INDEX idx_assets_date"], sql) != []
+    assert full_scans(["SCAN a USING INDEX idx_assets_date"], sql + " LIMIT 10") == []
+    assert full_scans(["SCAN a USING INDEX idx_assets_date", "USE TEMP B-TREE FOR ORDER BY"], sql + " LIMIT 10") != []
+    assert full_scans(["SCAN t"], sql) == []
+    assert not is_hot_query("PRAGMA journal_mode = WAL")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="asset-manager 핫 쿼리 실행 계획 회귀 검사")
+    parser.add_argument("--rows", type=int, default=20_000, help="시드할 거래 수")
+    parser.add_argument("--verbose", action="store_true", help="모든 쿼리의 실행 계획 출력")
+    args = parser.parse_args()
+
+    _self_check()
+
+    from utils.benchmark import seed_transactions
+    database.DB_PATH = Path(tempfile.mkdtemp()) / "query_plans.db"
+    database.init_database()
+    seed_transactions(args.rows)
+
+    regressions = check_query_plans(args.verbose)
+    if regressions:
+        print(f"\n{len(regressions)}개 쿼리가 전체 SCAN으로 실행됨")
+        sys.exit(1)
+    print("query plan check passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 // Asset Manager API 호출 함수들
-import { buildUrl, ENDPOINTS, apiGet, apiPost, apiPut, apiDelete } from './config.js';
+import { buildUrl, ENDPOINTS, DEFAULT_FETCH_OPTIONS, apiGet, apiPost, apiPut, apiDelete } from './config.js';
 
 const API_BASE = buildUrl(ENDPOINTS.assetManager);
 
@@ -58,6 +58,12 @@ export async function updateBudget(categoryId, year, month, budgetData) {
     return apiPut(`${API_BASE}/budgets/${categoryId}/${year}/${month}`, budgetData);
 }
 
+export async function recomputeBudgets(fromMonth, toMonth = null) {
+    const params = new URLSearchParams({ from: fromMonth });
+    if (toMonth) params.set('to', toMonth);
+    return apiPost(`${API_BASE}/budgets/recompute?${params}`);
+}
+
 export async function updateCategory(categoryId, categoryData) {
     return apiPut(`${API_BASE}/categories/${categoryId}`, categoryData);
 }
@@ -71,6 +77,63 @@ export async function getTransactions(filters = {}) {
 	return apiGet(`${API_BASE}/transactions`, filters);
 }
 
+/**
+ * 커서 기반 거래 목록 페이지 조회 (무한 스크롤용)
+ * @returns {Promise<{items: Array, nextCursor: string|null}>} nextCursor가 null이면 마지막 페이지
+ */
+export async function getTransactionsPage(filters = {}, after = null) {
+	const params = new URLSearchParams();
+	Object.entries({ ...filters, after }).forEach(([key, value]) => {
+		if (value !== null && value !== undefined && value !== '') {
+			params.append(key, value);
+		}
+	});
+	const response = await fetch(`${API_BASE}/transactions?${params}`, DEFAULT_FETCH_OPTIONS);
+	if (!response.ok) {
+		throw new Error(`Request failed: ${response.status} ${response.statusText}`);
+	}
+	return {
+		items: await response.json(),
+		nextCursor: response.headers.get('X-Next-Cursor')
+	};
+}
+
+/**
+ * 거래 내보내기 URL (브라우저 다운로드용 링크로 사용)
+ * @param {'ndjson'|'csv'} format
+ */
+export function getTransactionsExportUrl(format = 'csv', filters = {}) {
+	const params = new URLSearchParams({ format });
+	Object.entries(filters).forEach(([key, value]) => {
+		if (value !== null && value !== undefined && value !== '') {
+			params.append(key, value);
+		}
+	});
+	return `${API_BASE}/transactions/export?${params}`;
+}
+
+export async function bulkCreateTransactions(rows, dryRun = false) {
+	return apiPost(`${API_BASE}/transactions/bulk?dry_run=${dryRun}`, rows);
+}
+
+/**
+ * CSV 파일로 거래 일괄 등록 (내보내기 CSV와 같은 열 형식)
+ * @param {File} file
+ */
+export async function importTransactionsCsv(file, dryRun = false) {
+	const formData = new FormData();
+	formData.append('file', file);
+	const response = await fetch(`${API_BASE}/transactions/bulk?dry_run=${dryRun}`, {
+		method: 'POST',
+		body: formData,
+		credentials: 'include'
+	});
+	if (!response.ok) {
+		throw new Error(`Request failed: ${response.status} ${response.statusText}`);
+	}
+	return response.json();
+}
+
 export async function getUnclassifiedTransactions() {
 	return apiGet(`${API_BASE}/transactions/unclassified`);
 }
@@ -105,8 +168,65 @@ export async function getPeriodComparison(unit = 'week', periods = 4, endDate =
 	return apiGet(`${API_BASE}/statistics/period-comparison`, params);
 }
 
-export async function searchTransactions(query, classId = null) {
-	const params = { query };
+/**
+ * 태그별 금액 추이
+ * @param {string|null} start - 시작 월 (YYYY-MM)
+ * @param {string|null} end - 종료 월 (YYYY-MM)
+ * @param {'month'|'year'} bucket
+ */
+export async function getTagStatistics(start = null, end = null, bucket = 'month', classId = null) {
+	return apiGet(`${API_BASE}/statistics/tags`, { start, end, bucket, class_id: classId });
+}
+
+/**
+ * 월 x 계열 금액 추이 (여러 해를 한 번에)
+ * @param {string} fromMonth - 시작 월 (YYYY-MM)
+ * @param {string|null} toMonth - 종료 월 (YYYY-MM)
+ * @param {'class'|'category'|'tier'} group
+ */
+export async function getTrendStatistics(fromMonth, toMonth = null, group = 'class', classId = null) {
+	return apiGet(`${API_BASE}/statistics/trend`, { from: fromMonth, to: toMonth, group, class_id: classId });
+}
+
+/**
+ * 달력용 일별 분류 합계 (classes[].totals[0] = 1일)
+ * @param {number[]} tierIds - 포함할 티어 ID (비어 있으면 전체)
+ */
+export async function getDailyStatistics(year, month, tierIds = []) {
+	const params = new URLSearchParams({ year, month });
+	tierIds.forEach((id) => params.append('tier_id', id));
+	return apiGet(`${API_BASE}/statistics/daily?${params}`);
+}
+
+/**
+ * Sankey 차트용 자금 흐름 (nodes, links, tiers)
+ * @param {string|null} start - 시작 날짜 (YYYY-MM-DD)
+ * @param {string|null} end - 종료 날짜 (YYYY-MM-DD)
+ */
+export async function getFlowStatistics(start = null, end = null) {
+	return apiGet(`${API_BASE}/statistics/flows`, { start, end });
+}
+
+/**
+ * 카테고리별 이상 지출과 수준 변화 (type: zscore | mad | level_shift, 점수 절댓값 순)
+ * @param {string|null} start - 분석 시작 날짜 (YYYY-MM-DD), 미지정시 종료 30일 전
+ * @param {string|null} end - 분석 종료 날짜 (YYYY-MM-DD), 미지정시 오늘
+ */
+export async function getAnomalies(start = null, end = null, classId = 1) {
+	return apiGet(`${API_BASE}/analytics/anomalies`, { start, end, class_id: classId });
+}
+
+/**
+ * 카테고리별 월말 예상 합계(80% 구간)와 예산 초과 예측 (overruns[].status: exceeded | likely | possible)
+ * @param {number|null} year - 미지정시 이번 달
+ * @param {number|null} month
+ */
+export async function getForecast(year = null, month = null, classId = 1) {
+	return apiGet(`${API_BASE}/analytics/forecast`, { year, month, class_id: classId });
+}
+
+export async function searchTransactions(query, classId = null, limit = 50, offset = 0) {
+	const params = { query, limit, offset };
 	if (classId) params.class_id = classId;
 	return apiGet(`${API_BASE}/search`, params);
 }
@@ -133,6 +253,14 @@ export async function getRecurringPayments(activeOnly = true) {
 	return apiGet(`${API_BASE}/recurring-payments`, { active_only: activeOnly });
 }
 
+/**
+ * 다음 정기 결제 실행 때 등록될 건 미리 보기 (놓친 날 포함, 아무것도 쓰지 않음)
+ * @param {string|null} through - 확인할 마지막 날짜 (YYYY-MM-DD), 미지정시 오늘
+ */
+export async function previewRecurringPayments(through = null) {
+	return apiGet(`${API_BASE}/recurring-payments/preview`, { through });
+}
+
 export async function createRecurringPayment(data) {
 	return apiPost(`${API_BASE}/recurring-payments`, data);
 }